@@ -1,23 +1,11 @@
 #!/usr/bin/env python3
 """
-家庭账本应用包入口
+家庭账本应用包入口（python -m family_account_book [子命令]）
 """
 
-from .database import init_db
-from .views.main_window import main as start_gui
-
-
-def main():
-    """主应用入口"""
-    # 初始化数据库
-    print("正在初始化数据库...")
-    init_db()
-    print("数据库初始化完成")
-
-    # 启动 GUI 应用
-    print("启动家庭账本应用...")
-    start_gui()
+import sys
 
+from family_account_book.cli import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+性能基准测试
+
+使用确定性的合成账本数据（N 年、K 个分类、P 个人员、收入扣除明细），
+对仓储、分析和导出路径计时并统计 SQL 查询次数，结果输出为 JSON，
+便于在不同提交之间对比。
+
+用法::
+
+    python -m family_account_book.benchmark --sizes 10000 100000 --output bench.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from family_account_book.database import create_tables
+from family_account_book.models import IncomeDetail, Transaction
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.dedupe import DedupeService, compute_dedupe_key
+from family_account_book.services.export import ExportService
+from family_account_book.services.repository import (
+    CategoryService,
+    PersonService,
+    TransactionService,
+)
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+# 合成数据使用的描述词汇
+DESCRIPTION_WORDS = [
+    "超市",
+    "午饭",
+    "晚饭",
+    "地铁",
+    "打车",
+    "水电费",
+    "房租",
+    "水管工",
+    "话费",
+    "电影",
+    "药店",
+    "快递",
+    "咖啡",
+    "水果",
+    "加油",
+    "停车",
+]
+DEDUCTION_ITEMS = [("五险一金", 0.2), ("个税", 0.05)]
+
+INSERT_CHUNK_SIZE = 50_000
+
+# 渲染历史标签页时需要保持 QApplication 存活
+_qt_app = None
+
+
+def generate_ledger(
+    db: Session,
+    rows: int,
+    years: int = 3,
+    categories: int = 20,
+    persons: int = 4,
+    income_ratio: float = 0.05,
+    end_year: int = 2024,
+    seed: int = 42,
+) -> Dict[str, int]:
+    """
+    生成确定性的合成账本
+
+    Args:
+        db: 数据库会话
+        rows: 交易总条数
+        years: 覆盖的年数（截止到 end_year 年底）
+        categories: 分类数量，每 4 个分类中有 3 个挂在前一个一级分类下
+        persons: 人员数量
+        income_ratio: 收入交易占比，每笔收入带五险一金和个税明细
+        end_year: 最后一年
+        seed: 随机种子，相同参数生成完全相同的数据
+
+    Returns:
+        各类记录的数量
+    """
+    rng = random.Random(seed)
+
+    category_service = CategoryService(db)
+    category_ids = []
+    root_id = None
+    for index in range(categories):
+        parent_id = root_id if index % 4 else None
+        category = category_service.create_category(
+            f"分类{index:03d}", parent_id=parent_id
+        )
+        if parent_id is None:
+            root_id = category.id
+        category_ids.append(category.id)
+    income_category_id = category_service.create_category("工资").id
+
+    person_service = PersonService(db)
+    person_ids = [
+        person_service.create_person(f"成员{index:02d}").id for index in range(persons)
+    ]
+
+    start = datetime(end_year - years + 1, 1, 1)
+    span_days = (datetime(end_year + 1, 1, 1) - start).days
+    now = datetime(end_year + 1, 1, 1)
+
+    details = 0
+    next_id = 1
+    for chunk_start in range(0, rows, INSERT_CHUNK_SIZE):
+        chunk = []
+        detail_chunk = []
+        for _ in range(min(INSERT_CHUNK_SIZE, rows - chunk_start)):
+            is_income = rng.random() < income_ratio
+            amount = round(
+                rng.uniform(5000, 20000) if is_income else rng.expovariate(1 / 120),
+                2,
+            )
+            chunk.append(
+                {
+                    "id": next_id,
+                    "date": start
+                    + timedelta(
+                        days=rng.randrange(span_days), minutes=rng.randrange(1440)
+                    ),
+                    "amount": amount,
+                    "transaction_type": "income" if is_income else "expense",
+                    "description": f"{rng.choice(DESCRIPTION_WORDS)} {rng.randrange(1000)}",
+                    "category_id": (
+                        income_category_id if is_income else rng.choice(category_ids)
+                    ),
+                    "person_id": rng.choice(person_ids) if rng.random() < 0.8 else None,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+            row = chunk[-1]
+            row["dedupe_key"] = compute_dedupe_key(
+                row["date"], row["amount"], row["description"], row["person_id"]
+            )
+            if is_income:
+                for item_name, rate in DEDUCTION_ITEMS:
+                    detail_chunk.append(
+                        {
+                            "transaction_id": next_id,
+                            "item_name": item_name,
+                            "amount": round(amount * rate, 2),
+                            "created_at": now,
+                        }
+                    )
+            next_id += 1
+
+        db.execute(insert(Transaction), chunk)
+        if detail_chunk:
+            db.execute(insert(IncomeDetail), detail_chunk)
+        details += len(detail_chunk)
+        db.commit()
+
+    return {
+        "transactions": rows,
+        "income_details": details,
+        "categories": categories + 1,
+        "persons": persons,
+    }
+
+
+class _QueryCounter:
+    """统计引擎上执行的 SQL 语句数"""
+
+    def __init__(self, engine: Engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def _time_operation(
+    name: str,
+    rows: int,
+    operation: Callable[[], object],
+    counter: _QueryCounter,
+    repeat: int,
+) -> Dict:
+    """重复执行并记录耗时和单次查询次数"""
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        counter.count = 0
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+        queries = counter.count
+
+    return {
+        "name": name,
+        "rows": rows,
+        "repeat": repeat,
+        "min_seconds": min(timings),
+        "mean_seconds": statistics.fmean(timings),
+        "median_seconds": statistics.median(timings),
+        "queries": queries,
+    }
+
+
+def _create_history_window(engine: Engine):
+    """PyQt6 可用时创建绑定到基准数据库的主窗口，否则返回 None"""
+    global _qt_app
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+
+        from family_account_book.views.main_window import MainWindow
+    except ImportError:
+        return None
+
+    _qt_app = QApplication.instance() or QApplication(sys.argv[:1])
+    return MainWindow(session_factory=sessionmaker(autoflush=False, bind=engine))
+
+
+def benchmark_size(
+    rows: int, workdir: str, repeat: int = 3, seed: int = 42
+) -> List[Dict]:
+    """
+    在指定规模的合成账本上运行全部基准
+
+    Args:
+        rows: 交易条数
+        workdir: 临时数据库和导出文件所在目录
+        repeat: 每项重复次数
+        seed: 随机种子
+
+    Returns:
+        每项基准的结果列表
+    """
+    db_path = os.path.join(workdir, f"bench_{rows}.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    engine = create_engine(f"sqlite:///{db_path}")
+    create_tables(engine)
+
+    db = Session(bind=engine, autoflush=False)
+    try:
+        end_year = 2024
+        generate_ledger(db, rows, end_year=end_year, seed=seed)
+        db.expire_all()
+
+        counter = _QueryCounter(engine)
+        transaction_service = TransactionService(db)
+        analytics_service = AnalyticsService(db)
+        export_service = ExportService(db)
+        dedupe_service = DedupeService(db)
+        export_base = os.path.join(workdir, f"bench_{rows}")
+
+        def fresh(operation):
+            # 每次计时前清空身份映射，避免命中上一轮已加载的对象
+            def run():
+                db.expunge_all()
+                return operation()
+
+            return run
+
+        operations = {
+            "get_transactions": lambda: transaction_service.get_transactions(),
+            "list_transactions": lambda: transaction_service.list_transactions(),
+            "get_transactions_month": lambda: transaction_service.get_transactions(
+                start_date=date(end_year, 6, 1), end_date=date(end_year, 6, 30)
+            ),
+            "monthly_aggregation": lambda: analytics_service.monthly_aggregation(
+                end_year, 6
+            ),
+            "per_month_series_for_category": (
+                lambda: analytics_service.per_month_series_for_category(
+                    "分类001", end_year - 2, 1, end_year, 12
+                )
+            ),
+            "find_near_duplicates": lambda: dedupe_service.find_near_duplicates(),
+            "export_to_csv": lambda: export_service.export_to_csv(
+                transaction_service.list_transactions(), export_base
+            ),
+        }
+        if importlib.util.find_spec("openpyxl") is not None:
+            operations["export_monthly_report"] = (
+                lambda: export_service.export_monthly_report(end_year, 6, export_base)
+            )
+
+        results = [
+            _time_operation(name, rows, fresh(operation), counter, repeat)
+            for name, operation in operations.items()
+        ]
+
+        window = _create_history_window(engine)
+        if window is not None:
+            results.append(
+                _time_operation(
+                    "filter_history",
+                    rows,
+                    window.filter_history,
+                    counter,
+                    repeat,
+                )
+            )
+            window.close()
+        return results
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def _git_revision() -> Optional[str]:
+    """当前提交号，不在 git 仓库中时返回 None"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES,
+    repeat: int = 3,
+    output: Optional[str] = None,
+    workdir: Optional[str] = None,
+    seed: int = 42,
+) -> Dict:
+    """
+    运行所有规模的基准测试
+
+    Args:
+        sizes: 交易条数列表
+        repeat: 每项重复次数
+        output: JSON 输出文件路径（可选）
+        workdir: 临时目录（默认自动创建并清理）
+        seed: 随机种子
+
+    Returns:
+        包含环境信息和全部结果的字典
+    """
+    with tempfile.TemporaryDirectory(dir=workdir) as tmpdir:
+        results = []
+        for rows in sizes:
+            results.extend(benchmark_size(rows, tmpdir, repeat=repeat, seed=seed))
+
+    report = {
+        "revision": _git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "results": results,
+    }
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="家庭账本性能基准测试")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="交易条数"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数")
+    parser.add_argument("--output", help="JSON 结果输出文件")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.sizes, repeat=args.repeat, output=args.output, seed=args.seed
+    )
+    for result in report["results"]:
+        print(
+            f"{result['name']:<32} {result['rows']:>9} 行  "
+            f"{result['min_seconds'] * 1000:>10.1f} ms  {result['queries']:>6} 次查询"
+        )
+
+
+if __name__ == "__main__":
+    main()
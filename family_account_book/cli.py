@@ -0,0 +1,578 @@
+"""
+家庭账本命令行
+
+报表、导出、导入和维护命令只加载 database 和 services，
+不导入 PyQt6、matplotlib 和 pandas（Excel 导出时才按需加载 pandas，
+report 生成图表时才加载 matplotlib），
+适合在没有图形界面的机器上由定时任务调用。不带子命令时启动图形界面。
+
+用法示例:
+    family-account-book stats --year 2024 --month 6
+    family-account-book export 2024-06.csv --start 2024-06-01 --end 2024-06-30
+    family-account-book import bank.csv
+    family-account-book report --from 2024-01 --to 2024-12
+    family-account-book serve --port 8765
+"""
+
+import argparse
+import json
+import sys
+from datetime import date, datetime
+from typing import List, Optional
+
+EXIT_ERROR = 1
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD: {value}")
+
+
+def _parse_month(value: str):
+    try:
+        parsed = datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"月份格式应为 YYYY-MM: {value}")
+    return parsed.year, parsed.month
+
+
+def _session_factory(args):
+    """--db 指定数据库文件时为其创建引擎并建表，否则使用应用数据库"""
+    from family_account_book import database
+
+    if args.db:
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        bind = create_engine(f"sqlite:///{args.db}")
+        database.create_tables(bind)
+        return sessionmaker(autoflush=False, bind=bind)
+
+    database.init_db()
+    return database.SessionLocal
+
+
+def _print_json(data):
+    print(json.dumps(data, ensure_ascii=False, indent=2, default=str))
+
+
+def cmd_stats(args) -> int:
+    """月度支出统计和收入汇总"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.analytics import AnalyticsService
+
+    today = date.today()
+    year, month = args.year or today.year, args.month or today.month
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+
+    with session_scope(_session_factory(args)) as db:
+        analytics = AnalyticsService(db)
+        expenses = analytics.monthly_aggregation(year, month)
+        income = analytics.income_net_summary(start, end, period="month")
+
+    if args.json:
+        _print_json({"expenses": expenses, "income": income})
+        return 0
+
+    print(f"{year}-{month:02d} 支出")
+    for name, amount in sorted(
+        expenses.items(), key=lambda item: item[1], reverse=True
+    ):
+        if name != "total":
+            print(f"  {name:<16} {amount:>12.2f}")
+    print(f"  {'合计':<16} {expenses.get('total', 0.0):>12.2f}")
+    for row in income.values():
+        print(
+            f"收入 税前 {row['gross']:.2f}  扣除 {row['total_deductions']:.2f}  "
+            f"税后 {row['net']:.2f}"
+        )
+    return 0
+
+
+def cmd_series(args) -> int:
+    """分类月度支出序列"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.analytics import AnalyticsService
+
+    (start_year, start_month), (end_year, end_month) = args.start, args.end
+    with session_scope(_session_factory(args)) as db:
+        series = AnalyticsService(db).per_month_series_for_category(
+            args.category, start_year, start_month, end_year, end_month
+        )
+
+    if args.json:
+        _print_json(series)
+    else:
+        for year, month, amount in series:
+            print(f"{year}-{month:02d}  {amount:>12.2f}")
+    return 0
+
+
+def _filter_from_args(args):
+    """由 _add_filter_arguments 添加的参数生成过滤条件"""
+    from family_account_book.services.filters import TransactionFilter
+
+    return TransactionFilter(
+        start_date=args.start,
+        end_date=args.end,
+        transaction_type=args.type,
+        category_names=tuple(args.category or ()),
+        include_subcategories=args.subcategories,
+        person_names=tuple(args.person or ()),
+        amount_min=args.min,
+        amount_max=args.max,
+        description_contains=args.search,
+    )
+
+
+def cmd_export(args) -> int:
+    """按过滤条件导出交易"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.export import ExportService
+
+    filter_spec = _filter_from_args(args)
+    filename = args.output
+    for suffix in (".csv", ".xlsx"):
+        if filename.endswith(suffix):
+            filename = filename[: -len(suffix)]
+
+    with session_scope(_session_factory(args)) as db:
+        path = ExportService(db).export_transactions(
+            filter_spec, filename, file_format=args.format
+        )
+    print(path)
+    return 0
+
+
+def cmd_delete(args) -> int:
+    """按过滤条件批量删除交易（不带 --yes 时只显示将删除的条数）"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.repository import TransactionService
+
+    filter_spec = _filter_from_args(args)
+    with session_scope(_session_factory(args)) as db:
+        service = TransactionService(db)
+        if not args.yes:
+            count = service.count_transactions(filter_spec)
+            print(f"将删除 {count} 条交易，确认请加 --yes")
+            return 0
+        count = service.bulk_delete(filter_spec)
+    print(f"已删除 {count} 条交易")
+    return 0
+
+
+def cmd_recategorize(args) -> int:
+    """把一个分类下（可按条件限定）的交易改为另一个分类"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.repository import TransactionService
+
+    with session_scope(_session_factory(args)) as db:
+        count = TransactionService(db).bulk_reassign_category(
+            args.from_category, args.to_category, _filter_from_args(args)
+        )
+    print(f"已将 {count} 条交易从 {args.from_category} 改为 {args.to_category}")
+    return 0
+
+
+def cmd_merge(args) -> int:
+    """把一个分类或人员合并到另一个（交易、规则、模板改为引用目标后删除原记录）"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.repository import (
+        CategoryService,
+        PersonService,
+    )
+
+    with session_scope(_session_factory(args)) as db:
+        if args.kind == "category":
+            service = CategoryService(db)
+            ids = {row.name: row.id for row in service.list_categories()}
+            merge = service.merge_category
+        else:
+            service = PersonService(db)
+            ids = {row.name: row.id for row in service.list_persons()}
+            merge = service.merge_person
+        for name in (args.source, args.target):
+            if name not in ids:
+                raise ValueError(f"不存在: {name}")
+        count = merge(ids[args.source], ids[args.target])
+    print(f"已将 {args.source} 合并到 {args.target}，修改 {count} 条交易")
+    return 0
+
+
+def cmd_import(args) -> int:
+    """从 CSV 导入交易"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.importer import ImportService
+
+    with session_scope(_session_factory(args)) as db:
+        imported, skipped = ImportService(db).import_csv(
+            args.file, skip_duplicates=not args.allow_duplicates
+        )
+    print(f"导入 {imported} 条，跳过重复 {skipped} 条")
+    return 0
+
+
+def cmd_recurring(args) -> int:
+    """补生成到期的周期交易"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.recurring import RecurringService
+
+    with session_scope(_session_factory(args)) as db:
+        count = RecurringService(db).run_pending(args.today)
+    print(f"生成 {count} 条周期交易")
+    return 0
+
+
+def cmd_migrate(args) -> int:
+    """执行未应用的数据库迁移，或列出迁移状态"""
+    from sqlalchemy import create_engine
+
+    from family_account_book import database, migrations
+
+    bind = create_engine(f"sqlite:///{args.db}") if args.db else database.engine
+    if args.status:
+        version = migrations.current_version(bind)
+        for migration in migrations.MIGRATIONS:
+            mark = "x" if migration.version <= version else " "
+            print(f"[{mark}] {migration.version:>3}  {migration.description}")
+        return 0
+
+    def progress(description: str, done: int, total: int):
+        print(f"\r{description}: {done}/{total}", end="\n" if done == total else "")
+
+    applied = migrations.upgrade(bind, progress)
+    print(f"已应用 {len(applied)} 个迁移，当前版本 {migrations.current_version(bind)}")
+    return 0
+
+
+def _engine(args):
+    """--db 指定的数据库或应用数据库的引擎（已执行迁移）"""
+    return _session_factory(args).kw["bind"]
+
+
+def cmd_vacuum(args) -> int:
+    """完整整理数据库文件并更新查询优化器统计信息"""
+    from family_account_book import maintenance
+
+    bind = _engine(args)
+    before = maintenance.database_stats(bind)["size_bytes"]
+    maintenance.vacuum(bind)
+    after = maintenance.database_stats(bind)["size_bytes"]
+    print(f"完成: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+    return 0
+
+
+def cmd_optimize(args) -> int:
+    """更新统计信息，空闲页较多时增量整理"""
+    from family_account_book import maintenance
+
+    result = maintenance.run_idle_maintenance(_engine(args))
+    print(
+        f"{'ANALYZE' if result['analyzed'] else 'PRAGMA optimize'} 完成，"
+        f"归还 {result['freed_pages']} 个空闲页"
+    )
+    return 0
+
+
+def cmd_backup(args) -> int:
+    """在线备份数据库"""
+    from family_account_book import maintenance
+
+    def progress(done: int, total: int):
+        print(f"\r{done}/{total} 页", end="", file=sys.stderr)
+
+    path = maintenance.backup(_engine(args), args.target, progress=progress)
+    print(file=sys.stderr)
+    print(path)
+    return 0
+
+
+def cmd_check(args) -> int:
+    """完整性检查，发现问题时返回错误码"""
+    from family_account_book import maintenance
+
+    bind = _engine(args)
+    report = maintenance.integrity_check(bind)
+    stats = maintenance.database_stats(bind)
+    if args.json:
+        _print_json({**report, "stats": stats})
+    else:
+        print(
+            f"大小 {stats['size_bytes'] / 1024:.0f} KB，"
+            f"空闲页 {stats['freelist_count']}/{stats['page_count']}，"
+            f"auto_vacuum={stats['auto_vacuum']}"
+        )
+        for error in report["errors"]:
+            print(f"integrity_check: {error}")
+        for table, rowid, parent in report["foreign_key_errors"]:
+            print(f"外键错误: {table} 行 {rowid} 引用的 {parent} 不存在")
+        if not report["search_index_ok"]:
+            print("全文索引与交易表不一致")
+        print("完整性检查通过" if report["ok"] else "完整性检查发现问题")
+    return 0 if report["ok"] else EXIT_ERROR
+
+
+def cmd_archive(args) -> int:
+    """把已结束年份的交易移到归档文件，或恢复、列出已归档年份"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.archive import ArchiveService
+
+    with session_scope(_session_factory(args)) as db:
+        service = ArchiveService(db)
+        if args.restore is not None:
+            count = service.restore_year(args.restore)
+            print(f"已恢复 {args.restore} 年的 {count} 条交易")
+        elif args.year is not None:
+            count = service.archive_year(args.year)
+            print(f"已归档 {args.year} 年的 {count} 条交易")
+        else:
+            for partition in service.get_partitions():
+                print(
+                    f"{partition.year}  {partition.row_count:>8} 条  {partition.path}"
+                )
+            years = service.archivable_years()
+            if years:
+                print(f"可归档: {', '.join(map(str, years))}")
+    return 0
+
+
+def cmd_close(args) -> int:
+    """月度结账：冻结已结束月份的统计，或重新开账、校验、列出已结账月份"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.snapshots import SnapshotService, month_key
+
+    with session_scope(_session_factory(args)) as db:
+        service = SnapshotService(db)
+        if args.reopen is not None:
+            reopened = service.reopen_month(*args.reopen)
+            print(f"{month_key(*args.reopen)} {'已重新开账' if reopened else '未结账'}")
+        elif args.month is not None:
+            closure = service.close_month(*args.month)
+            print(f"{closure.month} 已结账，{closure.row_count} 条交易")
+        elif args.all:
+            months = service.close_finished_months()
+            print(f"结账 {len(months)} 个月份")
+        else:
+            failed = 0
+            for closure in service.get_closures():
+                year, month = int(closure.month[:4]), int(closure.month[5:])
+                status = ""
+                if args.verify:
+                    ok = service.verify_month(year, month)
+                    failed += not ok
+                    status = "  校验通过" if ok else "  校验失败"
+                print(
+                    f"{closure.month}  {closure.row_count:>6} 条  "
+                    f"{closure.checksum[:12]}{status}"
+                )
+            if failed:
+                return EXIT_ERROR
+    return 0
+
+
+def cmd_report(args) -> int:
+    """生成期间报告：图表 PNG、多页 PDF 和每月的 Excel 工作簿"""
+    from family_account_book.database import session_scope
+    from family_account_book.services.report import ReportService
+
+    def progress(done: int, total: int):
+        print(f"\r{done}/{total} 张图表", end="", file=sys.stderr)
+
+    output_dir = args.output or ReportService.default_output_dir(args.start, args.end)
+    with session_scope(_session_factory(args)) as db:
+        result = ReportService(db).generate(
+            args.start,
+            args.end,
+            output_dir,
+            workers=args.workers,
+            workbooks=not args.no_workbooks,
+            progress=progress,
+        )
+    print(file=sys.stderr)
+    for path in [result["pdf"], *result["workbooks"]]:
+        if path:
+            print(path)
+    return 0
+
+
+def cmd_serve(args) -> int:
+    """运行本地 HTTP/JSON 接口服务"""
+    from family_account_book import database
+    from family_account_book.server import run_server
+
+    url = f"sqlite:///{args.db}" if args.db else database.DATABASE_URL
+    try:
+        run_server(url, args.host, args.port, args.workers)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_benchmark(args) -> int:
+    """运行性能基准（参数原样传给 benchmark 模块）"""
+    from family_account_book.benchmark import main as benchmark_main
+
+    benchmark_main(args.benchmark_args)
+    return 0
+
+
+def cmd_gui(args) -> int:
+    """启动图形界面"""
+    from family_account_book.database import init_db
+    from family_account_book.views.main_window import main as start_gui
+
+    init_db()
+    start_gui()
+    return 0
+
+
+def _add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加交易过滤参数（见 _filter_from_args）"""
+    parser.add_argument("--start", type=_parse_date, help="开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", type=_parse_date, help="结束日期 YYYY-MM-DD（包含）")
+    parser.add_argument("--type", choices=["income", "expense"], help="交易类型")
+    parser.add_argument("--category", action="append", help="分类，可重复")
+    parser.add_argument(
+        "--subcategories", action="store_true", help="分类条件包含子分类"
+    )
+    parser.add_argument("--person", action="append", help="人员，可重复")
+    parser.add_argument("--min", type=float, help="最小金额")
+    parser.add_argument("--max", type=float, help="最大金额")
+    parser.add_argument("--search", help="描述包含的文字")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog="family-account-book", description="家庭账本")
+    parser.add_argument("--db", help="SQLite 数据库文件（默认使用应用数据库）")
+    subparsers = parser.add_subparsers(dest="command")
+
+    stats = subparsers.add_parser("stats", help="月度支出统计和收入汇总")
+    stats.add_argument("--year", type=int, help="年份（默认今年）")
+    stats.add_argument("--month", type=int, help="月份（默认本月）")
+    stats.add_argument("--json", action="store_true", help="以 JSON 输出")
+    stats.set_defaults(handler=cmd_stats)
+
+    series = subparsers.add_parser("series", help="分类月度支出序列")
+    series.add_argument("category", help="分类名称")
+    series.add_argument("--from", dest="start", type=_parse_month, required=True)
+    series.add_argument("--to", dest="end", type=_parse_month, required=True)
+    series.add_argument("--json", action="store_true", help="以 JSON 输出")
+    series.set_defaults(handler=cmd_series)
+
+    export = subparsers.add_parser("export", help="按条件导出交易")
+    export.add_argument("output", help="输出文件名")
+    export.add_argument("--format", choices=["csv", "excel"], default="csv")
+    _add_filter_arguments(export)
+    export.set_defaults(handler=cmd_export)
+
+    delete = subparsers.add_parser("delete", help="按条件批量删除交易")
+    _add_filter_arguments(delete)
+    delete.add_argument("--yes", action="store_true", help="确认删除")
+    delete.set_defaults(handler=cmd_delete)
+
+    recategorize = subparsers.add_parser(
+        "recategorize", help="把一个分类下的交易批量改为另一个分类"
+    )
+    recategorize.add_argument("from_category", help="原分类")
+    recategorize.add_argument("to_category", help="新分类（不存在时创建）")
+    _add_filter_arguments(recategorize)
+    recategorize.set_defaults(handler=cmd_recategorize)
+
+    merge = subparsers.add_parser(
+        "merge", help="合并重复的分类或人员（原记录合并后删除）"
+    )
+    merge.add_argument("kind", choices=["category", "person"])
+    merge.add_argument("source", help="被合并的名称")
+    merge.add_argument("target", help="保留的名称")
+    merge.set_defaults(handler=cmd_merge)
+
+    import_parser = subparsers.add_parser("import", help="从 CSV 导入交易")
+    import_parser.add_argument("file", help="CSV 文件")
+    import_parser.add_argument(
+        "--allow-duplicates", action="store_true", help="不跳过重复记录"
+    )
+    import_parser.set_defaults(handler=cmd_import)
+
+    recurring = subparsers.add_parser("recurring", help="补生成到期的周期交易")
+    recurring.add_argument("--today", type=_parse_date, help="截止日期（默认今天）")
+    recurring.set_defaults(handler=cmd_recurring)
+
+    migrate = subparsers.add_parser("migrate", help="执行数据库结构迁移")
+    migrate.add_argument("--status", action="store_true", help="只列出迁移状态")
+    migrate.set_defaults(handler=cmd_migrate)
+
+    vacuum = subparsers.add_parser("vacuum", help="完整整理数据库文件（重写文件）")
+    vacuum.set_defaults(handler=cmd_vacuum)
+
+    optimize = subparsers.add_parser("optimize", help="更新统计信息并增量整理")
+    optimize.set_defaults(handler=cmd_optimize)
+
+    backup = subparsers.add_parser("backup", help="在线备份数据库")
+    backup.add_argument("target", help="备份文件路径")
+    backup.set_defaults(handler=cmd_backup)
+
+    check = subparsers.add_parser("check", help="完整性检查")
+    check.add_argument("--json", action="store_true", help="以 JSON 输出")
+    check.set_defaults(handler=cmd_check)
+
+    archive = subparsers.add_parser(
+        "archive", help="按年归档交易（不带参数时列出已归档年份）"
+    )
+    archive.add_argument("year", nargs="?", type=int, help="要归档的年份")
+    archive.add_argument("--restore", type=int, metavar="YEAR", help="恢复已归档的年份")
+    archive.set_defaults(handler=cmd_archive)
+
+    close = subparsers.add_parser("close", help="月度结账（不带参数时列出已结账月份）")
+    close.add_argument("month", nargs="?", type=_parse_month, help="YYYY-MM")
+    close.add_argument("--all", action="store_true", help="结账所有已结束的月份")
+    close.add_argument(
+        "--reopen", type=_parse_month, metavar="YYYY-MM", help="重新开账"
+    )
+    close.add_argument("--verify", action="store_true", help="列出时重新计算并校验快照")
+    close.set_defaults(handler=cmd_close)
+
+    report = subparsers.add_parser(
+        "report", help="生成期间的图表报告（PDF）和月度工作簿"
+    )
+    report.add_argument("--from", dest="start", type=_parse_month, required=True)
+    report.add_argument("--to", dest="end", type=_parse_month, required=True)
+    report.add_argument("--output", help="输出目录（默认 exports/report_起止月份）")
+    report.add_argument("--workers", type=int, help="绘图进程数（默认 CPU 核数）")
+    report.add_argument(
+        "--no-workbooks", action="store_true", help="不导出每月的 Excel 工作簿"
+    )
+    report.set_defaults(handler=cmd_report)
+
+    serve = subparsers.add_parser("serve", help="运行本地 HTTP/JSON 接口服务")
+    serve.add_argument("--host", default="127.0.0.1", help="监听地址")
+    serve.add_argument("--port", type=int, default=8765, help="监听端口")
+    serve.add_argument("--workers", type=int, default=4, help="读线程数")
+    serve.set_defaults(handler=cmd_serve)
+
+    benchmark = subparsers.add_parser("benchmark", help="运行性能基准")
+    benchmark.add_argument("benchmark_args", nargs=argparse.REMAINDER)
+    benchmark.set_defaults(handler=cmd_benchmark)
+
+    gui = subparsers.add_parser("gui", help="启动图形界面（默认）")
+    gui.set_defaults(handler=cmd_gui)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    args = build_parser().parse_args(argv)
+    handler = getattr(args, "handler", cmd_gui)
+    try:
+        return handler(args)
+    except (ValueError, OSError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,41 @@
 from datetime import datetime
 from typing import List, Tuple
-from family_account_book.database import get_db
-from family_account_book.services.repository import TransactionService, CategoryService
+
+from family_account_book.database import SessionLocal, session_scope
 from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.budget import BudgetService
+from family_account_book.services.dedupe import DedupeService
+from family_account_book.services.recurring import RecurringService
+from family_account_book.services.repository import CategoryService, TransactionService
 
 
 class AccountBookController:
-    """家庭账本控制器"""
+    """家庭账本控制器，每次调用使用独立的短生命周期会话"""
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or SessionLocal
 
-    def __init__(self):
-        self.db = next(get_db())
-        self.transaction_service = TransactionService(self.db)
-        self.category_service = CategoryService(self.db)
-        self.analytics_service = AnalyticsService(self.db)
+    def session_scope(self):
+        """为单次调用打开会话"""
+        return session_scope(self.session_factory)
 
     def record_expense(
-        self, date: datetime, amount: float, description: str, category_name: str
+        self,
+        date: datetime,
+        amount: float,
+        description: str,
+        category_name: str,
+        allow_duplicate: bool = False,
     ):
-        """记录支出"""
-        return self.transaction_service.create_expense(
-            date, amount, description, category_name
-        )
+        """记录支出（疑似重复时抛出 DuplicateTransactionError）"""
+        with self.session_scope() as db:
+            return TransactionService(db).create_expense(
+                date,
+                amount,
+                description,
+                category_name,
+                allow_duplicate=allow_duplicate,
+            )
 
     def record_income(
         self,
@@ -28,21 +43,36 @@ class AccountBookController:
         gross_amount: float,
         description: str,
         deductions: List[Tuple[str, float]],
+        category_name: str = "工资",
+        allow_duplicate: bool = False,
     ):
-        """记录收入"""
-        return self.transaction_service.create_income(
-            date, gross_amount, description, deductions
-        )
+        """记录收入及其扣除明细（疑似重复时抛出 DuplicateTransactionError）"""
+        with self.session_scope() as db:
+            return TransactionService(db).create_income(
+                date,
+                gross_amount,
+                description,
+                category_name,
+                deductions=deductions,
+                allow_duplicate=allow_duplicate,
+            )
 
     def get_monthly_stats(self, year: int, month: int):
         """获取月度统计"""
-        return self.analytics_service.monthly_aggregation(year, month)
+        with self.session_scope() as db:
+            return AnalyticsService(db).monthly_aggregation(year, month)
+
+    def get_income_net_summary(self, start_date=None, end_date=None, period="month"):
+        """获取税前收入、扣除项和税后收入汇总"""
+        with self.session_scope() as db:
+            return AnalyticsService(db).income_net_summary(start_date, end_date, period)
 
     def get_category_sum_in_range(self, category_name: str, start_date, end_date):
         """获取分类在时间段内的总支出"""
-        return self.analytics_service.category_sum_in_range(
-            category_name, start_date, end_date
-        )
+        with self.session_scope() as db:
+            return AnalyticsService(db).category_sum_in_range(
+                category_name, start_date, end_date
+            )
 
     def get_monthly_series_for_category(
         self,
@@ -53,29 +83,51 @@ class AccountBookController:
         end_month: int,
     ):
         """获取分类的月度支出序列"""
-        return self.analytics_service.per_month_series_for_category(
-            category_name, start_year, start_month, end_year, end_month
-        )
+        with self.session_scope() as db:
+            return AnalyticsService(db).per_month_series_for_category(
+                category_name, start_year, start_month, end_year, end_month
+            )
+
+    def get_category_subtree_totals(self, start_date=None, end_date=None):
+        """获取各分类（含子分类）的汇总支出"""
+        with self.session_scope() as db:
+            return AnalyticsService(db).category_subtree_totals(start_date, end_date)
+
+    def get_budget_overview(self, year: int, month: int):
+        """获取预算执行概览"""
+        with self.session_scope() as db:
+            return BudgetService(db).overview(year, month)
 
     def get_transactions(
         self, start_date=None, end_date=None, transaction_type=None, category_name=None
     ):
         """获取交易记录"""
-        return self.transaction_service.get_transactions(
-            start_date, end_date, transaction_type, category_name
-        )
+        with self.session_scope() as db:
+            return TransactionService(db).get_transactions(
+                start_date, end_date, transaction_type, category_name
+            )
+
+    def find_near_duplicates(self, days: int = 3, min_similarity: float = 0.6):
+        """扫描全账本中的疑似重复交易"""
+        with self.session_scope() as db:
+            return DedupeService(db).find_near_duplicates(days, min_similarity)
+
+    def run_recurring(self, today=None) -> int:
+        """补生成所有到期的周期交易"""
+        with self.session_scope() as db:
+            return RecurringService(db).run_pending(today)
 
     def get_categories(self):
-        """获取所有分类"""
-        return self.category_service.get_all_categories()
+        """获取所有分类（只读数据）"""
+        with self.session_scope() as db:
+            return CategoryService(db).list_categories()
 
     def create_category(
         self, name: str, description: str = None, parent_id: int = None
     ):
         """创建分类"""
-        return self.category_service.create_category(name, description, parent_id)
+        with self.session_scope() as db:
+            return CategoryService(db).create_category(name, description, parent_id)
 
     def close(self):
-        """关闭数据库连接"""
-        if self.db:
-            self.db.close()
+        """兼容旧接口：会话在每次调用结束时已关闭"""
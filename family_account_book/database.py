@@ -1,7 +1,14 @@
 import os
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from family_account_book.instrumentation import QueryStats
 
 # SQLite 数据库配置 - 无需安装，开箱即用
 DATABASE_DIR = os.path.expanduser("~/Documents/家庭账本")
@@ -18,22 +25,489 @@ engine = create_engine(
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 线程本地会话注册表，供后台工作线程使用
+ScopedSession = scoped_session(SessionLocal)
+
+# SQL 查询统计（调用 enable_query_stats 后生效）
+query_stats = QueryStats()
+
 
 def get_db() -> Session:
-    """获取数据库会话"""
+    """获取数据库会话（调用方负责关闭，优先使用 session_scope）"""
     return SessionLocal()
 
 
+@contextmanager
+def session_scope(
+    session_factory: Optional[Callable[..., Session]] = None,
+) -> Iterator[Session]:
+    """
+    单次操作的工作单元：正常结束时提交，异常时回滚，最后关闭会话
+
+    会话关闭后身份映射随之释放。提交时不使对象过期，
+    因此返回的对象在范围外仍可读取已加载的列属性。
+
+    Args:
+        session_factory: 会话工厂，默认使用应用数据库
+
+    Yields:
+        数据库会话
+    """
+    session = (session_factory or SessionLocal)(expire_on_commit=False)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+@contextmanager
+def thread_session_scope() -> Iterator[Session]:
+    """
+    后台工作线程的工作单元，使用线程本地会话
+
+    同一线程内嵌套调用得到同一个会话，最外层结束时移除，
+    避免线程池中的线程长期持有会话。
+
+    Yields:
+        当前线程的数据库会话
+    """
+    nested = ScopedSession.registry.has()
+    session = ScopedSession()
+    try:
+        yield session
+        if not nested:
+            session.commit()
+    except Exception:
+        if not nested:
+            session.rollback()
+        raise
+    finally:
+        if not nested:
+            ScopedSession.remove()
+
+
+def enable_query_stats(bind: Optional[Engine] = None) -> QueryStats:
+    """在引擎上启用 SQL 查询统计（按服务方法统计次数、耗时和慢查询）"""
+    query_stats.install(bind or engine)
+    return query_stats
+
+
 def create_database():
     """SQLite 不需要预先创建数据库，文件会自动创建"""
     pass
 
 
-def create_tables():
-    """创建所有表"""
+def create_tables(bind: Optional[Engine] = None):
+    """创建所有表并执行未应用的迁移（默认使用应用数据库引擎，见 migrations）"""
+    from family_account_book.migrations import upgrade
+
+    upgrade(bind or engine)
+
+
+def add_missing_columns(bind: Optional[Engine] = None):
+    """为旧数据库的已有表补充模型中新增的可空列（create_all 不会修改已存在的表）"""
     from family_account_book.models import Base
 
-    Base.metadata.create_all(bind=engine)
+    bind = bind or engine
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(
+                    text(
+                        f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" '
+                        f"{column_type}"
+                    )
+                )
+
+
+def create_indexes(bind: Optional[Engine] = None):
+    """补建模型中声明的索引（create_all 不会为已存在的表补建索引）"""
+    from family_account_book.models import Base
+
+    bind = bind or engine
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
+def sync_category_closure(bind: Optional[Engine] = None):
+    """旧数据库没有分类闭包表数据时，根据 parent_id 回填"""
+    from family_account_book.services.repository import CategoryService
+
+    db = Session(bind=bind or engine)
+    try:
+        category_service = CategoryService(db)
+        if category_service.closure_needs_rebuild():
+            category_service.rebuild_closure()
+    finally:
+        db.close()
+
+
+def backfill_dedupe_keys(
+    bind: Optional[Engine] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+):
+    """为没有去重键的旧交易分批回填去重键（progress 见 DedupeService.backfill_keys）"""
+    from family_account_book.services.dedupe import DedupeService
+
+    db = Session(bind=bind or engine)
+    try:
+        DedupeService(db).backfill_keys(progress)
+    finally:
+        db.close()
+
+
+# 交易全文索引：描述、分类名和人员名，rowid 与 transactions.id 一致。
+# trigram 分词支持中文子串匹配，不可用时退回默认分词器。
+SEARCH_INDEX_TABLE = "transactions_fts"
+_SEARCH_INDEX_CREATE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} "
+    "USING fts5(description, category_name, person_name{tokenize})"
+)
+_SEARCH_INDEX_ROW = """
+    new.description,
+    (SELECT name FROM categories WHERE id = new.category_id),
+    (SELECT name FROM persons WHERE id = new.person_id)
+"""
+_SEARCH_INDEX_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_insert
+    AFTER INSERT ON transactions BEGIN
+        INSERT INTO {SEARCH_INDEX_TABLE}
+            (rowid, description, category_name, person_name)
+        VALUES (new.id, {_SEARCH_INDEX_ROW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_delete
+    AFTER DELETE ON transactions BEGIN
+        DELETE FROM {SEARCH_INDEX_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_update
+    AFTER UPDATE OF description, category_id, person_id ON transactions BEGIN
+        DELETE FROM {SEARCH_INDEX_TABLE} WHERE rowid = old.id;
+        INSERT INTO {SEARCH_INDEX_TABLE}
+            (rowid, description, category_name, person_name)
+        VALUES (new.id, {_SEARCH_INDEX_ROW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_category_rename
+    AFTER UPDATE OF name ON categories BEGIN
+        UPDATE {SEARCH_INDEX_TABLE} SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM transactions WHERE category_id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_person_rename
+    AFTER UPDATE OF name ON persons BEGIN
+        UPDATE {SEARCH_INDEX_TABLE} SET person_name = new.name
+        WHERE rowid IN (SELECT id FROM transactions WHERE person_id = new.id);
+    END
+    """,
+]
+
+
+def create_search_index(bind: Optional[Engine] = None):
+    """创建交易全文索引及同步触发器，索引与交易表不一致时重建"""
+    with (bind or engine).begin() as conn:
+        try:
+            conn.execute(
+                text(_SEARCH_INDEX_CREATE.format(tokenize=", tokenize='trigram'"))
+            )
+        except OperationalError:
+            conn.execute(text(_SEARCH_INDEX_CREATE.format(tokenize="")))
+        for trigger in _SEARCH_INDEX_TRIGGERS:
+            conn.execute(text(trigger))
+
+        indexed = conn.execute(
+            text(f"SELECT count(*) FROM {SEARCH_INDEX_TABLE}")
+        ).scalar()
+        total = conn.execute(text("SELECT count(*) FROM transactions")).scalar()
+        if indexed != total:
+            rebuild_search_index(conn)
+
+
+def search_index_tokenizer(conn) -> str:
+    """
+    全文索引实际使用的分词器
+
+    SQLite 不支持 trigram 时 create_search_index 退回默认的 unicode61 分词，
+    建表语句保存在 sqlite_master 中，据此判断。unicode61 把连续的中文作为
+    一个词，不能用 MATCH 做子串匹配。
+
+    Args:
+        conn: 数据库连接或会话
+
+    Returns:
+        'trigram' 或 'unicode61'
+    """
+    sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE name = :name"),
+        {"name": SEARCH_INDEX_TABLE},
+    ).scalar()
+    return "trigram" if sql and "trigram" in sql else "unicode61"
+
+
+def rebuild_search_index(conn):
+    """根据交易、分类和人员表重建全文索引"""
+    conn.execute(text(f"DELETE FROM {SEARCH_INDEX_TABLE}"))
+    conn.execute(text(f"""
+            INSERT INTO {SEARCH_INDEX_TABLE}
+                (rowid, description, category_name, person_name)
+            SELECT t.id, t.description, c.name, p.name
+            FROM transactions t
+            LEFT JOIN categories c ON c.id = t.category_id
+            LEFT JOIN persons p ON p.id = t.person_id
+            """))
+
+
+# 预算实际支出计数器：按 (分类, 月份) 累计支出，由触发器随交易增删改同步，
+# 预算概览只读计数器，不扫描交易表。
+_BUDGET_ACTUAL_ADD = """
+    INSERT INTO budget_actuals (category_id, month, amount)
+    SELECT new.category_id, substr(new.date, 1, 7), new.amount
+    WHERE new.transaction_type = 'expense' AND new.category_id IS NOT NULL
+    ON CONFLICT (category_id, month) DO UPDATE SET amount = amount + excluded.amount;
+"""
+_BUDGET_ACTUAL_SUBTRACT = """
+    UPDATE budget_actuals SET amount = amount - old.amount
+    WHERE old.transaction_type = 'expense'
+        AND category_id = old.category_id
+        AND month = substr(old.date, 1, 7);
+"""
+_BUDGET_TRIGGERS = {
+    "budget_actuals_insert": f"""
+    CREATE TRIGGER budget_actuals_insert
+    AFTER INSERT ON transactions BEGIN
+        {_BUDGET_ACTUAL_ADD}
+    END
+    """,
+    "budget_actuals_delete": f"""
+    CREATE TRIGGER budget_actuals_delete
+    AFTER DELETE ON transactions BEGIN
+        {_BUDGET_ACTUAL_SUBTRACT}
+    END
+    """,
+    "budget_actuals_update": f"""
+    CREATE TRIGGER budget_actuals_update
+    AFTER UPDATE OF date, amount, transaction_type, category_id ON transactions
+    BEGIN
+        {_BUDGET_ACTUAL_SUBTRACT}
+        {_BUDGET_ACTUAL_ADD}
+    END
+    """,
+}
+
+
+def create_budget_counters(bind: Optional[Engine] = None):
+    """创建预算计数器触发器；触发器是新建的（旧数据库）时根据交易表回填计数器"""
+    with (bind or engine).begin() as conn:
+        existing = set(
+            conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            ).scalars()
+        )
+        missing = [name for name in _BUDGET_TRIGGERS if name not in existing]
+        for name in missing:
+            conn.execute(text(_BUDGET_TRIGGERS[name]))
+        if missing:
+            rebuild_budget_actuals(conn)
+
+
+def rebuild_budget_actuals(conn):
+    """根据交易表重建预算计数器"""
+    conn.execute(text("DELETE FROM budget_actuals"))
+    conn.execute(text("""
+            INSERT INTO budget_actuals (category_id, month, amount)
+            SELECT category_id, substr(date, 1, 7), sum(amount)
+            FROM transactions
+            WHERE transaction_type = 'expense' AND category_id IS NOT NULL
+            GROUP BY category_id, substr(date, 1, 7)
+            """))
+
+
+# 月度快照（见 services.snapshots）：写入已结账月份的交易或收入明细时删除该月的
+# 快照和结账记录，统计随即回到实时计算
+_REOPEN_MONTH = """
+    DELETE FROM month_snapshots WHERE month = {month};
+    DELETE FROM month_closures WHERE month = {month};
+"""
+_TRANSACTION_MONTH = "substr({row}.date, 1, 7)"
+_DETAIL_MONTH = (
+    "(SELECT substr(date, 1, 7) FROM transactions WHERE id = {row}.transaction_id)"
+)
+
+
+def _reopen(month_expression: str, *rows: str) -> str:
+    return "".join(
+        _REOPEN_MONTH.format(month=month_expression.format(row=row)) for row in rows
+    )
+
+
+def _changed(*columns: str) -> str:
+    """更新触发器的条件：只有列值确实改变时才重新开账（保存未修改的行不受影响）"""
+    return " OR ".join(f"old.{name} IS NOT new.{name}" for name in columns)
+
+
+_TRANSACTION_COLUMNS = ("date", "amount", "transaction_type", "category_id")
+_DETAIL_COLUMNS = ("transaction_id", "item_name", "amount")
+
+
+_MONTH_SNAPSHOT_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS month_closures_transaction_insert
+    AFTER INSERT ON transactions BEGIN {_reopen(_TRANSACTION_MONTH, "new")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS month_closures_transaction_delete
+    AFTER DELETE ON transactions BEGIN {_reopen(_TRANSACTION_MONTH, "old")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS month_closures_transaction_update
+    AFTER UPDATE OF {", ".join(_TRANSACTION_COLUMNS)} ON transactions
+    WHEN {_changed(*_TRANSACTION_COLUMNS)}
+    BEGIN {_reopen(_TRANSACTION_MONTH, "old", "new")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS month_closures_detail_insert
+    AFTER INSERT ON income_details BEGIN {_reopen(_DETAIL_MONTH, "new")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS month_closures_detail_delete
+    AFTER DELETE ON income_details BEGIN {_reopen(_DETAIL_MONTH, "old")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS month_closures_detail_update
+    AFTER UPDATE OF {", ".join(_DETAIL_COLUMNS)} ON income_details
+    WHEN {_changed(*_DETAIL_COLUMNS)}
+    BEGIN {_reopen(_DETAIL_MONTH, "old", "new")} END
+    """,
+]
+
+
+# 定义改变过的更新触发器，升级时需要重建
+_MONTH_SNAPSHOT_UPDATE_TRIGGERS = (
+    "month_closures_transaction_update",
+    "month_closures_detail_update",
+)
+
+
+def create_month_snapshot_triggers(
+    bind: Optional[Engine] = None, replace: bool = False
+):
+    """
+    创建写入已结账月份时自动重新开账的触发器
+
+    Args:
+        bind: 数据库引擎
+        replace: 先删除已有的更新触发器再创建（升级触发器定义时使用）
+    """
+    with (bind or engine).begin() as conn:
+        if replace:
+            for name in _MONTH_SNAPSHOT_UPDATE_TRIGGERS:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for trigger in _MONTH_SNAPSHOT_TRIGGERS:
+            conn.execute(text(trigger))
+
+
+# 已归档年份的交易只在归档文件中（见 services.archive），当前表不再接受该年份的写入
+_ARCHIVED_YEAR_GUARD = """
+    WHEN EXISTS (
+        SELECT 1 FROM archive_partitions
+        WHERE year = CAST(substr(new.date, 1, 4) AS INTEGER)
+    )
+    BEGIN
+        SELECT RAISE(ABORT, '该年份的交易已归档，不能写入');
+    END
+"""
+_ARCHIVE_GUARD_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transactions_archived_insert
+    BEFORE INSERT ON transactions {_ARCHIVED_YEAR_GUARD}
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS transactions_archived_update
+    BEFORE UPDATE OF date ON transactions {_ARCHIVED_YEAR_GUARD}
+    """,
+]
+
+
+def create_archive_guards(bind: Optional[Engine] = None):
+    """创建禁止写入已归档年份的触发器"""
+    with (bind or engine).begin() as conn:
+        for trigger in _ARCHIVE_GUARD_TRIGGERS:
+            conn.execute(text(trigger))
+
+
+def ensure_transaction_autoincrement(bind: Optional[Engine] = None) -> bool:
+    """
+    把旧数据库的交易表改为 AUTOINCREMENT，保证交易 ID 不被复用
+
+    需要重写交易表，只在首次归档前执行。表结构、索引和触发器在同一个事务中重建，
+    全文索引和预算计数器的数据不受影响。
+
+    Returns:
+        是否重建了交易表
+    """
+    from family_account_book.models import Transaction
+
+    bind = bind or engine
+    table = Transaction.__table__
+    columns = ", ".join(f'"{column.name}"' for column in table.columns)
+    create_table = str(CreateTable(table).compile(dialect=bind.dialect))
+    statements = [
+        create_table.replace(
+            f"CREATE TABLE {table.name} ", f"CREATE TABLE {table.name}_rebuild ", 1
+        ),
+        f"INSERT INTO {table.name}_rebuild ({columns}) "
+        f"SELECT {columns} FROM {table.name}",
+        f"DROP TABLE {table.name}",
+        # 分类和人员表上的触发器引用交易表，改名时不校验这些引用
+        "PRAGMA legacy_alter_table = ON",
+        f"ALTER TABLE {table.name}_rebuild RENAME TO {table.name}",
+        "PRAGMA legacy_alter_table = OFF",
+        *(
+            str(CreateIndex(index).compile(dialect=bind.dialect))
+            for index in table.indexes
+        ),
+        *_SEARCH_INDEX_TRIGGERS,
+        *_BUDGET_TRIGGERS.values(),
+        *_ARCHIVE_GUARD_TRIGGERS,
+        *_MONTH_SNAPSHOT_TRIGGERS,
+    ]
+
+    raw = bind.raw_connection()
+    try:
+        connection = raw.driver_connection
+        ddl = connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table.name,),
+        ).fetchone()[0]
+        if "AUTOINCREMENT" in ddl.upper():
+            return False
+        try:
+            connection.executescript(
+                "BEGIN IMMEDIATE;\n" + ";\n".join(statements) + ";\nCOMMIT;"
+            )
+        except Exception:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+    finally:
+        raw.close()
+    return True
 
 
 def init_db():
@@ -0,0 +1,218 @@
+"""
+SQL 查询统计
+
+通过 SQLAlchemy 的 before_cursor_execute / after_cursor_execute 事件，
+把每条语句归属到发起它的服务方法，记录次数、耗时分布和慢查询（附执行计划）。
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 服务层代码所在目录，用于在调用栈中定位发起查询的服务方法
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "services")
+
+# 耗时直方图的桶上限（毫秒），最后一个桶收纳所有更慢的语句
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+UNATTRIBUTED = "<其他>"
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """最近秩法计算百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(
+        0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+class _OperationStats:
+    """单个服务方法的统计数据"""
+
+    def __init__(self, max_samples: int):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+        self.samples = deque(maxlen=max_samples)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.samples.append(seconds)
+        elapsed_ms = seconds * 1000
+        for index, upper in enumerate(HISTOGRAM_BUCKETS_MS):
+            if elapsed_ms <= upper:
+                self.histogram[index] += 1
+                break
+
+    def to_dict(self) -> Dict:
+        samples = sorted(self.samples)
+        return {
+            "count": self.count,
+            "total_ms": self.total_seconds * 1000,
+            "mean_ms": self.total_seconds * 1000 / self.count if self.count else 0.0,
+            "p50_ms": _percentile(samples, 50) * 1000,
+            "p95_ms": _percentile(samples, 95) * 1000,
+            "p99_ms": _percentile(samples, 99) * 1000,
+            "max_ms": self.max_seconds * 1000,
+            "histogram": {
+                ("inf" if upper == float("inf") else f"<={upper}ms"): count
+                for upper, count in zip(HISTOGRAM_BUCKETS_MS, self.histogram)
+            },
+        }
+
+
+class QueryStats:
+    """按服务方法汇总的 SQL 查询统计"""
+
+    def __init__(
+        self,
+        slow_query_ms: float = 100.0,
+        max_samples: int = 1000,
+        max_slow_queries: int = 100,
+    ):
+        """
+        Args:
+            slow_query_ms: 慢查询阈值（毫秒）
+            max_samples: 每个方法保留的最近耗时样本数，用于计算百分位
+            max_slow_queries: 保留的慢查询条数
+        """
+        self.slow_query_ms = slow_query_ms
+        self.max_samples = max_samples
+        self.operations: Dict[str, _OperationStats] = {}
+        self.slow_queries = deque(maxlen=max_slow_queries)
+        self._lock = threading.Lock()
+        self._engines: List[Engine] = []
+
+    def install(self, engine: Engine):
+        """在引擎上注册事件监听"""
+        if engine in self._engines:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.append(engine)
+
+    def uninstall(self, engine: Engine):
+        """移除引擎上的事件监听"""
+        if engine not in self._engines:
+            return
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.remove(engine)
+
+    def reset(self):
+        """清空统计数据"""
+        with self._lock:
+            self.operations.clear()
+            self.slow_queries.clear()
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        start_times = conn.info.get("query_start_times")
+        if not start_times:
+            return
+        elapsed = time.perf_counter() - start_times.pop()
+        operation = self._calling_operation()
+
+        with self._lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = _OperationStats(self.max_samples)
+            stats.record(elapsed)
+
+        if elapsed * 1000 >= self.slow_query_ms:
+            plan = None if executemany else self._explain(cursor, statement, parameters)
+            entry = {
+                "operation": operation,
+                "elapsed_ms": elapsed * 1000,
+                "statement": statement,
+                "plan": plan,
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+            }
+            with self._lock:
+                self.slow_queries.append(entry)
+            logger.warning(
+                "慢查询 %.1fms [%s]: %s\n执行计划: %s",
+                elapsed * 1000,
+                operation,
+                statement,
+                plan,
+            )
+
+    @staticmethod
+    def _calling_operation() -> str:
+        """在调用栈中找到最外层的服务方法，例如 'TransactionService.get_transactions'"""
+        operation = UNATTRIBUTED
+        frame = sys._getframe(2)
+        while frame is not None:
+            if frame.f_code.co_filename.startswith(SERVICES_DIR):
+                operation = frame.f_code.co_qualname
+            frame = frame.f_back
+        return operation
+
+    @staticmethod
+    def _explain(cursor, statement: str, parameters) -> Optional[List[str]]:
+        """用同一个 DBAPI 连接获取 SQLite 执行计划（仅限 SELECT）"""
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+        try:
+            explain_cursor = cursor.connection.cursor()
+            try:
+                explain_cursor.execute(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters or ()
+                )
+                return [row[-1] for row in explain_cursor.fetchall()]
+            finally:
+                explain_cursor.close()
+        except Exception:
+            return None
+
+    def snapshot(self) -> Dict:
+        """
+        获取当前统计快照
+
+        Returns:
+            包含 'operations'（按总耗时降序）和 'slow_queries' 的字典
+        """
+        with self._lock:
+            operations = {
+                name: stats.to_dict() for name, stats in self.operations.items()
+            }
+            slow_queries = list(self.slow_queries)
+        return {
+            "operations": dict(
+                sorted(
+                    operations.items(),
+                    key=lambda item: item[1]["total_ms"],
+                    reverse=True,
+                )
+            ),
+            "slow_queries": slow_queries,
+        }
+
+    def dump(self, path: str) -> str:
+        """将统计快照写入 JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return path
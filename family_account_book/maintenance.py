@@ -0,0 +1,242 @@
+"""
+数据库维护
+
+- 查询优化器统计：首次执行 ANALYZE，之后用 PRAGMA optimize 只分析统计过期的表；
+- 增量整理：数据库为 auto_vacuum=INCREMENTAL 时按页归还空闲空间，单次耗时可控；
+  完整 VACUUM 会重写整个文件，只在命令行显式执行；
+- 在线备份：通过 sqlite3 备份接口分步复制，每步之间释放读锁，不阻塞其他连接读写；
+- 完整性检查：integrity_check、外键检查和全文索引检查，汇总为报告。
+
+图形界面在用户空闲一段时间后于后台线程调用 run_idle_maintenance。
+"""
+
+import os
+import sqlite3
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from family_account_book.database import SEARCH_INDEX_TABLE
+
+# 空闲页占比超过该值时，空闲维护执行增量整理
+FREELIST_VACUUM_RATIO = 0.1
+# 每次增量整理最多归还的页数，控制单次耗时
+INCREMENTAL_VACUUM_PAGES = 2000
+# 在线备份每步复制的页数
+BACKUP_PAGES_PER_STEP = 1024
+# 完整性检查最多报告的错误条数
+INTEGRITY_MAX_ERRORS = 100
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+def _autocommit(bind: Engine):
+    """VACUUM 等语句不能在事务中执行"""
+    return bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def database_stats(bind: Engine) -> Dict[str, Any]:
+    """
+    数据库文件的页统计
+
+    Returns:
+        包含 page_size、page_count、freelist_count、size_bytes、
+        free_ratio（空闲页占比）、auto_vacuum 的字典
+    """
+    with bind.connect() as conn:
+
+        def pragma(name):
+            return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+        page_size = pragma("page_size")
+        page_count = pragma("page_count")
+        freelist_count = pragma("freelist_count")
+        auto_vacuum = pragma("auto_vacuum")
+    return {
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist_count,
+        "size_bytes": page_size * page_count,
+        "free_ratio": freelist_count / page_count if page_count else 0.0,
+        "auto_vacuum": AUTO_VACUUM_MODES.get(auto_vacuum, str(auto_vacuum)),
+    }
+
+
+def optimize(bind: Engine) -> bool:
+    """
+    更新查询优化器统计信息
+
+    从未分析过的数据库执行完整 ANALYZE，否则执行 PRAGMA optimize，
+    由 SQLite 判断哪些表的统计信息需要更新。
+
+    Returns:
+        是否执行了完整 ANALYZE
+    """
+    with bind.begin() as conn:
+        analyzed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        ).scalar()
+        if not analyzed:
+            conn.exec_driver_sql("ANALYZE")
+            return True
+        conn.exec_driver_sql("PRAGMA optimize")
+        return False
+
+
+def incremental_vacuum(bind: Engine, max_pages: int = INCREMENTAL_VACUUM_PAGES) -> int:
+    """
+    归还最多 max_pages 个空闲页（数据库需为增量整理模式，否则不做任何事）
+
+    Returns:
+        归还的页数
+    """
+    raw = bind.raw_connection()
+    try:
+        connection = raw.driver_connection
+        before = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        # 该 PRAGMA 每执行一步归还一页，executescript 才会执行到结束
+        connection.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+        after = connection.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        raw.close()
+    return before - after
+
+
+def vacuum(bind: Engine) -> None:
+    """
+    完整整理数据库文件并更新统计信息
+
+    重写整个文件，期间其他连接无法写入，只应显式执行。
+    同时把数据库切换为增量整理模式，之后空闲维护即可按页归还空间。
+    """
+    with _autocommit(bind) as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+        conn.exec_driver_sql("ANALYZE")
+
+
+def enable_incremental_vacuum(bind: Engine, progress=None) -> None:
+    """
+    新数据库切换为增量整理模式（迁移）
+
+    已有交易的旧数据库只设置模式，切换需要重写文件，留到下次完整 VACUUM 时生效。
+    """
+    with _autocommit(bind) as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            return
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        if not conn.exec_driver_sql("SELECT 1 FROM transactions LIMIT 1").scalar():
+            conn.exec_driver_sql("VACUUM")
+
+
+def run_idle_maintenance(bind: Engine) -> Dict[str, Any]:
+    """
+    空闲时的例行维护：更新统计信息，空闲页较多时增量整理
+
+    Returns:
+        {"analyzed": 是否执行了完整 ANALYZE, "freed_pages": 归还的页数}
+    """
+    analyzed = optimize(bind)
+    freed_pages = 0
+    stats = database_stats(bind)
+    if (
+        stats["auto_vacuum"] == "incremental"
+        and stats["free_ratio"] > FREELIST_VACUUM_RATIO
+    ):
+        freed_pages = incremental_vacuum(bind)
+    return {"analyzed": analyzed, "freed_pages": freed_pages}
+
+
+def backup(
+    bind: Engine,
+    target: str,
+    pages_per_step: int = BACKUP_PAGES_PER_STEP,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> str:
+    """
+    在线备份数据库到文件
+
+    分步复制，每步之间其他连接可以继续读写；备份期间源数据库被其他连接修改时，
+    sqlite3 会自动重新开始复制。先写入临时文件，完成后再替换目标文件。
+
+    Args:
+        bind: 数据库引擎
+        target: 备份文件路径
+        pages_per_step: 每步复制的页数
+        progress: 每步之后调用 progress(已复制页数, 总页数)
+
+    Returns:
+        备份文件路径
+    """
+    partial = f"{target}.partial"
+
+    def report(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+
+    raw = bind.raw_connection()
+    try:
+        destination = sqlite3.connect(partial)
+        try:
+            raw.driver_connection.backup(
+                destination, pages=pages_per_step, progress=report
+            )
+        finally:
+            destination.close()
+    except Exception:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        raw.close()
+
+    os.replace(partial, target)
+    return target
+
+
+def integrity_check(
+    bind: Engine, max_errors: int = INTEGRITY_MAX_ERRORS
+) -> Dict[str, Any]:
+    """
+    检查数据库完整性
+
+    Args:
+        bind: 数据库引擎
+        max_errors: integrity_check 最多报告的错误条数
+
+    Returns:
+        包含 ok（全部通过）、errors（integrity_check 的错误）、
+        foreign_key_errors（(表, 行ID, 引用表) 列表）、search_index_ok 的字典
+    """
+    with bind.connect() as conn:
+        errors = [
+            row[0]
+            for row in conn.exec_driver_sql(
+                f"PRAGMA integrity_check({int(max_errors)})"
+            )
+        ]
+        if errors == ["ok"]:
+            errors = []
+        foreign_key_errors = [
+            (row[0], row[1], row[2])
+            for row in conn.exec_driver_sql("PRAGMA foreign_key_check")
+        ]
+
+    search_index_ok = True
+    with bind.begin() as conn:
+        try:
+            conn.exec_driver_sql(
+                f"INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}) "
+                "VALUES ('integrity-check')"
+            )
+        except DBAPIError:
+            search_index_ok = False
+
+    return {
+        "ok": not errors and not foreign_key_errors and search_index_ok,
+        "errors": errors,
+        "foreign_key_errors": foreign_key_errors,
+        "search_index_ok": search_index_ok,
+    }
@@ -0,0 +1,156 @@
+"""
+数据库结构迁移
+
+已应用的迁移版本记录在 schema_version 表中，create_tables/init_db 启动时只执行
+版本号更大的迁移。新建数据库由第 1 个迁移按当前模型建表，之后的迁移仍会依次执行，
+因此每个迁移都必须可重复执行（先检查再修改，如 IF NOT EXISTS、checkfirst）。
+
+迁移各自提交，大表的数据回填按批提交并报告进度，不做锁住整张表的重写，
+迁移期间图形界面或接口服务仍可读写。
+
+新增迁移：在 MIGRATIONS 末尾追加，版本号递增，已发布的迁移不再修改。
+"""
+
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from family_account_book import database, maintenance
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+# progress(迁移说明, 已完成数, 总数)
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class Migration(NamedTuple):
+    """一个迁移：upgrade(bind, progress) 中的 progress 接收 (已完成数, 总数)"""
+
+    version: int
+    description: str
+    upgrade: Callable[[Engine, Callable[[int, int], None]], None]
+
+
+def _create_missing_tables(bind: Engine, progress) -> None:
+    from family_account_book.models import Base
+
+    Base.metadata.create_all(bind=bind)
+    database.add_missing_columns(bind)
+
+
+def _create_archive_partitions(bind: Engine, progress) -> None:
+    _create_missing_tables(bind, progress)
+    database.create_archive_guards(bind)
+
+
+def _create_month_snapshots(bind: Engine, progress) -> None:
+    _create_missing_tables(bind, progress)
+    database.create_month_snapshot_triggers(bind)
+
+
+def _reopen_only_on_change(bind: Engine, progress) -> None:
+    database.create_month_snapshot_triggers(bind, replace=True)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "创建表并为旧数据库补充列", _create_missing_tables),
+    Migration(2, "补建查询索引", lambda bind, progress: database.create_indexes(bind)),
+    Migration(
+        3,
+        "回填分类闭包表",
+        lambda bind, progress: database.sync_category_closure(bind),
+    ),
+    Migration(4, "回填交易去重键", database.backfill_dedupe_keys),
+    Migration(
+        5,
+        "创建交易全文索引",
+        lambda bind, progress: database.create_search_index(bind),
+    ),
+    Migration(
+        6,
+        "创建预算计数器",
+        lambda bind, progress: database.create_budget_counters(bind),
+    ),
+    Migration(7, "启用增量整理", maintenance.enable_incremental_vacuum),
+    Migration(8, "创建归档年份登记表", _create_archive_partitions),
+    Migration(9, "创建月度快照表", _create_month_snapshots),
+    Migration(10, "更新未改变数值时不再重新开账", _reopen_only_on_change),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _ensure_version_table(bind: Engine) -> None:
+    with bind.begin() as conn:
+        conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TEXT NOT NULL
+                )
+                """))
+
+
+def current_version(bind: Engine) -> int:
+    """数据库当前的结构版本，未执行过迁移时为 0"""
+    _ensure_version_table(bind)
+    with bind.connect() as conn:
+        version = conn.execute(
+            text(f"SELECT max(version) FROM {SCHEMA_VERSION_TABLE}")
+        ).scalar()
+    return version or 0
+
+
+def pending_migrations(bind: Engine) -> List[Migration]:
+    """尚未应用的迁移，按版本号排序"""
+    version = current_version(bind)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def upgrade(
+    bind: Engine,
+    progress: Optional[ProgressCallback] = None,
+    target: Optional[int] = None,
+) -> List[int]:
+    """
+    依次执行未应用的迁移，每个迁移完成后记录版本
+
+    Args:
+        bind: 数据库引擎
+        progress: 进度回调 progress(迁移说明, 已完成数, 总数)，
+            每个迁移开始和结束时各调用一次，分批回填时每批调用一次
+        target: 只迁移到该版本（默认最新）
+
+    Returns:
+        本次应用的迁移版本号列表
+    """
+    applied = []
+    for migration in pending_migrations(bind):
+        if target is not None and migration.version > target:
+            break
+
+        def report(done: int, total: int, description=migration.description):
+            if progress is not None:
+                progress(description, done, total)
+
+        report(0, 1)
+        migration.upgrade(bind, report)
+        with bind.begin() as conn:
+            # 其他进程可能同时完成了同一迁移（迁移可重复执行）
+            conn.execute(
+                text(
+                    f"INSERT OR IGNORE INTO {SCHEMA_VERSION_TABLE} "
+                    "(version, description, applied_at) "
+                    "VALUES (:version, :description, :applied_at)"
+                ),
+                {
+                    "version": migration.version,
+                    "description": migration.description,
+                    "applied_at": datetime.now().isoformat(timespec="seconds"),
+                },
+            )
+        report(1, 1)
+        applied.append(migration.version)
+    return applied
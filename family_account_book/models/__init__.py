@@ -1,4 +1,14 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 
@@ -41,10 +51,42 @@ class Category(Base):
         return f"<Category(id={self.id}, name='{self.name}')>"
 
 
+class CategoryClosure(Base):
+    """分类闭包表模型（记录所有祖先-后代关系，用于层级汇总）"""
+
+    __tablename__ = "category_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    descendant_id = Column(
+        Integer, ForeignKey("categories.id"), primary_key=True, index=True
+    )
+    depth = Column(Integer, nullable=False, default=0)  # 0 表示自身
+
+    def __repr__(self):
+        return (
+            f"<CategoryClosure(ancestor_id={self.ancestor_id}, "
+            f"descendant_id={self.descendant_id}, depth={self.depth})>"
+        )
+
+
 class Transaction(Base):
     """交易模型（收入和支出）"""
 
     __tablename__ = "transactions"
+    __table_args__ = (
+        # 常用过滤组合：类型+日期、分类+日期、人员+日期，以及金额区间
+        Index("ix_transactions_date", "date"),
+        Index("ix_transactions_type_date", "transaction_type", "date"),
+        Index("ix_transactions_category_date", "category_id", "date"),
+        Index("ix_transactions_person_date", "person_id", "date"),
+        Index("ix_transactions_amount", "amount"),
+        # 去重键查找（同一键允许确认后重复录入，因此不设唯一约束）
+        Index("ix_transactions_dedupe_key", "dedupe_key"),
+        # 周期交易的每次发生只生成一次
+        Index("ix_transactions_occurrence_key", "occurrence_key", unique=True),
+        # ID 不复用：归档到其他文件的交易与当前表合并查询时 ID 不能冲突
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True)
     date = Column(DateTime, nullable=False)
@@ -55,6 +97,10 @@ class Transaction(Base):
         Integer, ForeignKey("categories.id"), nullable=True
     )  # 支出才有分类
     person_id = Column(Integer, ForeignKey("persons.id"), nullable=True)  # 交易相关人员
+    # (日期, 金额, 归一化描述, 人员) 的哈希，见 services.dedupe.compute_dedupe_key
+    dedupe_key = Column(String(40), nullable=True)
+    # 由周期模板生成时为 "模板ID:日期"，手工录入为空
+    occurrence_key = Column(String(40), nullable=True)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
@@ -74,7 +120,9 @@ class IncomeDetail(Base):
     __tablename__ = "income_details"
 
     id = Column(Integer, primary_key=True)
-    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False)
+    transaction_id = Column(
+        Integer, ForeignKey("transactions.id"), nullable=False, index=True
+    )
     item_name = Column(String(100), nullable=False)  # 如 '五险一金', '个税' 等
     amount = Column(Float, nullable=False)
     created_at = Column(DateTime, default=datetime.now)
@@ -83,3 +131,140 @@ class IncomeDetail(Base):
 
     def __repr__(self):
         return f"<IncomeDetail(id={self.id}, item='{self.item_name}', amount={self.amount})>"
+
+
+class CategorizationRule(Base):
+    """自动分类规则：按描述关键字/正则和金额区间匹配分类和人员"""
+
+    __tablename__ = "categorization_rules"
+
+    id = Column(Integer, primary_key=True)
+    pattern = Column(Text, nullable=True)  # 为空表示只按金额区间匹配
+    is_regex = Column(Boolean, nullable=False, default=False)  # 否则为关键字
+    transaction_type = Column(String(20), nullable=True)  # 为空表示不限
+    amount_min = Column(Float, nullable=True)
+    amount_max = Column(Float, nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    person_id = Column(Integer, ForeignKey("persons.id"), nullable=True)
+    priority = Column(Integer, nullable=False, default=0)  # 越大越优先
+    created_at = Column(DateTime, default=datetime.now)
+
+    category = relationship("Category")
+    person = relationship("Person")
+
+    def __repr__(self):
+        return f"<CategorizationRule(id={self.id}, pattern='{self.pattern}')>"
+
+
+class RecurringTemplate(Base):
+    """周期交易模板（工资、房租、订阅等）"""
+
+    __tablename__ = "recurring_templates"
+    # 模板ID是发生键的一部分，删除后不能被新模板复用
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    transaction_type = Column(String(20), nullable=False)  # 'income' 或 'expense'
+    amount = Column(Float, nullable=False)
+    description = Column(Text, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    person_id = Column(Integer, ForeignKey("persons.id"), nullable=True)
+    frequency = Column(String(20), nullable=False)  # 'weekly'、'monthly' 或 'yearly'
+    interval = Column(Integer, nullable=False, default=1)  # 每隔几个周期
+    start_date = Column(DateTime, nullable=False)  # 第一次发生的日期
+    end_date = Column(DateTime, nullable=True)  # 最后可能发生的日期（包含）
+    deductions = Column(Text, nullable=True)  # 收入扣除明细 JSON: [[项目, 金额], ...]
+    last_generated_date = Column(DateTime, nullable=True)  # 已生成到的发生日期
+    active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+    category = relationship("Category")
+    person = relationship("Person")
+
+    def __repr__(self):
+        return f"<RecurringTemplate(id={self.id}, name='{self.name}')>"
+
+
+class Budget(Base):
+    """分类月度预算（包含子分类的支出）"""
+
+    __tablename__ = "budgets"
+
+    id = Column(Integer, primary_key=True)
+    category_id = Column(
+        Integer, ForeignKey("categories.id"), nullable=False, unique=True
+    )
+    amount = Column(Float, nullable=False)  # 每月预算金额
+    warn_ratio = Column(Float, nullable=False, default=0.8)  # 达到该比例时提醒
+    created_at = Column(DateTime, default=datetime.now)
+
+    category = relationship("Category")
+
+    def __repr__(self):
+        return f"<Budget(category_id={self.category_id}, amount={self.amount})>"
+
+
+class BudgetActual(Base):
+    """分类月度实际支出计数器，由 transactions 上的触发器增量维护"""
+
+    __tablename__ = "budget_actuals"
+
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    month = Column(String(7), primary_key=True)  # 'YYYY-MM'
+    amount = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return (
+            f"<BudgetActual(category_id={self.category_id}, "
+            f"month='{self.month}', amount={self.amount})>"
+        )
+
+
+class ArchivePartition(Base):
+    """已归档年份，该年交易移到独立的 SQLite 文件（见 services.archive）"""
+
+    __tablename__ = "archive_partitions"
+
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    path = Column(String(500), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<ArchivePartition(year={self.year}, rows={self.row_count})>"
+
+
+class MonthClosure(Base):
+    """已结账的月份，统计直接读取该月的快照（见 services.snapshots）"""
+
+    __tablename__ = "month_closures"
+
+    month = Column(String(7), primary_key=True)  # 'YYYY-MM'
+    row_count = Column(Integer, nullable=False)  # 结账时该月的交易笔数
+    checksum = Column(String(64), nullable=False)  # 快照汇总的 SHA-256
+    closed_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<MonthClosure(month='{self.month}', rows={self.row_count})>"
+
+
+class MonthSnapshot(Base):
+    """已结账月份的汇总：按交易类型和分类的金额，收入另按扣除项目汇总"""
+
+    __tablename__ = "month_snapshots"
+    __table_args__ = (Index("ix_month_snapshots_month", "month"),)
+
+    id = Column(Integer, primary_key=True)
+    month = Column(String(7), nullable=False)  # 'YYYY-MM'
+    transaction_type = Column(String(20), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    item_name = Column(String(100), nullable=True)  # 为空表示交易金额，否则为扣除项目
+    amount = Column(Float, nullable=False)
+    count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<MonthSnapshot(month='{self.month}', type='{self.transaction_type}', "
+            f"category_id={self.category_id}, amount={self.amount})>"
+        )
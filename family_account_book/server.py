@@ -0,0 +1,556 @@
+"""
+本地 HTTP/JSON 接口
+
+基于 asyncio 的轻量 HTTP/1.1 服务，供手机快捷指令、家庭看板等本地工具读写账本，
+不依赖 PyQt6 和第三方 Web 框架。
+
+- 事件循环只负责收发，数据库操作在线程池中执行，慢查询不会阻塞其他客户端；
+- 读操作使用有上限的读线程池，每个线程从连接池取连接（WAL 模式下读写互不阻塞）；
+- 写操作排入单线程写队列串行执行，避免多个写事务争抢 SQLite 写锁；
+- 导出接口边查询边以分块传输编码发送，内存占用与导出条数无关。
+
+每个连接处理一个请求后关闭（Connection: close）。默认只监听 127.0.0.1。
+
+接口:
+    GET    /api/transactions        查询交易（过滤参数同导出，另有 q、limit、offset）
+    POST   /api/transactions        新增交易（JSON 请求体）
+    DELETE /api/transactions/<id>   删除交易
+    GET    /api/stats/monthly       月度支出统计（year、month）
+    GET    /api/stats/series        分类月度支出序列（category、from、to）
+    GET    /api/budgets             预算执行概览（year、month）
+    GET    /api/export.csv          按过滤条件流式导出 CSV
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from family_account_book import database
+from family_account_book.database import session_scope
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.budget import BudgetService
+from family_account_book.services.dedupe import DuplicateTransactionError
+from family_account_book.services.export import ExportService
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.read_models import TransactionRow
+from family_account_book.services.repository import TransactionService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# 读线程数，也是读连接池的大小
+READ_WORKERS = 4
+# 等待 SQLite 锁的秒数（与图形界面同时写入时）
+BUSY_TIMEOUT = 10
+# 读取请求头的超时秒数
+REQUEST_TIMEOUT = 30
+MAX_BODY_SIZE = 1024 * 1024
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# 流式导出时已生成未发送的数据块上限，客户端读得慢时查询线程随之等待
+STREAM_QUEUE_SIZE = 4
+
+_END = object()
+
+
+class HttpError(Exception):
+    """以指定状态码结束请求的错误"""
+
+    def __init__(self, status: HTTPStatus, message: Optional[str] = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.message = message or status.phrase
+
+
+class StreamingBody:
+    """分块发送的响应体"""
+
+    def __init__(self, chunks: AsyncIterator[str], content_type: str):
+        self.chunks = chunks
+        self.content_type = content_type
+
+
+def create_server_engine(url: str, read_workers: int = READ_WORKERS) -> Engine:
+    """
+    创建接口服务使用的引擎
+
+    连接池大小为读线程数加一个写连接，池满时不再额外建立连接。
+    文件数据库切换到 WAL 日志模式，使读请求不被写事务阻塞。
+
+    Args:
+        url: 数据库地址
+        read_workers: 读线程数
+
+    Returns:
+        数据库引擎
+    """
+    engine = create_engine(
+        url,
+        pool_size=read_workers + 1,
+        max_overflow=0,
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _enable_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    return engine
+
+
+def _first(params: Dict[str, List[str]], name: str) -> Optional[str]:
+    values = params.get(name)
+    return values[0] if values else None
+
+
+def _parse(params: Dict[str, List[str]], name: str, parser: Callable, label: str):
+    value = _first(params, name)
+    if value is None or value == "":
+        return None
+    try:
+        return parser(value)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"参数 {name} 应为{label}: {value}")
+
+
+def _parse_day(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _parse_month(value: str):
+    parsed = datetime.strptime(value, "%Y-%m")
+    return parsed.year, parsed.month
+
+
+def filter_from_query(params: Dict[str, List[str]]) -> TransactionFilter:
+    """
+    把查询参数转换为组合过滤条件
+
+    支持 start、end（YYYY-MM-DD，都包含当天）、type、category（可重复）、subcategories、
+    person（可重复）、min、max、search。
+
+    Raises:
+        HttpError: 参数格式错误
+    """
+    transaction_type = _first(params, "type")
+    if transaction_type not in (None, "", "income", "expense"):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"不支持的交易类型: {transaction_type}")
+    return TransactionFilter(
+        start_date=_parse(params, "start", _parse_day, "日期 YYYY-MM-DD"),
+        end_date=_parse(params, "end", _parse_day, "日期 YYYY-MM-DD"),
+        transaction_type=transaction_type or None,
+        category_names=tuple(params.get("category", ())),
+        include_subcategories=_first(params, "subcategories") in ("1", "true"),
+        person_names=tuple(params.get("person", ())),
+        amount_min=_parse(params, "min", float, "数字"),
+        amount_max=_parse(params, "max", float, "数字"),
+        description_contains=_first(params, "search") or None,
+    )
+
+
+def transaction_to_dict(transaction: TransactionRow) -> Dict[str, Any]:
+    """交易的 JSON 表示"""
+    return {
+        "id": transaction.id,
+        "date": transaction.date.strftime("%Y-%m-%d"),
+        "type": transaction.transaction_type,
+        "amount": transaction.amount,
+        "description": transaction.description,
+        "category": transaction.category_name,
+        "person": transaction.person_name,
+    }
+
+
+class ApiServer:
+    """账本 HTTP/JSON 接口服务"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[..., Session]] = None,
+        read_workers: int = READ_WORKERS,
+    ):
+        """
+        Args:
+            session_factory: 会话工厂，默认使用应用数据库
+            read_workers: 读线程数，应不超过连接池大小
+        """
+        self.session_factory = session_factory or database.SessionLocal
+        self._readers = ThreadPoolExecutor(read_workers, thread_name_prefix="api-read")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="api-write")
+        self._routes = [
+            ("GET", re.compile(r"/api/transactions"), self.list_transactions),
+            ("POST", re.compile(r"/api/transactions"), self.create_transaction),
+            (
+                "DELETE",
+                re.compile(r"/api/transactions/(\d+)"),
+                self.delete_transaction,
+            ),
+            ("GET", re.compile(r"/api/stats/monthly"), self.monthly_stats),
+            ("GET", re.compile(r"/api/stats/series"), self.category_series),
+            ("GET", re.compile(r"/api/budgets"), self.budgets),
+            ("GET", re.compile(r"/api/export\.csv"), self.export_csv),
+        ]
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """监听并处理请求，直到任务被取消"""
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    async def start(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+    ) -> asyncio.AbstractServer:
+        """开始监听（port 为 0 时由系统分配端口）"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        """关闭线程池"""
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=False, cancel_futures=True)
+
+    # ---- 线程池调度 ----
+
+    def _in_session(self, work: Callable, *args):
+        with session_scope(self.session_factory) as db:
+            return work(db, *args)
+
+    async def read(self, work: Callable[..., Any], *args) -> Any:
+        """在读线程池中以独立会话执行 work(db, *args)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._in_session, work, *args)
+
+    async def write(self, work: Callable[..., Any], *args) -> Any:
+        """在写线程中串行执行 work(db, *args)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._in_session, work, *args)
+
+    async def stream(
+        self, produce: Callable[[Session], Iterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        在读线程中迭代 produce(db)，逐块交给事件循环
+
+        队列有上限，客户端读得慢时查询线程等待；客户端断开时查询线程停止。
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        cancelled = threading.Event()
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def run():
+            try:
+                with session_scope(self.session_factory) as db:
+                    for chunk in produce(db):
+                        if cancelled.is_set():
+                            return
+                        put(chunk)
+            except Exception as e:
+                put(e)
+            finally:
+                put(_END)
+
+        future = loop.run_in_executor(self._readers, run)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            # 腾出队列，让可能正在等待的查询线程结束
+            while not queue.empty():
+                queue.get_nowait()
+            await future
+
+    # ---- HTTP ----
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """处理一个连接上的一个请求"""
+        headers_sent = False
+        try:
+            try:
+                method, target, body = await asyncio.wait_for(
+                    self._read_request(reader), REQUEST_TIMEOUT
+                )
+                status, payload = await self.dispatch(method, target, body)
+            except HttpError as e:
+                status, payload = e.status, {"error": e.message}
+
+            if isinstance(payload, StreamingBody):
+                headers_sent = True
+                await self._send_stream(writer, status, payload)
+            else:
+                await self._send_json(writer, status, payload)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception:
+            logger.exception("接口请求处理失败")
+            if not headers_sent:
+                await self._send_json(
+                    writer,
+                    HTTPStatus.INTERNAL_SERVER_ERROR,
+                    {"error": HTTPStatus.INTERNAL_SERVER_ERROR.phrase},
+                )
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        request_line = (await reader.readline()).decode("latin-1")
+        try:
+            method, target, _version = request_line.split()
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST)
+        if length > MAX_BODY_SIZE:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, body
+
+    async def dispatch(self, method: str, target: str, body: bytes):
+        """
+        按方法和路径调用处理函数
+
+        Returns:
+            (状态码, JSON 对象或 StreamingBody)
+
+        Raises:
+            HttpError: 路径不存在、方法不允许或请求无效
+        """
+        url = urllib.parse.urlsplit(target)
+        params = urllib.parse.parse_qs(url.query)
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(url.path)
+            if not match:
+                continue
+            allowed = True
+            if route_method == method:
+                try:
+                    return await handler(params, body, *match.groups())
+                except DuplicateTransactionError as e:
+                    raise HttpError(HTTPStatus.CONFLICT, str(e))
+                except ValueError as e:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        if allowed:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED)
+        raise HttpError(HTTPStatus.NOT_FOUND)
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status, payload):
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        writer.write(
+            self._head(status, "application/json; charset=utf-8")
+            + f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1")
+            + data
+        )
+        await writer.drain()
+
+    async def _send_stream(
+        self, writer: asyncio.StreamWriter, status, payload: StreamingBody
+    ):
+        writer.write(
+            self._head(status, payload.content_type)
+            + b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        async for chunk in payload.chunks:
+            data = chunk.encode("utf-8")
+            if data:
+                writer.write(f"{len(data):X}\r\n".encode("latin-1") + data + b"\r\n")
+                await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _head(status: HTTPStatus, content_type: str) -> bytes:
+        return (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            "Connection: close\r\n"
+        ).encode("latin-1")
+
+    # ---- 接口 ----
+
+    async def list_transactions(self, params, body):
+        """查询交易，给出 q 时按全文搜索的相关度排序"""
+        filter_spec = filter_from_query(params)
+        limit = _parse(params, "limit", int, "整数") or DEFAULT_PAGE_SIZE
+        offset = _parse(params, "offset", int, "整数") or 0
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = _first(params, "q")
+
+        def work(db):
+            service = TransactionService(db)
+            if query:
+                transactions = service.search_rows(query, filter_spec, limit, offset)
+            else:
+                transactions = service.list_transactions(filter_spec, limit, offset)
+            return [transaction_to_dict(t) for t in transactions]
+
+        return HTTPStatus.OK, await self.read(work)
+
+    async def create_transaction(self, params, body):
+        """
+        新增交易，请求体为 JSON:
+        {"type", "date", "amount", "description", "category", "person",
+         "deductions": [[项目, 金额], ...], "allow_duplicate"}
+        """
+        try:
+            payload = json.loads(body or b"{}")
+            transaction_type = payload.get("type", "expense")
+            when = _parse_day(payload["date"])
+            amount = float(payload["amount"])
+            description = str(payload["description"])
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"请求体无效: {e}")
+        if transaction_type not in ("income", "expense"):
+            raise HttpError(
+                HTTPStatus.BAD_REQUEST, f"不支持的交易类型: {transaction_type}"
+            )
+        category_name = payload.get("category") or None
+        person_name = payload.get("person") or None
+        allow_duplicate = bool(payload.get("allow_duplicate", False))
+        deductions = [tuple(item) for item in payload.get("deductions") or []]
+
+        def work(db):
+            service = TransactionService(db)
+            if transaction_type == "income":
+                transaction = service.create_income(
+                    when,
+                    amount,
+                    description,
+                    category_name,
+                    person_name,
+                    deductions=deductions,
+                    allow_duplicate=allow_duplicate,
+                )
+            else:
+                transaction = service.create_expense(
+                    when,
+                    amount,
+                    description,
+                    category_name,
+                    person_name,
+                    allow_duplicate=allow_duplicate,
+                )
+            return transaction_to_dict(TransactionRow.from_transaction(transaction))
+
+        return HTTPStatus.CREATED, await self.write(work)
+
+    async def delete_transaction(self, params, body, transaction_id):
+        """删除交易"""
+
+        def work(db):
+            return TransactionService(db).delete_transaction(int(transaction_id))
+
+        if not await self.write(work):
+            raise HttpError(HTTPStatus.NOT_FOUND, f"交易不存在: {transaction_id}")
+        return HTTPStatus.OK, {"deleted": int(transaction_id)}
+
+    async def monthly_stats(self, params, body):
+        """月度支出统计（默认本月）"""
+        today = date.today()
+        year = _parse(params, "year", int, "整数") or today.year
+        month = _parse(params, "month", int, "整数") or today.month
+
+        def work(db):
+            return AnalyticsService(db).monthly_aggregation(year, month)
+
+        return HTTPStatus.OK, await self.read(work)
+
+    async def category_series(self, params, body):
+        """分类月度支出序列"""
+        category = _first(params, "category")
+        start = _parse(params, "from", _parse_month, "月份 YYYY-MM")
+        end = _parse(params, "to", _parse_month, "月份 YYYY-MM")
+        if not category or start is None or end is None:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "需要参数 category、from、to")
+
+        def work(db):
+            series = AnalyticsService(db).per_month_series_for_category(
+                category, *start, *end
+            )
+            return [
+                {"year": year, "month": month, "amount": amount}
+                for year, month, amount in series
+            ]
+
+        return HTTPStatus.OK, await self.read(work)
+
+    async def budgets(self, params, body):
+        """预算执行概览（默认本月）"""
+        today = date.today()
+        year = _parse(params, "year", int, "整数") or today.year
+        month = _parse(params, "month", int, "整数") or today.month
+
+        def work(db):
+            return BudgetService(db).overview(year, month)
+
+        return HTTPStatus.OK, await self.read(work)
+
+    async def export_csv(self, params, body):
+        """按过滤条件流式导出 CSV"""
+        filter_spec = filter_from_query(params)
+        chunks = self.stream(lambda db: ExportService(db).iter_csv(filter_spec))
+        return HTTPStatus.OK, StreamingBody(chunks, "text/csv; charset=utf-8")
+
+
+def run_server(
+    url: str,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    read_workers: int = READ_WORKERS,
+):
+    """
+    为指定数据库建表并运行接口服务，直到进程被中断
+
+    Args:
+        url: 数据库地址
+        host: 监听地址
+        port: 监听端口
+        read_workers: 读线程数
+    """
+    engine = create_server_engine(url, read_workers)
+    database.create_tables(engine)
+    session_factory = sessionmaker(autoflush=False, bind=engine)
+    server = ApiServer(session_factory, read_workers)
+    print(f"接口服务已启动: http://{host}:{port}/api/")
+    asyncio.run(server.serve(host, port))
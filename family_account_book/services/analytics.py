@@ -1,14 +1,82 @@
-from datetime import date
-from typing import Dict, List, Tuple
+from datetime import date, timedelta
+from itertools import product
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import func
+from sqlalchemy import and_, func, null, select, union_all
 from sqlalchemy.orm import Session
 
-from family_account_book.models import Transaction
+from family_account_book.models import (
+    Category,
+    CategoryClosure,
+    MonthSnapshot,
+    Person,
+)
+from family_account_book.services.archive import (
+    adapt,
+    income_detail_source,
+    transaction_source,
+)
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.snapshots import (
+    closed_months,
+    snapshot_income_items,
+    snapshot_month_totals,
+    snapshot_totals,
+)
+
+
+class _Margin:
+    """交叉表汇总（边际）维度的键，不等于任何名称或月份"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MARGIN_KEY"
+
+    def __reduce__(self):
+        # 序列化后仍是同一个对象
+        return "MARGIN_KEY"
+
+
+# 交叉表中汇总维度使用的键（名称可能恰好是 'total'，因此不用字符串）
+MARGIN_KEY = _Margin()
+# 交叉表中未关联人员或分类的交易以 None 为键，界面上显示为该名称（加括号，与真实名称区分）
+UNASSIGNED_NAME = "（未指定）"
+# 收入汇总支持的统计周期及对应的 strftime 格式
+PERIOD_FORMATS = {"month": "%Y-%m", "year": "%Y"}
+# 趋势序列支持的粒度及对应的 strftime 格式
+SERIES_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+
+
+def pivot_crosstab(
+    crosstab: Dict[Tuple, float], row_axis: int, column_axis: int
+) -> Dict[Any, Dict[Any, float]]:
+    """
+    将带汇总的交叉表透视为二维表，剩余维度取 MARGIN_KEY 汇总值
+
+    Args:
+        crosstab: person_category_month_crosstab(margins=True) 的结果
+        row_axis: 作为行的维度（0 人员、1 分类、2 月份）
+        column_axis: 作为列的维度
+
+    Returns:
+        {行键: {列键: 金额}} 的嵌套字典
+    """
+    (other_axis,) = {0, 1, 2} - {row_axis, column_axis}
+    table: Dict[Any, Dict[Any, float]] = {}
+    for key, amount in crosstab.items():
+        if key[other_axis] is MARGIN_KEY:
+            table.setdefault(key[row_axis], {})[key[column_axis]] = amount
+    return table
 
 
 class AnalyticsService:
-    """分析服务类，提供各种数据分析功能"""
+    """
+    分析服务类，提供各种数据分析功能
+
+    月度统计、分类区间合计、分类月度序列和收入汇总对完整落在范围内的已结账月份
+    读取月度快照（见 services.snapshots），其余月份实时计算。
+    """
 
     def __init__(self, db: Session):
         self.db = db
@@ -31,20 +99,25 @@ class AnalyticsService:
         else:
             end_date = date(year, month + 1, 1)
 
-        query = (
-            self.db.query(
-                Transaction.category_id,
-                func.sum(Transaction.amount).label("total_amount"),
-            )
-            .filter(
-                Transaction.transaction_type == "expense",
-                Transaction.date >= start_date,
-                Transaction.date < end_date,
+        closed = closed_months(self.db, start_date, end_date)
+        if closed:
+            results = snapshot_totals(self.db, closed, "expense").items()
+        else:
+            source = transaction_source(self.db, start_date, end_date)
+            query = (
+                self.db.query(
+                    source.category_id,
+                    func.sum(source.amount).label("total_amount"),
+                )
+                .filter(
+                    source.transaction_type == "expense",
+                    source.date >= start_date,
+                    source.date < end_date,
+                )
+                .group_by(source.category_id)
             )
-            .group_by(Transaction.category_id)
-        )
 
-        results = query.all()
+            results = query.all()
 
         # 获取分类名称
         from ..models import Category
@@ -87,19 +160,27 @@ class AnalyticsService:
         if not category:
             return 0.0
 
-        # 查询该分类在时间段内的支出总和
-        result = (
-            self.db.query(func.sum(Transaction.amount))
-            .filter(
-                Transaction.transaction_type == "expense",
-                Transaction.category_id == category.id,
-                Transaction.date >= start_date,
-                Transaction.date <= end_date,
+        # 已结账的整月读快照，其余日期查询交易
+        closed = closed_months(self.db, start_date, end_date + timedelta(days=1))
+        total = 0.0
+        if closed:
+            total = snapshot_totals(self.db, closed, "expense", category.id).get(
+                category.id, 0.0
             )
-            .scalar()
+
+        # 查询该分类在时间段内的支出总和
+        source = transaction_source(self.db, start_date, end_date)
+        query = self.db.query(func.sum(source.amount)).filter(
+            source.transaction_type == "expense",
+            source.category_id == category.id,
+            source.date >= start_date,
+            source.date <= end_date,
         )
+        if closed:
+            query = query.filter(func.strftime("%Y-%m", source.date).not_in(closed))
+        result = query.scalar()
 
-        return float(result) if result else 0.0
+        return total + (float(result) if result else 0.0)
 
     def per_month_series_for_category(
         self,
@@ -131,6 +212,16 @@ class AnalyticsService:
         if not category:
             return []
 
+        source = transaction_source(
+            self.db, date(start_year, start_month, 1), date(end_year, end_month, 1)
+        )
+        closed = closed_months(self.db, date(start_year, start_month, 1))
+        snapshot = (
+            snapshot_month_totals(self.db, closed, "expense", category.id)
+            if closed
+            else {}
+        )
+
         # 生成月份序列
         series = []
         current_year = start_year
@@ -146,19 +237,22 @@ class AnalyticsService:
             else:
                 month_end = date(current_year, current_month + 1, 1)
 
-            # 查询该月该分类的支出总和
-            result = (
-                self.db.query(func.sum(Transaction.amount))
-                .filter(
-                    Transaction.transaction_type == "expense",
-                    Transaction.category_id == category.id,
-                    Transaction.date >= month_start,
-                    Transaction.date < month_end,
+            month_key = f"{current_year:04d}-{current_month:02d}"
+            if month_key in closed:
+                amount = snapshot.get(month_key, 0.0)
+            else:
+                # 查询该月该分类的支出总和
+                result = (
+                    self.db.query(func.sum(source.amount))
+                    .filter(
+                        source.transaction_type == "expense",
+                        source.category_id == category.id,
+                        source.date >= month_start,
+                        source.date < month_end,
+                    )
+                    .scalar()
                 )
-                .scalar()
-            )
-
-            amount = float(result) if result else 0.0
+                amount = float(result) if result else 0.0
             series.append((current_year, current_month, amount))
 
             # 移动到下一个月
@@ -170,6 +264,91 @@ class AnalyticsService:
 
         return series
 
+    def category_series(
+        self,
+        category_names: Sequence[str],
+        start_date: date,
+        end_date: date,
+        granularity: str = "day",
+    ) -> Dict[str, List[Tuple[date, float]]]:
+        """
+        一次查询多个分类在时间段内逐日或逐月的支出序列
+
+        所有分类在同一条按 (分类, 日期) 分组的语句中统计；按月统计时
+        已结账的整月读快照。没有支出的日期或月份补 0，各序列长度相同。
+
+        Args:
+            category_names: 分类名称，不存在的分类得到全 0 序列
+            start_date: 开始日期（包含）
+            end_date: 结束日期（不包含）
+            granularity: 'day' 或 'month'，按月时日期为每月 1 日
+
+        Returns:
+            分类名称到 [(日期, 金额)] 的字典
+
+        Raises:
+            ValueError: 不支持的粒度
+        """
+        if granularity not in SERIES_FORMATS:
+            raise ValueError(f"不支持的粒度: {granularity}")
+
+        source = transaction_source(self.db, start_date, end_date)
+        period_key = func.strftime(SERIES_FORMATS[granularity], source.date)
+        query = (
+            select(Category.name, period_key, func.sum(source.amount))
+            .join(Category, Category.id == source.category_id)
+            .where(
+                source.transaction_type == "expense",
+                Category.name.in_(category_names),
+                source.date >= start_date,
+                source.date < end_date,
+            )
+            .group_by(Category.name, period_key)
+        )
+        rows = []
+        closed = closed_months(self.db, start_date, end_date)
+        if granularity == "month" and closed:
+            query = query.where(func.strftime("%Y-%m", source.date).not_in(closed))
+            rows = self.db.execute(
+                select(
+                    Category.name, MonthSnapshot.month, func.sum(MonthSnapshot.amount)
+                )
+                .join(Category, Category.id == MonthSnapshot.category_id)
+                .where(
+                    MonthSnapshot.month.in_(closed),
+                    MonthSnapshot.transaction_type == "expense",
+                    MonthSnapshot.item_name.is_(None),
+                    Category.name.in_(category_names),
+                )
+                .group_by(Category.name, MonthSnapshot.month)
+            ).all()
+
+        amounts: Dict[Tuple[str, str], float] = {}
+        for name, period, amount in [*rows, *self.db.execute(query)]:
+            amounts[name, period] = amounts.get((name, period), 0.0) + float(amount)
+
+        periods = []
+        current = start_date
+        if granularity == "month":
+            current = date(start_date.year, start_date.month, 1)
+        while current < end_date:
+            periods.append(current)
+            if granularity == "day":
+                current += timedelta(days=1)
+            elif current.month == 12:
+                current = date(current.year + 1, 1, 1)
+            else:
+                current = date(current.year, current.month + 1, 1)
+
+        fmt = SERIES_FORMATS[granularity]
+        keys = [day.strftime(fmt) for day in periods]
+        return {
+            name: [
+                (day, amounts.get((name, key), 0.0)) for day, key in zip(periods, keys)
+            ]
+            for name in category_names
+        }
+
     def get_category_percentage(
         self, category_name: str, year: int, month: int
     ) -> float:
@@ -192,3 +371,197 @@ class AnalyticsService:
             return 0.0
 
         return (category_expense / total_expense) * 100
+
+    def category_subtree_totals(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: str = "expense",
+        filter_spec: Optional[TransactionFilter] = None,
+    ) -> Dict[str, float]:
+        """
+        计算每个分类及其所有子孙分类的合计金额（一次分组查询）
+
+        Args:
+            start_date: 开始日期（包含）
+            end_date: 结束日期（不包含）
+            transaction_type: 交易类型，默认统计支出
+            filter_spec: 附加的组合过滤条件
+
+        Returns:
+            分类名称到子树合计金额的字典，没有交易的分类金额为 0
+        """
+        source = transaction_source(
+            self.db, start_date, end_date, include_archives=True
+        )
+        join_conditions = [
+            source.category_id == CategoryClosure.descendant_id,
+            source.transaction_type == transaction_type,
+        ]
+        if start_date:
+            join_conditions.append(source.date >= start_date)
+        if end_date:
+            join_conditions.append(source.date < end_date)
+        if filter_spec:
+            join_conditions.extend(adapt(source, filter_spec.clauses_for(self.db)))
+
+        results = (
+            self.db.query(
+                Category.name,
+                func.coalesce(func.sum(source.amount), 0.0),
+            )
+            .join(CategoryClosure, CategoryClosure.ancestor_id == Category.id)
+            .outerjoin(source, and_(*join_conditions))
+            .group_by(Category.id, Category.name)
+            .all()
+        )
+
+        return {name: float(amount) for name, amount in results}
+
+    def person_category_month_crosstab(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: str = "expense",
+        margins: bool = False,
+        filter_spec: Optional[TransactionFilter] = None,
+    ) -> Dict[Tuple, float]:
+        """
+        人员 × 分类 × 月份 交叉统计（一次分组查询）
+
+        Args:
+            start_date: 开始日期（包含）
+            end_date: 结束日期（不包含）
+            transaction_type: 交易类型，默认统计支出
+            margins: 是否附加汇总，任一维度为 MARGIN_KEY 表示对该维度求和
+            filter_spec: 附加的组合过滤条件
+
+        Returns:
+            以 (人员名称, 分类名称, 'YYYY-MM') 为键、金额为值的字典，
+            未关联人员或分类时对应的名称为 None
+        """
+        source = transaction_source(
+            self.db, start_date, end_date, include_archives=True
+        )
+        month = func.strftime("%Y-%m", source.date)
+        query = (
+            self.db.query(
+                Person.name,
+                Category.name,
+                month,
+                func.sum(source.amount),
+            )
+            .select_from(source)
+            .outerjoin(Person, source.person_id == Person.id)
+            .outerjoin(Category, source.category_id == Category.id)
+            .filter(source.transaction_type == transaction_type)
+        )
+        if start_date:
+            query = query.filter(source.date >= start_date)
+        if end_date:
+            query = query.filter(source.date < end_date)
+        if filter_spec:
+            query = query.filter(*adapt(source, filter_spec.clauses_for(self.db)))
+
+        results = query.group_by(Person.name, Category.name, month).all()
+
+        crosstab: Dict[Tuple, float] = {}
+        for person_name, category_name, month_key, amount in results:
+            key = (person_name, category_name, month_key)
+            # 汇总时在内存中展开到所有边际组合，不再额外查询
+            targets = (
+                product(*((part, MARGIN_KEY) for part in key)) if margins else [key]
+            )
+            for target in targets:
+                crosstab[target] = crosstab.get(target, 0.0) + float(amount)
+
+        return crosstab
+
+    def income_net_summary(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        period: str = "month",
+    ) -> Dict[str, Dict]:
+        """
+        按月或按年统计税前收入、各扣除项和税后收入
+
+        毛收入分组与扣除明细分组通过 UNION ALL 合并为一条语句，
+        不会逐条加载 transaction.income_details。
+
+        Args:
+            start_date: 开始日期（包含）
+            end_date: 结束日期（不包含）
+            period: 统计周期，'month' 或 'year'
+
+        Returns:
+            以 'YYYY-MM' 或 'YYYY' 为键的字典，每项包含 'gross'、
+            'deductions'（项目名称到金额）、'total_deductions' 和 'net'
+        """
+        if period not in PERIOD_FORMATS:
+            raise ValueError(f"不支持的统计周期: {period}")
+
+        source = transaction_source(
+            self.db, start_date, end_date, include_archives=True
+        )
+        details = income_detail_source(
+            self.db, start_date, end_date, include_archives=True
+        )
+        period_key = func.strftime(PERIOD_FORMATS[period], source.date)
+        conditions = [source.transaction_type == "income"]
+        if start_date:
+            conditions.append(source.date >= start_date)
+        if end_date:
+            conditions.append(source.date < end_date)
+        # 已结账的整月读快照
+        closed = closed_months(self.db, start_date, end_date)
+        if closed:
+            conditions.append(func.strftime("%Y-%m", source.date).not_in(closed))
+        snapshot_rows = [
+            (month if period == "month" else month[:4], item_name, amount)
+            for month, item_name, amount in (
+                snapshot_income_items(self.db, closed) if closed else []
+            )
+        ]
+
+        gross = (
+            select(
+                period_key.label("period"),
+                null().label("item_name"),
+                func.sum(source.amount).label("amount"),
+            )
+            .where(*conditions)
+            .group_by(period_key)
+        )
+        deductions = (
+            select(
+                period_key.label("period"),
+                details.item_name,
+                func.sum(details.amount).label("amount"),
+            )
+            .select_from(source)
+            .join(details, details.transaction_id == source.id)
+            .where(*conditions)
+            .group_by(period_key, details.item_name)
+        )
+
+        summary: Dict[str, Dict] = {}
+        rows = [*self.db.execute(union_all(gross, deductions)), *snapshot_rows]
+        for period_value, item_name, amount in rows:
+            entry = summary.setdefault(
+                period_value,
+                {"gross": 0.0, "deductions": {}, "total_deductions": 0.0, "net": 0.0},
+            )
+            if item_name is None:
+                entry["gross"] += float(amount)
+            else:
+                deductions_by_item = entry["deductions"]
+                deductions_by_item[item_name] = deductions_by_item.get(
+                    item_name, 0.0
+                ) + float(amount)
+                entry["total_deductions"] += float(amount)
+
+        for entry in summary.values():
+            entry["net"] = entry["gross"] - entry["total_deductions"]
+
+        return dict(sorted(summary.items()))
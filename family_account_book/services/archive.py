@@ -0,0 +1,427 @@
+"""
+按年归档交易
+
+已结束年份的交易及其收入明细可以移到独立的 SQLite 文件（数据库目录下的
+archive/<数据库名>_<年份>.db），当前表只保留近期交易，日常查询和写入不再扫描历史数据。
+已归档年份登记在 archive_partitions 表中，当前表上的触发器拒绝写入这些年份。
+
+查询时由 transaction_source 路由：日期范围不涉及已归档年份时直接使用 Transaction，
+否则按需 ATTACH 相关归档文件，返回当前表与这些文件的 UNION ALL 别名。
+不限日期的查询（如历史记录列表）默认只读当前表，统计和导出显式要求
+include_archives 时才包含全部归档年份。全文搜索和疑似重复扫描只覆盖当前表，
+删除、合并分类或人员前用 archived_reference_exists 逐个检查归档文件。
+预算计数器和月度快照保留归档月份的数值，归档不影响历史预算概览和已结账月份。
+"""
+
+import os
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Union
+
+from sqlalchemy import column, exists, func, inspect, select, table, union_all
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.util import ClauseAdapter
+
+from family_account_book.database import ensure_transaction_autoincrement
+from family_account_book.models import ArchivePartition, IncomeDetail, Transaction
+
+DateLike = Union[date, datetime]
+
+ARCHIVE_DIR_NAME = "archive"
+SCHEMA_PREFIX = "archive_"
+# SQLite 默认每个连接最多附加 10 个数据库
+MAX_ATTACHED_ARCHIVES = 10
+
+# 由触发器按月维护、归档和恢复时需要保持原状的表（预算计数器、月度快照）
+_MONTH_STATE_TABLES = ("budget_actuals", "month_closures", "month_snapshots")
+
+# 会话缓存已归档年份的键（会话生命周期很短，归档后由 ArchiveService 清除）
+_ARCHIVED_YEARS_KEY = "archived_years"
+
+# 归档文件中建立的索引：(表, 索引列)
+_ARCHIVE_INDEXES = [
+    (Transaction.__tablename__, ("date",)),
+    (Transaction.__tablename__, ("transaction_type", "date")),
+    (Transaction.__tablename__, ("category_id", "date")),
+    (IncomeDetail.__tablename__, ("transaction_id",)),
+]
+
+
+def schema_name(year: int) -> str:
+    """归档文件附加到连接上使用的库名"""
+    return f"{SCHEMA_PREFIX}{year}"
+
+
+def archived_years(db: Session) -> Dict[int, str]:
+    """已归档年份到归档文件路径的映射（在会话内缓存）"""
+    years = db.info.get(_ARCHIVED_YEARS_KEY)
+    if years is None:
+        years = {
+            year: path
+            for year, path in db.execute(
+                select(ArchivePartition.year, ArchivePartition.path)
+            )
+        }
+        db.info[_ARCHIVED_YEARS_KEY] = years
+    return years
+
+
+def _attach(db: Session, years: Sequence[int]) -> None:
+    """
+    在会话的连接上附加指定年份的归档文件
+
+    附加数超过上限时先分离本次不需要的归档。ATTACH 不能在写事务中执行，
+    路由查询应在没有未提交写入的会话中进行。
+    """
+    paths = archived_years(db)
+    conn = db.connection()
+    attached = {
+        row[1]
+        for row in conn.exec_driver_sql("PRAGMA database_list")
+        if row[1].startswith(SCHEMA_PREFIX)
+    }
+    wanted = {schema_name(year): paths[year] for year in years}
+    if len(wanted) > MAX_ATTACHED_ARCHIVES:
+        raise ValueError(
+            f"一次查询最多涉及 {MAX_ATTACHED_ARCHIVES} 个已归档年份，请缩小日期范围"
+        )
+
+    missing = [name for name in wanted if name not in attached]
+    if len(attached) + len(missing) > MAX_ATTACHED_ARCHIVES:
+        for name in attached - set(wanted):
+            conn.exec_driver_sql(f"DETACH DATABASE {name}")
+    for name in missing:
+        conn.exec_driver_sql(f"ATTACH DATABASE ? AS {name}", (wanted[name],))
+
+
+def _years_in_range(
+    db: Session,
+    start_date: Optional[DateLike],
+    end_date: Optional[DateLike],
+    include_archives: bool,
+) -> List[int]:
+    if start_date is None and end_date is None and not include_archives:
+        return []
+    return sorted(
+        year
+        for year in archived_years(db)
+        if (start_date is None or year >= start_date.year)
+        and (end_date is None or year <= end_date.year)
+    )
+
+
+def _partitioned(db: Session, model, years: Sequence[int]):
+    """当前表与各年份归档表的 UNION ALL 别名"""
+    _attach(db, years)
+    source = model.__table__
+    names = [c.name for c in source.columns]
+    parts = [select(source)]
+    for year in years:
+        archived = table(
+            source.name, *(column(name) for name in names), schema=schema_name(year)
+        )
+        parts.append(select(*archived.c))
+    return aliased(model, union_all(*parts).subquery(f"all_{source.name}"))
+
+
+def transaction_source(
+    db: Session,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    include_archives: bool = False,
+):
+    """
+    查询交易应使用的实体
+
+    Args:
+        db: 数据库会话
+        start_date: 查询范围的开始日期（不限时为 None）
+        end_date: 查询范围的结束日期（不限时为 None，包含或不包含均可）
+        include_archives: 开始和结束日期都不限时是否包含全部已归档年份
+            （默认只读当前表）
+
+    Returns:
+        范围不涉及已归档年份时为 Transaction，否则为包含相关归档的 Transaction 别名，
+        可以像 Transaction 一样用于查询，条件需用 adapt 转换
+
+    Raises:
+        ValueError: 涉及的已归档年份超过 MAX_ATTACHED_ARCHIVES
+    """
+    years = _years_in_range(db, start_date, end_date, include_archives)
+    if not years:
+        return Transaction
+    return _partitioned(db, Transaction, years)
+
+
+def income_detail_source(
+    db: Session,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    include_archives: bool = False,
+):
+    """查询收入明细应使用的实体，规则同 transaction_source"""
+    years = _years_in_range(db, start_date, end_date, include_archives)
+    if not years:
+        return IncomeDetail
+    return _partitioned(db, IncomeDetail, years)
+
+
+def archived_reference_exists(db: Session, column_name: str, value: int) -> bool:
+    """
+    已归档交易中是否有引用某个分类或人员（column_name 为交易表的列名）的交易
+
+    逐个归档文件用 EXISTS 检查，找到即停止；每次只附加一个归档文件，
+    不受 MAX_ATTACHED_ARCHIVES 限制。
+    """
+    for year in sorted(archived_years(db), reverse=True):
+        _attach(db, [year])
+        archived = table(
+            Transaction.__tablename__, column(column_name), schema=schema_name(year)
+        )
+        if db.scalar(select(exists().where(archived.c[column_name] == value))):
+            return True
+    return False
+
+
+def adapt(source, clauses: List[ColumnElement]) -> List[ColumnElement]:
+    """把引用 Transaction 列的条件（如 TransactionFilter.clauses()）转换到 source 上"""
+    if source is Transaction:
+        return clauses
+    adapter = ClauseAdapter(inspect(source).selectable)
+    return [adapter.traverse(clause) for clause in clauses]
+
+
+class ArchiveService:
+    """交易归档服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_partitions(self) -> List[ArchivePartition]:
+        """已归档的年份"""
+        return self.db.query(ArchivePartition).order_by(ArchivePartition.year).all()
+
+    def archivable_years(self) -> List[int]:
+        """当前表中有交易、且已经结束的年份"""
+        year = func.strftime("%Y", Transaction.date)
+        return [
+            int(value)
+            for value in self.db.scalars(
+                select(year)
+                .where(Transaction.date < date(date.today().year, 1, 1))
+                .group_by(year)
+                .order_by(year)
+            )
+        ]
+
+    def archive_year(self, year: int) -> int:
+        """
+        把一个已结束年份的交易和收入明细移到归档文件
+
+        复制、删除和登记在一个事务中完成。首次归档时交易表改为 AUTOINCREMENT，
+        避免新交易复用已归档交易的 ID。
+
+        Args:
+            year: 年份，必须早于今年
+
+        Returns:
+            归档的交易条数
+
+        Raises:
+            ValueError: 年份未结束、已归档、归档文件已存在或数据库在内存中
+        """
+        if year >= date.today().year:
+            raise ValueError(f"只能归档已经结束的年份: {year}")
+        if year in archived_years(self.db):
+            raise ValueError(f"{year} 年已归档")
+
+        path = self._archive_path(year)
+        if os.path.exists(path):
+            raise ValueError(f"归档文件已存在: {path}")
+        self.db.commit()
+
+        bind = self.db.get_bind()
+        ensure_transaction_autoincrement(bind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        name = schema_name(year)
+        start, end = f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+        transactions = Transaction.__tablename__
+        details = IncomeDetail.__tablename__
+        transaction_columns = _column_list(Transaction)
+        detail_columns = _column_list(IncomeDetail)
+
+        raw = bind.raw_connection()
+        connection = raw.driver_connection
+        try:
+            connection.execute(f"ATTACH DATABASE ? AS {name}", (path,))
+            try:
+                for model in (Transaction, IncomeDetail):
+                    connection.execute(_archive_table_ddl(model, name))
+                for index_table, index_columns in _ARCHIVE_INDEXES:
+                    connection.execute(
+                        f"CREATE INDEX {name}.ix_{index_table}_{'_'.join(index_columns)} "
+                        f"ON {index_table} ({', '.join(index_columns)})"
+                    )
+                connection.commit()
+
+                connection.execute("BEGIN IMMEDIATE")
+                month_state = _month_state(connection, year)
+                count = connection.execute(
+                    f"INSERT INTO {name}.{transactions} ({transaction_columns}) "
+                    f"SELECT {transaction_columns} FROM main.{transactions} "
+                    "WHERE date >= ? AND date < ?",
+                    (start, end),
+                ).rowcount
+                connection.execute(
+                    f"INSERT INTO {name}.{details} ({detail_columns}) "
+                    f"SELECT {detail_columns} FROM main.{details} WHERE transaction_id "
+                    f"IN (SELECT id FROM {name}.{transactions})"
+                )
+                connection.execute(
+                    f"DELETE FROM main.{details} WHERE transaction_id "
+                    f"IN (SELECT id FROM {name}.{transactions})"
+                )
+                connection.execute(
+                    f"DELETE FROM main.{transactions} WHERE date >= ? AND date < ?",
+                    (start, end),
+                )
+                # 删除触发器扣减了预算计数器、重新开账了已结账月份，恢复原状
+                _restore_month_state(connection, year, month_state)
+                connection.execute(
+                    f"INSERT INTO {ArchivePartition.__tablename__} "
+                    "(year, path, row_count, archived_at) VALUES (?, ?, ?, ?)",
+                    (year, path, count, datetime.now().isoformat(sep=" ")),
+                )
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                connection.execute(f"DETACH DATABASE {name}")
+                os.remove(path)
+                raise
+            connection.execute(f"DETACH DATABASE {name}")
+        finally:
+            raw.close()
+
+        self._reset(bind)
+        return count
+
+    def restore_year(self, year: int) -> int:
+        """
+        把已归档年份的交易移回当前表并删除归档文件
+
+        Args:
+            year: 已归档的年份
+
+        Returns:
+            恢复的交易条数
+
+        Raises:
+            ValueError: 该年份未归档
+        """
+        path = archived_years(self.db).get(year)
+        if path is None:
+            raise ValueError(f"{year} 年未归档")
+        self.db.commit()
+
+        name = schema_name(year)
+        transactions = Transaction.__tablename__
+        details = IncomeDetail.__tablename__
+        transaction_columns = _column_list(Transaction)
+        detail_columns = _column_list(IncomeDetail)
+
+        bind = self.db.get_bind()
+        # 连接池中的连接可能附加着该归档文件
+        bind.dispose()
+        raw = bind.raw_connection()
+        connection = raw.driver_connection
+        try:
+            connection.execute(f"ATTACH DATABASE ? AS {name}", (path,))
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                month_state = _month_state(connection, year)
+                connection.execute(
+                    f"DELETE FROM {ArchivePartition.__tablename__} WHERE year = ?",
+                    (year,),
+                )
+                count = connection.execute(
+                    f"INSERT INTO main.{transactions} ({transaction_columns}) "
+                    f"SELECT {transaction_columns} FROM {name}.{transactions}"
+                ).rowcount
+                connection.execute(
+                    f"INSERT INTO main.{details} ({detail_columns}) "
+                    f"SELECT {detail_columns} FROM {name}.{details}"
+                )
+                # 插入触发器又累加了一遍预算计数器，恢复原状
+                _restore_month_state(connection, year, month_state)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.execute(f"DETACH DATABASE {name}")
+        finally:
+            raw.close()
+
+        os.remove(path)
+        self._reset(bind)
+        return count
+
+    def _reset(self, bind) -> None:
+        """归档年份变化后清除缓存，并关闭附加了旧归档文件的池化连接"""
+        self.db.info.pop(_ARCHIVED_YEARS_KEY, None)
+        bind.dispose()
+
+    def _archive_path(self, year: int) -> str:
+        main_file = next(
+            row[2]
+            for row in self.db.connection().exec_driver_sql("PRAGMA database_list")
+            if row[1] == "main"
+        )
+        if not main_file:
+            raise ValueError("内存数据库不支持归档")
+        directory, filename = os.path.split(main_file)
+        stem = os.path.splitext(filename)[0]
+        return os.path.join(
+            os.path.abspath(directory), ARCHIVE_DIR_NAME, f"{stem}_{year}.db"
+        )
+
+
+def _column_list(model) -> str:
+    return ", ".join(f'"{c.name}"' for c in model.__table__.columns)
+
+
+def _archive_table_ddl(model, schema: str) -> str:
+    """归档表结构：与当前表相同的列和主键，不带外键（分类和人员在主库中）"""
+    source = model.__table__
+    columns = [
+        f'"{c.name}" {c.type.compile()}' + (" PRIMARY KEY" if c.primary_key else "")
+        for c in source.columns
+    ]
+    return f"CREATE TABLE {schema}.{source.name} ({', '.join(columns)})"
+
+
+def _month_state(connection, year: int) -> Dict[str, list]:
+    """该年各月由触发器维护的派生数据：表名到 (列名, 行) 的映射"""
+    state = {}
+    for table_name in _MONTH_STATE_TABLES:
+        cursor = connection.execute(
+            f"SELECT * FROM {table_name} WHERE month LIKE ?", (f"{year:04d}-%",)
+        )
+        state[table_name] = (
+            [description[0] for description in cursor.description],
+            cursor.fetchall(),
+        )
+    return state
+
+
+def _restore_month_state(connection, year: int, state: Dict[str, list]) -> None:
+    for table_name, (columns, rows) in state.items():
+        connection.execute(
+            f"DELETE FROM {table_name} WHERE month LIKE ?", (f"{year:04d}-%",)
+        )
+        connection.executemany(
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            rows,
+        )
@@ -0,0 +1,157 @@
+"""
+异步服务层（SQLAlchemy asyncio + aiosqlite）
+
+每个异步服务方法打开自己的 AsyncSession，在 run_sync 中调用同名的同步服务方法，
+查询逻辑、模型和校验与同步服务完全共用。因为方法之间不共享会话，
+互不依赖的查询可以用 asyncio.gather 并发执行，各自占用连接池中的一个连接:
+
+    factory = create_async_session_factory()
+    analytics = AsyncAnalyticsService(factory)
+    expenses, income = await asyncio.gather(
+        analytics.monthly_aggregation(2024, 6),
+        analytics.income_net_summary(date(2024, 6, 1), date(2024, 7, 1)),
+    )
+
+返回的 ORM 对象已与会话分离，只能读取已加载的列属性；需要访问关联对象时
+用 run() 在会话内完成。表结构仍由同步的 database.create_tables 创建。
+
+需要安装可选依赖 aiosqlite 和 greenlet（pip install -r requirements-async.txt）。
+"""
+
+import functools
+from typing import Any, Callable, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from family_account_book import database
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.repository import (
+    CategoryService,
+    PersonService,
+    TransactionService,
+)
+
+T = TypeVar("T")
+
+
+def create_async_session_factory(
+    url: Optional[str] = None,
+) -> async_sessionmaker[AsyncSession]:
+    """
+    创建异步会话工厂
+
+    Args:
+        url: 同步形式的数据库地址（sqlite:///...），默认使用应用数据库
+
+    Returns:
+        提交时不使对象过期的异步会话工厂
+
+    Raises:
+        ImportError: 未安装 aiosqlite
+    """
+    url = url or database.DATABASE_URL
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+def _delegate(method: Callable[..., T]) -> Callable[..., Any]:
+    """把同步服务方法包装为在独立异步会话中执行的协程方法"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs) -> T:
+        return await self.run(
+            lambda db: getattr(self.service_class(db), name)(*args, **kwargs)
+        )
+
+    return wrapper
+
+
+class AsyncService:
+    """异步服务基类，service_class 为对应的同步服务"""
+
+    service_class: Callable[[Session], Any]
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+
+    async def run(self, work: Callable[[Session], T]) -> T:
+        """
+        在新的异步会话中执行 work(db)，正常结束时提交，异常时回滚（关闭会话时）
+
+        Args:
+            work: 接收同步会话的函数，可以访问关联对象
+
+        Returns:
+            work 的返回值
+        """
+        async with self.session_factory() as session:
+            result = await session.run_sync(work)
+            await session.commit()
+            return result
+
+
+class AsyncTransactionService(AsyncService):
+    """交易服务的异步版本"""
+
+    service_class = TransactionService
+
+    create_expense = _delegate(TransactionService.create_expense)
+    create_income = _delegate(TransactionService.create_income)
+    add_income_details = _delegate(TransactionService.add_income_details)
+    import_payslips = _delegate(TransactionService.import_payslips)
+    bulk_create_transactions = _delegate(TransactionService.bulk_create_transactions)
+    get_transactions = _delegate(TransactionService.get_transactions)
+    list_transactions = _delegate(TransactionService.list_transactions)
+    search = _delegate(TransactionService.search)
+    search_rows = _delegate(TransactionService.search_rows)
+    update_transaction = _delegate(TransactionService.update_transaction)
+    delete_transaction = _delegate(TransactionService.delete_transaction)
+    count_transactions = _delegate(TransactionService.count_transactions)
+    bulk_delete = _delegate(TransactionService.bulk_delete)
+    bulk_reassign_category = _delegate(TransactionService.bulk_reassign_category)
+
+
+class AsyncCategoryService(AsyncService):
+    """分类服务的异步版本"""
+
+    service_class = CategoryService
+
+    get_all_categories = _delegate(CategoryService.get_all_categories)
+    list_categories = _delegate(CategoryService.list_categories)
+    create_category = _delegate(CategoryService.create_category)
+    delete_category = _delegate(CategoryService.delete_category)
+    merge_category = _delegate(CategoryService.merge_category)
+    rebuild_closure = _delegate(CategoryService.rebuild_closure)
+    closure_needs_rebuild = _delegate(CategoryService.closure_needs_rebuild)
+
+
+class AsyncPersonService(AsyncService):
+    """人员服务的异步版本"""
+
+    service_class = PersonService
+
+    get_all_persons = _delegate(PersonService.get_all_persons)
+    list_persons = _delegate(PersonService.list_persons)
+    create_person = _delegate(PersonService.create_person)
+    delete_person = _delegate(PersonService.delete_person)
+    merge_person = _delegate(PersonService.merge_person)
+
+
+class AsyncAnalyticsService(AsyncService):
+    """分析服务的异步版本"""
+
+    service_class = AnalyticsService
+
+    monthly_aggregation = _delegate(AnalyticsService.monthly_aggregation)
+    category_sum_in_range = _delegate(AnalyticsService.category_sum_in_range)
+    per_month_series_for_category = _delegate(
+        AnalyticsService.per_month_series_for_category
+    )
+    get_category_percentage = _delegate(AnalyticsService.get_category_percentage)
+    category_subtree_totals = _delegate(AnalyticsService.category_subtree_totals)
+    person_category_month_crosstab = _delegate(
+        AnalyticsService.person_category_month_crosstab
+    )
+    income_net_summary = _delegate(AnalyticsService.income_net_summary)
@@ -0,0 +1,175 @@
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from family_account_book.models import (
+    Budget,
+    BudgetActual,
+    Category,
+    CategoryClosure,
+)
+
+# 预算状态
+STATUS_OK = "ok"
+STATUS_WARNING = "warning"  # 达到提醒比例
+STATUS_OVER = "over"  # 超出预算
+
+
+def budget_status(budget: float, actual: float, warn_ratio: float) -> str:
+    """根据预算、实际支出和提醒比例判断状态"""
+    if actual > budget:
+        return STATUS_OVER
+    if actual >= budget * warn_ratio:
+        return STATUS_WARNING
+    return STATUS_OK
+
+
+class BudgetService:
+    """预算服务：分类月度预算及预算执行情况"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_all_budgets(self) -> List[Budget]:
+        """获取所有预算"""
+        return (
+            self.db.query(Budget)
+            .join(Category, Category.id == Budget.category_id)
+            .order_by(Category.name)
+            .all()
+        )
+
+    def set_budget(
+        self, category_name: str, amount: float, warn_ratio: float = 0.8
+    ) -> Budget:
+        """
+        设置分类月度预算（已存在时更新）
+
+        Args:
+            category_name: 分类名称，预算包含其子分类的支出
+            amount: 每月预算金额
+            warn_ratio: 实际支出达到预算的该比例时提醒
+
+        Returns:
+            预算对象
+
+        Raises:
+            ValueError: 分类不存在或金额无效
+        """
+        if amount <= 0:
+            raise ValueError("预算金额必须大于 0")
+        category_id = self.db.scalar(
+            select(Category.id).where(Category.name == category_name)
+        )
+        if category_id is None:
+            raise ValueError(f"分类不存在: {category_name}")
+
+        budget = self.db.query(Budget).filter(Budget.category_id == category_id).first()
+        if budget is None:
+            budget = Budget(category_id=category_id)
+            self.db.add(budget)
+        budget.amount = amount
+        budget.warn_ratio = warn_ratio
+        self.db.commit()
+        self.db.refresh(budget)
+        return budget
+
+    def delete_budget(self, budget_id: int) -> bool:
+        """删除预算"""
+        budget = self.db.get(Budget, budget_id)
+        if not budget:
+            return False
+        self.db.delete(budget)
+        self.db.commit()
+        return True
+
+    def overview(
+        self, year: int, month: int, category_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        预算执行概览，直接读取月度计数器（与交易条数无关）
+
+        每个预算的实际支出为该分类及其子孙分类在当月的计数器之和。
+
+        Args:
+            year: 年份
+            month: 月份
+            category_id: 只返回覆盖该分类（自身或祖先分类）的预算
+
+        Returns:
+            按分类名称排序的列表，每项包含 budget_id、category_id、category、
+            budget、warn_ratio、actual、remaining、ratio、status
+        """
+        actual = func.coalesce(func.sum(BudgetActual.amount), 0.0)
+        query = (
+            select(
+                Budget.id,
+                Budget.category_id,
+                Category.name,
+                Budget.amount,
+                Budget.warn_ratio,
+                actual.label("actual"),
+            )
+            .join(Category, Category.id == Budget.category_id)
+            .join(CategoryClosure, CategoryClosure.ancestor_id == Budget.category_id)
+            .outerjoin(
+                BudgetActual,
+                and_(
+                    BudgetActual.category_id == CategoryClosure.descendant_id,
+                    BudgetActual.month == f"{year:04d}-{month:02d}",
+                ),
+            )
+            .group_by(Budget.id)
+            .order_by(Category.name)
+        )
+        if category_id is not None:
+            query = query.where(
+                Budget.category_id.in_(
+                    select(CategoryClosure.ancestor_id).where(
+                        CategoryClosure.descendant_id == category_id
+                    )
+                )
+            )
+
+        result = []
+        for row in self.db.execute(query):
+            actual_amount = round(row.actual, 2)
+            result.append(
+                {
+                    "budget_id": row.id,
+                    "category_id": row.category_id,
+                    "category": row.name,
+                    "budget": row.amount,
+                    "warn_ratio": row.warn_ratio,
+                    "actual": actual_amount,
+                    "remaining": round(row.amount - actual_amount, 2),
+                    "ratio": actual_amount / row.amount,
+                    "status": budget_status(row.amount, actual_amount, row.warn_ratio),
+                }
+            )
+        return result
+
+    def alerts_for_expense(
+        self, category_id: int, when: Union[date, datetime], amount: float
+    ) -> List[Dict[str, Any]]:
+        """
+        一笔支出写入后，找出因这笔支出而越过提醒线或预算线的预算
+
+        Args:
+            category_id: 支出分类ID
+            when: 支出日期
+            amount: 支出金额
+
+        Returns:
+            越线的预算概览项（见 overview），没有越线时为空列表
+        """
+        alerts = []
+        for item in self.overview(when.year, when.month, category_id=category_id):
+            before = budget_status(
+                item["budget"], item["actual"] - amount, item["warn_ratio"]
+            )
+            if item["status"] != STATUS_OK and item["status"] != before:
+                alerts.append(item)
+        return alerts
@@ -0,0 +1,186 @@
+import hashlib
+import unicodedata
+from collections import deque
+from datetime import date, datetime, timedelta
+from difflib import SequenceMatcher
+from typing import Callable, List, Optional, Tuple, Union
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from family_account_book.models import Transaction
+
+# 回填去重键时每批处理的记录数
+BACKFILL_BATCH_SIZE = 5000
+
+
+class DuplicateTransactionError(Exception):
+    """新交易与已有交易的去重键相同"""
+
+    def __init__(self, existing_id: int):
+        super().__init__(f"与已有交易 {existing_id} 重复")
+        self.existing_id = existing_id
+
+
+def normalize_description(description: str) -> str:
+    """描述归一化：全半角统一、转小写，去掉空白和标点"""
+    text = unicodedata.normalize("NFKC", description or "").lower()
+    return "".join(
+        ch for ch in text if unicodedata.category(ch)[0] not in ("Z", "P", "C")
+    )
+
+
+def compute_dedupe_key(
+    when: Union[date, datetime],
+    amount: float,
+    description: str,
+    person_id: Optional[int] = None,
+) -> str:
+    """
+    计算交易去重键：(日期, 金额(分), 归一化描述, 人员) 的 SHA-1
+
+    Args:
+        when: 交易日期（只取日期部分）
+        amount: 金额
+        description: 描述
+        person_id: 人员ID
+
+    Returns:
+        40 位十六进制字符串
+    """
+    day = when.date() if isinstance(when, datetime) else when
+    parts = [
+        day.isoformat(),
+        str(round(amount * 100)),
+        normalize_description(description),
+        str(person_id or ""),
+    ]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class DedupeService:
+    """交易去重服务：去重键回填和全账本疑似重复扫描"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def backfill_keys(
+        self, progress: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        为缺少去重键的旧交易分批计算并写入去重键
+
+        每批单独提交，回填期间其他连接仍可写入。
+
+        Args:
+            progress: 每批提交后调用 progress(已回填条数, 待回填总数)
+
+        Returns:
+            回填的交易条数
+        """
+        pending = None
+        if progress is not None:
+            pending = (
+                self.db.query(func.count(Transaction.id))
+                .filter(Transaction.dedupe_key.is_(None))
+                .scalar()
+            )
+        total = 0
+        while True:
+            rows = (
+                self.db.query(
+                    Transaction.id,
+                    Transaction.date,
+                    Transaction.amount,
+                    Transaction.description,
+                    Transaction.person_id,
+                )
+                .filter(Transaction.dedupe_key.is_(None))
+                .limit(BACKFILL_BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            self.db.execute(
+                update(Transaction),
+                [
+                    {
+                        "id": row.id,
+                        "dedupe_key": compute_dedupe_key(
+                            row.date, row.amount, row.description, row.person_id
+                        ),
+                    }
+                    for row in rows
+                ],
+            )
+            self.db.commit()
+            total += len(rows)
+            if progress is not None:
+                progress(total, max(pending, total))
+        return total
+
+    def find_near_duplicates(
+        self, days: int = 3, min_similarity: float = 0.6
+    ) -> List[Tuple[int, int, float]]:
+        """
+        扫描全账本中的疑似重复交易
+
+        按 (金额, 日期) 排序后用滑动窗口比较：只有金额相同、日期相差不超过
+        days 天、人员相同（或任一方未指定）的记录才比较描述相似度，
+        避免 O(n²) 的两两比较。
+
+        Args:
+            days: 日期最大间隔天数
+            min_similarity: 归一化描述的最小相似度（0-1）
+
+        Returns:
+            (交易ID, 交易ID, 相似度) 列表，按相似度降序
+        """
+        rows = (
+            self.db.query(
+                Transaction.id,
+                Transaction.date,
+                Transaction.amount,
+                Transaction.transaction_type,
+                Transaction.description,
+                Transaction.person_id,
+            )
+            .order_by(Transaction.amount, Transaction.date)
+            .yield_per(BACKFILL_BATCH_SIZE)
+        )
+
+        max_gap = timedelta(days=days)
+        window = deque()
+        pairs = []
+        for row in rows:
+            cents = round(row.amount * 100)
+            description = normalize_description(row.description)
+            while window and (
+                window[0][1] != cents or row.date - window[0][2] > max_gap
+            ):
+                window.popleft()
+
+            for other_id, _, _, other_type, other_person, other_description in window:
+                if other_type != row.transaction_type:
+                    continue
+                if other_person and row.person_id and other_person != row.person_id:
+                    continue
+                similarity = SequenceMatcher(
+                    None, description, other_description
+                ).ratio()
+                if similarity >= min_similarity:
+                    pairs.append((other_id, row.id, round(similarity, 3)))
+
+            window.append(
+                (
+                    row.id,
+                    cents,
+                    row.date,
+                    row.transaction_type,
+                    row.person_id,
+                    description,
+                )
+            )
+
+        pairs.sort(key=lambda pair: pair[2], reverse=True)
+        return pairs
@@ -0,0 +1,72 @@
+"""
+图表序列降采样
+
+长时间范围的逐日序列点数远多于图表的像素宽度，全部绘制既慢又看不出差别。
+LTTB（Largest-Triangle-Three-Buckets）把序列分桶，每桶保留与前一个保留点、
+下一桶均值所成三角形面积最大的点，在点数降到像素宽度时仍保留峰值和整体形状。
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import List, Sequence, Tuple
+
+
+def visible_range(xs: Sequence[float], low: float, high: float) -> Tuple[int, int]:
+    """
+    按 x 排序的序列中落在 [low, high] 内的下标范围，两侧各多带一个点，
+    使折线一直画到坐标轴边缘
+
+    Returns:
+        (开始下标, 结束下标)，用于切片
+    """
+    start = max(bisect_left(xs, low) - 1, 0)
+    end = min(bisect_right(xs, high) + 1, len(xs))
+    return start, end
+
+
+def lttb(
+    xs: Sequence[float], ys: Sequence[float], threshold: int
+) -> Tuple[List[float], List[float]]:
+    """
+    用 LTTB 把序列降采样到 threshold 个点
+
+    Args:
+        xs: 按升序排列的 x 值
+        ys: 对应的 y 值
+        threshold: 保留的点数（通常为绘图区的像素宽度），少于 3 时不降采样
+
+    Returns:
+        (x 列表, y 列表)，首尾点总是保留
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+
+    out_x = [xs[0]]
+    out_y = [ys[0]]
+    # 首尾点之外的点平均分到 threshold - 2 个桶中
+    every = (n - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        # 下一个桶的均值点（最后一个桶的下一个桶就是末尾点）
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, n)
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+
+        ax, ay = xs[selected], ys[selected]
+        best_area = -1.0
+        best = start = int(bucket * every) + 1
+        for i in range(start, int((bucket + 1) * every) + 1):
+            # 三角形面积的两倍，比较大小时不必除以 2
+            area = abs((ax - avg_x) * (ys[i] - ay) - (ax - xs[i]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = i
+        out_x.append(xs[best])
+        out_y.append(ys[best])
+        selected = best
+
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
@@ -1,11 +1,19 @@
+import calendar
 import csv
+import io
 import os
 from datetime import date
-from typing import List
+from typing import Iterator, List, Optional
 
-import pandas as pd
+from sqlalchemy import select
 
-from family_account_book.models import Transaction
+from family_account_book.models import Category
+from family_account_book.services.archive import adapt, transaction_source
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.read_models import TransactionRow
+
+# 流式导出时每个数据块包含的行数
+STREAM_CHUNK_ROWS = 1000
 
 
 class ExportService:
@@ -14,12 +22,12 @@ class ExportService:
     def __init__(self, db_session):
         self.db = db_session
 
-    def export_to_csv(self, transactions: List[Transaction], filename: str) -> str:
+    def export_to_csv(self, transactions: List[TransactionRow], filename: str) -> str:
         """
         导出交易记录到 CSV 文件
 
         Args:
-            transactions: 交易记录列表
+            transactions: 交易只读数据列表（TransactionService.list_transactions）
             filename: 输出文件名（不含扩展名）
 
         Returns:
@@ -41,7 +49,7 @@ class ExportService:
                     "类型": "收入"
                     if transaction.transaction_type == "income"
                     else "支出",
-                    "分类": transaction.category.name if transaction.category else "",
+                    "分类": transaction.category_name or "",
                     "金额": f"{transaction.amount:.2f}",
                     "描述": transaction.description,
                 }
@@ -49,17 +57,19 @@ class ExportService:
 
         return output_file
 
-    def export_to_excel(self, transactions: List[Transaction], filename: str) -> str:
+    def export_to_excel(self, transactions: List[TransactionRow], filename: str) -> str:
         """
         导出交易记录到 Excel 文件
 
         Args:
-            transactions: 交易记录列表
+            transactions: 交易只读数据列表（TransactionService.list_transactions）
             filename: 输出文件名（不含扩展名）
 
         Returns:
             输出文件路径
         """
+        import pandas as pd  # 按需加载，CSV 导出和命令行不需要 pandas
+
         output_file = f"{filename}.xlsx"
 
         # 准备数据
@@ -68,7 +78,7 @@ class ExportService:
             row = {
                 "日期": transaction.date.strftime("%Y-%m-%d"),
                 "类型": "收入" if transaction.transaction_type == "income" else "支出",
-                "分类": transaction.category.name if transaction.category else "",
+                "分类": transaction.category_name or "",
                 "金额": transaction.amount,
                 "描述": transaction.description,
             }
@@ -80,6 +90,91 @@ class ExportService:
 
         return output_file
 
+    def export_transactions(
+        self,
+        filter_spec: Optional[TransactionFilter],
+        filename: str,
+        file_format: str = "csv",
+    ) -> str:
+        """
+        按过滤条件查询并导出交易记录
+
+        Args:
+            filter_spec: 组合过滤条件（与历史标签页、统计共用）
+            filename: 输出文件名（不含扩展名）
+            file_format: 'csv' 或 'excel'
+
+        Returns:
+            输出文件路径
+        """
+        from ..services.repository import TransactionService
+
+        transactions = TransactionService(self.db).list_transactions(filter_spec)
+        if file_format == "excel":
+            return self.export_to_excel(transactions, filename)
+        if file_format == "csv":
+            return self.export_to_csv(transactions, filename)
+        raise ValueError(f"不支持的导出格式: {file_format}")
+
+    def iter_csv(
+        self,
+        filter_spec: Optional[TransactionFilter] = None,
+        chunk_rows: int = STREAM_CHUNK_ROWS,
+    ) -> Iterator[str]:
+        """
+        按过滤条件逐块生成 CSV 文本，列与 export_to_csv 相同
+
+        只查询导出需要的列并分批从游标读取，不构造 ORM 对象，
+        内存占用与交易总数无关，适合边查询边发送。日期范围涉及已归档年份时包含归档交易。
+
+        Args:
+            filter_spec: 组合过滤条件
+            chunk_rows: 每块的行数
+
+        Yields:
+            CSV 文本块，第一块以表头开始
+        """
+        filter_spec = filter_spec or TransactionFilter()
+        source = transaction_source(
+            self.db,
+            filter_spec.start_date,
+            filter_spec.end_date,
+            include_archives=True,
+        )
+        query = (
+            select(
+                source.date,
+                source.transaction_type,
+                Category.name,
+                source.amount,
+                source.description,
+            )
+            .outerjoin(Category, Category.id == source.category_id)
+            .where(*adapt(source, filter_spec.clauses_for(self.db)))
+            .order_by(source.date.desc(), source.id.desc())
+        )
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["日期", "类型", "分类", "金额", "描述"])
+        result = self.db.execute(query.execution_options(yield_per=chunk_rows))
+        for rows in result.partitions():
+            for when, transaction_type, category_name, amount, description in rows:
+                writer.writerow(
+                    [
+                        when.strftime("%Y-%m-%d"),
+                        "收入" if transaction_type == "income" else "支出",
+                        category_name or "",
+                        f"{amount:.2f}",
+                        description,
+                    ]
+                )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
     def export_monthly_report(self, year: int, month: int, filename: str) -> str:
         """
         导出月度报告
@@ -92,6 +187,8 @@ class ExportService:
         Returns:
             输出文件路径
         """
+        import pandas as pd
+
         output_file = f"{filename}_monthly_report.xlsx"
 
         # 获取月度数据
@@ -107,9 +204,11 @@ class ExportService:
                 {
                     "分类": category_name,
                     "金额": amount,
-                    "占比": f"{(amount / monthly_data.get('total', 1) * 100):.1f}%"
-                    if category_name != "total"
-                    else "",
+                    "占比": (
+                        f"{(amount / monthly_data.get('total', 1) * 100):.1f}%"
+                        if category_name != "total"
+                        else ""
+                    ),
                 }
             )
 
@@ -121,13 +220,13 @@ class ExportService:
 
             # 详细交易记录
             start_date = date(year, month, 1)
-            end_date = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+            end_date = date(year, month, calendar.monthrange(year, month)[1])
 
             from ..services.repository import TransactionService
 
             transaction_service = TransactionService(self.db)
-            transactions = transaction_service.get_transactions(
-                start_date=start_date, end_date=end_date
+            transactions = transaction_service.list_transactions(
+                TransactionFilter(start_date=start_date, end_date=end_date)
             )
 
             detail_data = []
@@ -135,12 +234,12 @@ class ExportService:
                 detail_data.append(
                     {
                         "日期": transaction.date.strftime("%Y-%m-%d"),
-                        "类型": "收入"
-                        if transaction.transaction_type == "income"
-                        else "支出",
-                        "分类": transaction.category.name
-                        if transaction.category
-                        else "",
+                        "类型": (
+                            "收入"
+                            if transaction.transaction_type == "income"
+                            else "支出"
+                        ),
+                        "分类": transaction.category_name or "",
                         "金额": transaction.amount,
                         "描述": transaction.description,
                     }
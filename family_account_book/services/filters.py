@@ -0,0 +1,169 @@
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Sequence, Union
+
+from sqlalchemy import column, literal_column, select, table
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from family_account_book.database import search_index_tokenizer
+from family_account_book.models import Category, CategoryClosure, Person, Transaction
+
+DateLike = Union[date, datetime]
+
+# 交易全文索引（由 database.create_search_index 创建并通过触发器同步）
+transactions_fts = table(
+    "transactions_fts",
+    column("rowid"),
+    column("description"),
+    column("category_name"),
+    column("person_name"),
+)
+# trigram 分词要求检索词至少 3 个字符，更短的词退回 LIKE 匹配
+MIN_MATCH_TERM_LENGTH = 3
+
+# 会话缓存全文索引能否做子串 MATCH 的键
+_SUBSTRING_MATCH_KEY = "fts_substring_match"
+
+
+def substring_match_available(db: Session) -> bool:
+    """
+    全文索引能否用 MATCH 做子串匹配（trigram 分词），结果在会话内缓存
+
+    SQLite 不支持 trigram 时索引使用默认分词器，此时所有检索词都应走 LIKE。
+    """
+    available = db.info.get(_SUBSTRING_MATCH_KEY)
+    if available is None:
+        available = search_index_tokenizer(db) == "trigram"
+        db.info[_SUBSTRING_MATCH_KEY] = available
+    return available
+
+
+def fts_match(terms: Sequence[str], column_name: Optional[str] = None) -> ColumnElement:
+    """
+    生成 FTS MATCH 条件，每个词作为短语加引号，避免用户输入被解析为 FTS 语法
+
+    Args:
+        terms: 检索词列表，需全部命中
+        column_name: 只在指定列中匹配（默认全部列）
+    """
+    expression = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+    if column_name:
+        expression = f"{column_name} : ({expression})"
+    return literal_column(transactions_fts.name).op("MATCH")(expression)
+
+
+def _up_to(column, value: DateLike) -> ColumnElement:
+    """上限（包含）条件：只给出日期时包含当天全天，而不是只到当天零点"""
+    if isinstance(value, datetime):
+        return column <= value
+    return column < datetime.combine(value + timedelta(days=1), time.min)
+
+
+@dataclass(frozen=True)
+class TransactionFilter:
+    """
+    可组合的交易过滤条件，编译为单条 SQL 的 WHERE 子句
+
+    所有条件之间为 AND 关系，未设置的条件不参与过滤。列表条件为空时视为不过滤。
+    """
+
+    start_date: Optional[DateLike] = None  # 交易日期下限（包含）
+    end_date: Optional[DateLike] = None  # 交易日期上限（包含，只给日期时含当天全天）
+    transaction_type: Optional[str] = None  # 'income' 或 'expense'
+    category_names: Sequence[str] = field(default_factory=tuple)
+    include_subcategories: bool = False  # 分类条件是否包含子孙分类
+    person_names: Sequence[str] = field(default_factory=tuple)
+    amount_min: Optional[float] = None  # 金额下限（包含）
+    amount_max: Optional[float] = None  # 金额上限（包含）
+    description_contains: Optional[str] = None
+    created_from: Optional[DateLike] = None
+    created_to: Optional[DateLike] = None
+    updated_from: Optional[DateLike] = None
+    updated_to: Optional[DateLike] = None
+
+    def merged(self, **changes) -> "TransactionFilter":
+        """返回修改了部分条件的新过滤器，值为 None 的参数被忽略"""
+        return replace(
+            self, **{key: value for key, value in changes.items() if value is not None}
+        )
+
+    def clauses(self, substring_match: bool = True) -> List[ColumnElement]:
+        """
+        编译为 SQLAlchemy 条件列表
+
+        Args:
+            substring_match: 描述条件能否走全文索引（见 substring_match_available），
+                为 False 时用 LIKE
+
+        Returns:
+            可直接传给 filter()/where() 的条件列表
+        """
+        conditions = []
+
+        if self.start_date is not None:
+            conditions.append(Transaction.date >= self.start_date)
+        if self.end_date is not None:
+            conditions.append(_up_to(Transaction.date, self.end_date))
+        if self.transaction_type:
+            conditions.append(Transaction.transaction_type == self.transaction_type)
+
+        if self.category_names:
+            category_ids = select(Category.id).where(
+                Category.name.in_(list(self.category_names))
+            )
+            if self.include_subcategories:
+                category_ids = select(CategoryClosure.descendant_id).where(
+                    CategoryClosure.ancestor_id.in_(category_ids)
+                )
+            conditions.append(Transaction.category_id.in_(category_ids))
+
+        if self.person_names:
+            conditions.append(
+                Transaction.person_id.in_(
+                    select(Person.id).where(Person.name.in_(list(self.person_names)))
+                )
+            )
+
+        if self.amount_min is not None:
+            conditions.append(Transaction.amount >= self.amount_min)
+        if self.amount_max is not None:
+            conditions.append(Transaction.amount <= self.amount_max)
+
+        if self.description_contains:
+            text = self.description_contains
+            if substring_match and len(text) >= MIN_MATCH_TERM_LENGTH:
+                # 走全文索引，避免对描述做全表 LIKE 扫描
+                conditions.append(
+                    Transaction.id.in_(
+                        select(transactions_fts.c.rowid).where(
+                            fts_match([text], column_name="description")
+                        )
+                    )
+                )
+            else:
+                conditions.append(
+                    Transaction.description.contains(text, autoescape=True)
+                )
+
+        if self.created_from is not None:
+            conditions.append(Transaction.created_at >= self.created_from)
+        if self.created_to is not None:
+            conditions.append(_up_to(Transaction.created_at, self.created_to))
+        if self.updated_from is not None:
+            conditions.append(Transaction.updated_at >= self.updated_from)
+        if self.updated_to is not None:
+            conditions.append(_up_to(Transaction.updated_at, self.updated_to))
+
+        return conditions
+
+    def clauses_for(self, db: Session) -> List[ColumnElement]:
+        """按会话所用数据库的全文索引编译条件，只有描述条件时才检查分词器"""
+        return self.clauses(
+            not self.description_contains or substring_match_available(db)
+        )
+
+    def apply(self, query, substring_match: bool = True):
+        """把过滤条件应用到 ORM 查询或 select 语句上（substring_match 见 clauses）"""
+        conditions = self.clauses(substring_match)
+        return query.filter(*conditions) if conditions else query
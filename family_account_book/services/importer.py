@@ -0,0 +1,116 @@
+import csv
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from family_account_book.services.repository import TransactionService
+
+# 每批写入的交易条数
+IMPORT_BATCH_SIZE = 5000
+
+# 列名 -> 字段，兼容导出文件的中文表头和英文表头
+COLUMN_ALIASES = {
+    "日期": "date",
+    "date": "date",
+    "类型": "transaction_type",
+    "type": "transaction_type",
+    "分类": "category_name",
+    "category": "category_name",
+    "金额": "amount",
+    "amount": "amount",
+    "描述": "description",
+    "description": "description",
+    "人员": "person_name",
+    "person": "person_name",
+}
+INCOME_TYPES = ("收入", "income")
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S")
+
+
+def _parse_date(value: str) -> datetime:
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析日期: {value}")
+
+
+class ImportService:
+    """交易导入服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def import_csv(
+        self, filename: str, skip_duplicates: bool = True
+    ) -> Tuple[int, int]:
+        """
+        从 CSV 文件导入交易，分批批量写入
+
+        表头可使用导出文件的中文列名（日期、类型、分类、金额、描述、人员）
+        或英文列名（date、type、category、amount、description、person）。
+        分类和人员为空时按自动分类规则匹配。每批单独提交，
+        出错时之前的批次已经写入（重复导入会按去重键跳过）。
+
+        Args:
+            filename: CSV 文件路径
+            skip_duplicates: 是否跳过与已有交易重复的记录
+
+        Returns:
+            (导入条数, 跳过条数)
+
+        Raises:
+            ValueError: 缺少必需的列或某行格式错误（附行号）
+        """
+        service = TransactionService(self.db)
+        imported = skipped = 0
+        batch: List[Dict] = []
+
+        def flush():
+            nonlocal imported, skipped
+            count = service.bulk_create_transactions(batch, skip_duplicates)
+            imported += count
+            skipped += len(batch) - count
+            batch.clear()
+
+        with open(filename, newline="", encoding="utf-8-sig") as csvfile:
+            reader = csv.DictReader(csvfile)
+            columns = {
+                COLUMN_ALIASES[name.strip().lower()]: name
+                for name in reader.fieldnames or []
+                if name and name.strip().lower() in COLUMN_ALIASES
+            }
+            missing = {"date", "amount", "description"} - set(columns)
+            if missing:
+                raise ValueError(f"缺少必需的列: {', '.join(sorted(missing))}")
+
+            for line_number, record in enumerate(reader, start=2):
+                values = {
+                    field: (record.get(name) or "").strip()
+                    for field, name in columns.items()
+                }
+                try:
+                    batch.append(
+                        {
+                            "date": _parse_date(values["date"]),
+                            "amount": float(values["amount"]),
+                            "transaction_type": (
+                                "income"
+                                if values.get("transaction_type") in INCOME_TYPES
+                                else "expense"
+                            ),
+                            "description": values["description"],
+                            "category_name": values.get("category_name") or None,
+                            "person_name": values.get("person_name") or None,
+                        }
+                    )
+                except ValueError as e:
+                    raise ValueError(f"第 {line_number} 行: {e}") from e
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    flush()
+
+        if batch:
+            flush()
+        return imported, skipped
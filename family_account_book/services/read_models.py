@@ -0,0 +1,86 @@
+"""
+界面和接口使用的只读数据
+
+列投影查询直接生成 NamedTuple：不构造 ORM 对象，没有属性插桩和身份映射条目，
+每行只是一个元组，会话关闭后仍可随意读取。修改数据时仍通过服务方法按 ID 操作。
+"""
+
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy.orm import Query
+
+from family_account_book.models import Category, Person, Transaction
+
+
+class CategoryRow(NamedTuple):
+    """分类的只读数据"""
+
+    id: int
+    name: str
+    parent_id: Optional[int]
+
+
+class PersonRow(NamedTuple):
+    """人员的只读数据"""
+
+    id: int
+    name: str
+    description: Optional[str]
+
+
+class TransactionRow(NamedTuple):
+    """交易的只读数据，带分类和人员名称"""
+
+    id: int
+    date: datetime
+    transaction_type: str
+    amount: float
+    description: str
+    category_id: Optional[int]
+    category_name: Optional[str]
+    person_id: Optional[int]
+    person_name: Optional[str]
+
+    @classmethod
+    def from_transaction(cls, transaction: Transaction) -> "TransactionRow":
+        """由 ORM 对象生成（需在会话内调用以加载分类和人员）"""
+        return cls(
+            transaction.id,
+            transaction.date,
+            transaction.transaction_type,
+            transaction.amount,
+            transaction.description,
+            transaction.category_id,
+            transaction.category.name if transaction.category else None,
+            transaction.person_id,
+            transaction.person.name if transaction.person else None,
+        )
+
+
+def project_transaction_rows(query: Query, source=Transaction) -> Query:
+    """
+    把以 source 为主实体的交易查询改为投影 TransactionRow 的列
+
+    Args:
+        query: 已设置过滤和排序的查询
+        source: 查询使用的交易实体（Transaction 或 archive.transaction_source 的别名）
+
+    Returns:
+        结果行可直接用 TransactionRow._make 转换的查询
+    """
+    return (
+        query.with_entities(
+            source.id,
+            source.date,
+            source.transaction_type,
+            source.amount,
+            source.description,
+            source.category_id,
+            Category.name,
+            source.person_id,
+            Person.name,
+        )
+        .outerjoin(Category, Category.id == source.category_id)
+        .outerjoin(Person, Person.id == source.person_id)
+    )
@@ -0,0 +1,260 @@
+import calendar
+import json
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from family_account_book.models import IncomeDetail, RecurringTemplate, Transaction
+from family_account_book.services.dedupe import compute_dedupe_key
+from family_account_book.services.repository import TransactionService
+
+FREQUENCIES = ("weekly", "monthly", "yearly")
+
+# 查询已存在的发生键/去重键时每条 IN 语句的键数
+KEY_LOOKUP_CHUNK = 500
+
+
+def _add_months(start: datetime, months: int) -> datetime:
+    """按月推进，日期超过当月天数时取月末（如 1 月 31 日 -> 2 月 28 日）"""
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return start.replace(year=year, month=month, day=day)
+
+
+def occurrence_dates(
+    template: RecurringTemplate, until: datetime
+) -> Iterator[datetime]:
+    """
+    列出模板在上次生成之后、until（包含）之前的发生日期
+
+    第 n 次发生总是从 start_date 推算，月末取整不会逐月漂移。
+
+    Args:
+        template: 周期模板
+        until: 截止日期
+
+    Yields:
+        发生日期
+    """
+    if template.end_date is not None:
+        until = min(until, template.end_date)
+    interval = max(template.interval or 1, 1)
+
+    n = 0
+    while True:
+        if template.frequency == "weekly":
+            when = template.start_date + timedelta(weeks=interval * n)
+        elif template.frequency == "monthly":
+            when = _add_months(template.start_date, interval * n)
+        else:
+            when = _add_months(template.start_date, 12 * interval * n)
+        if when > until:
+            return
+        if template.last_generated_date is None or when > template.last_generated_date:
+            yield when
+        n += 1
+
+
+def occurrence_key(template_id: int, when: datetime) -> str:
+    """周期交易的发生键"""
+    return f"{template_id}:{when.date().isoformat()}"
+
+
+class RecurringService:
+    """周期交易服务：管理模板，并批量补生成到期的交易"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_all_templates(self) -> List[RecurringTemplate]:
+        """获取所有模板"""
+        return self.db.query(RecurringTemplate).order_by(RecurringTemplate.name).all()
+
+    def create_template(
+        self,
+        name: str,
+        transaction_type: str,
+        amount: float,
+        description: str,
+        category_name: str,
+        start_date: datetime,
+        frequency: str = "monthly",
+        interval: int = 1,
+        end_date: Optional[datetime] = None,
+        person_name: Optional[str] = None,
+        deductions: Optional[List[Tuple[str, float]]] = None,
+    ) -> RecurringTemplate:
+        """
+        创建周期模板
+
+        Args:
+            name: 模板名称
+            transaction_type: 交易类型 ('income' 或 'expense')
+            amount: 金额
+            description: 生成交易的描述
+            category_name: 分类名称（不存在时创建）
+            start_date: 第一次发生的日期
+            frequency: 周期 ('weekly'、'monthly' 或 'yearly')
+            interval: 每隔几个周期发生一次
+            end_date: 最后可能发生的日期（包含）
+            person_name: 人员名称（不存在时创建）
+            deductions: 收入扣除明细 [(项目名称, 金额)]
+
+        Returns:
+            创建的模板
+
+        Raises:
+            ValueError: 周期或类型无效
+        """
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"不支持的周期: {frequency}")
+        if transaction_type not in ("income", "expense"):
+            raise ValueError(f"不支持的交易类型: {transaction_type}")
+        if isinstance(start_date, date) and not isinstance(start_date, datetime):
+            start_date = datetime.combine(start_date, datetime.min.time())
+        if isinstance(end_date, date) and not isinstance(end_date, datetime):
+            end_date = datetime.combine(end_date, datetime.min.time())
+
+        transaction_service = TransactionService(self.db)
+        template = RecurringTemplate(
+            name=name,
+            transaction_type=transaction_type,
+            amount=amount,
+            description=description,
+            category_id=transaction_service._get_or_create_category(category_name).id,
+            person_id=(
+                transaction_service._get_or_create_person(person_name).id
+                if person_name
+                else None
+            ),
+            frequency=frequency,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+            deductions=(
+                json.dumps(deductions, ensure_ascii=False) if deductions else None
+            ),
+        )
+        self.db.add(template)
+        self.db.commit()
+        self.db.refresh(template)
+        return template
+
+    def delete_template(self, template_id: int) -> bool:
+        """删除模板（已生成的交易保留）"""
+        template = self.db.get(RecurringTemplate, template_id)
+        if not template:
+            return False
+        self.db.delete(template)
+        self.db.commit()
+        return True
+
+    def run_pending(self, today: Optional[date] = None) -> int:
+        """
+        补生成所有模板截至今天的待生成交易，全部在一个事务中批量写入
+
+        每次发生带有唯一的发生键，已生成过的发生会被跳过，因此重复运行
+        或中断后重跑都不会产生重复交易；与手工录入的交易去重键相同的发生
+        也会跳过。
+
+        Args:
+            today: 截止日期，默认今天
+
+        Returns:
+            生成的交易条数
+        """
+        today = today or date.today()
+        until = datetime.combine(today, datetime.max.time())
+
+        templates = (
+            self.db.query(RecurringTemplate)
+            .filter(RecurringTemplate.active.is_(True))
+            .filter(RecurringTemplate.start_date <= until)
+            .all()
+        )
+
+        now = datetime.now()
+        rows: List[Dict] = []
+        deductions: List[List[Tuple[str, float]]] = []
+        for template in templates:
+            template_deductions = (
+                json.loads(template.deductions) if template.deductions else []
+            )
+            for when in occurrence_dates(template, until):
+                rows.append(
+                    {
+                        "date": when,
+                        "amount": template.amount,
+                        "transaction_type": template.transaction_type,
+                        "description": template.description,
+                        "category_id": template.category_id,
+                        "person_id": template.person_id,
+                        "dedupe_key": compute_dedupe_key(
+                            when,
+                            template.amount,
+                            template.description,
+                            template.person_id,
+                        ),
+                        "occurrence_key": occurrence_key(template.id, when),
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+                deductions.append(template_deductions)
+                template.last_generated_date = when
+
+        if rows:
+            existing_occurrences = self._existing(
+                Transaction.occurrence_key, [row["occurrence_key"] for row in rows]
+            )
+            existing_dedupe = self._existing(
+                Transaction.dedupe_key, [row["dedupe_key"] for row in rows]
+            )
+            kept = [
+                index
+                for index, row in enumerate(rows)
+                if row["occurrence_key"] not in existing_occurrences
+                and row["dedupe_key"] not in existing_dedupe
+            ]
+            rows = [rows[index] for index in kept]
+            deductions = [deductions[index] for index in kept]
+
+        if rows:
+            transaction_ids = self.db.scalars(
+                insert(Transaction).returning(
+                    Transaction.id, sort_by_parameter_order=True
+                ),
+                rows,
+            ).all()
+            detail_rows = [
+                {
+                    "transaction_id": transaction_id,
+                    "item_name": item_name,
+                    "amount": item_amount,
+                    "created_at": now,
+                }
+                for transaction_id, items in zip(transaction_ids, deductions)
+                for item_name, item_amount in items
+            ]
+            if detail_rows:
+                self.db.execute(insert(IncomeDetail), detail_rows)
+
+        self.db.commit()
+        return len(rows)
+
+    def _existing(self, column, keys: List[str]) -> set:
+        """分批查询库中已存在的键"""
+        keys = list(set(keys))
+        found = set()
+        for start in range(0, len(keys), KEY_LOOKUP_CHUNK):
+            found.update(
+                self.db.scalars(
+                    select(column).where(
+                        column.in_(keys[start : start + KEY_LOOKUP_CHUNK])
+                    )
+                )
+            )
+        return found
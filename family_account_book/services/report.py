@@ -0,0 +1,305 @@
+"""
+离线报告生成
+
+为一段月份生成全部图表（每月分类支出饼图和预算执行条形图，整个期间的
+主要分类趋势图），保存为 PNG 并按顺序汇总为一个多页 PDF，同时为每个月导出
+export_monthly_report 的 Excel 工作簿。
+
+数据在主进程中一次查询完毕，整理为可序列化的 ReportChart；绘制交给进程池，
+每个工作进程只使用 matplotlib 的 Agg 渲染（不导入 pyplot 和 Qt），
+因此可以在没有图形界面的机器上运行，图表数量多时按 CPU 核数并行。
+工作进程绘图期间主进程导出工作簿。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.budget import (
+    STATUS_OK,
+    STATUS_OVER,
+    STATUS_WARNING,
+    BudgetService,
+)
+from family_account_book.services.export import ExportService
+from family_account_book.services.snapshots import month_key
+
+# 报告图表使用的中文字体（与主窗口一致）
+REPORT_FONTS = [
+    "Songti SC",
+    "STHeiti",
+    "Yuanti SC",
+    "Arial Unicode MS",
+    "DejaVu Sans",
+    "sans-serif",
+]
+# PNG 分辨率，PDF 页面直接嵌入 PNG
+REPORT_DPI = 150
+# 图表尺寸（英寸），与 A4 横向同比例
+FIGURE_SIZE = (11.69, 8.27)
+# 趋势图包含的支出最多的分类数
+TREND_CATEGORIES = 6
+# 预算状态对应的条形颜色
+STATUS_COLORS = {
+    STATUS_OK: "#4caf50",
+    STATUS_WARNING: "#ff9800",
+    STATUS_OVER: "#f44336",
+}
+
+
+class ReportChart(NamedTuple):
+    """一张报告图表的全部数据（可序列化，交给工作进程绘制）"""
+
+    name: str  # PNG 文件名（不含扩展名）
+    kind: str  # 'pie'、'budget' 或 'trend'
+    title: str
+    data: Tuple
+
+
+def _init_worker() -> None:
+    """工作进程初始化：设置中文字体"""
+    import matplotlib
+
+    matplotlib.rcParams["font.sans-serif"] = REPORT_FONTS
+    matplotlib.rcParams["axes.unicode_minus"] = False
+
+
+def _draw_pie(ax, data) -> None:
+    labels = [name for name, _ in data]
+    amounts = [amount for _, amount in data]
+    ax.pie(amounts, labels=labels, autopct="%1.1f%%", startangle=90)
+    ax.axis("equal")
+
+
+def _draw_budget(ax, data) -> None:
+    names = [name for name, _, _, _ in data]
+    positions = range(len(data))
+    ax.barh(positions, [budget for _, budget, _, _ in data], color="#e0e0e0")
+    ax.barh(
+        positions,
+        [actual for _, _, actual, _ in data],
+        height=0.5,
+        color=[STATUS_COLORS.get(status, "#2196f3") for _, _, _, status in data],
+    )
+    ax.set_yticks(list(positions), names)
+    ax.invert_yaxis()
+    ax.set_xlabel("金额（灰色为预算）")
+
+
+def _draw_trend(ax, data) -> None:
+    months, series = data
+    for name, amounts in series:
+        ax.plot(months, amounts, marker="o", label=name)
+    ax.set_ylabel("金额")
+    ax.legend(loc="upper left")
+    ax.tick_params(axis="x", labelrotation=45)
+
+
+_DRAWERS = {"pie": _draw_pie, "budget": _draw_budget, "trend": _draw_trend}
+
+
+def render_chart(chart: ReportChart, output_dir: str, dpi: int = REPORT_DPI) -> str:
+    """
+    用 Agg 渲染一张图表并保存为 PNG（在工作进程中调用）
+
+    Args:
+        chart: 图表数据
+        output_dir: 输出目录
+        dpi: 分辨率
+
+    Returns:
+        PNG 文件路径
+    """
+    # 直接使用 Figure，不经过 pyplot 的全局状态和交互后端
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=FIGURE_SIZE)
+    ax = figure.add_subplot(111)
+    _DRAWERS[chart.kind](ax, chart.data)
+    ax.set_title(chart.title)
+    figure.tight_layout()
+    path = os.path.join(output_dir, f"{chart.name}.png")
+    figure.savefig(path, dpi=dpi)
+    return path
+
+
+def assemble_pdf(image_paths: List[str], path: str) -> str:
+    """
+    把 PNG 图表按顺序汇总为多页 PDF，每页一张
+
+    Returns:
+        PDF 文件路径
+    """
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+    from matplotlib.image import imread
+
+    with PdfPages(path) as pdf:
+        for image_path in image_paths:
+            figure = Figure(figsize=FIGURE_SIZE)
+            ax = figure.add_axes((0, 0, 1, 1))
+            ax.imshow(imread(image_path))
+            ax.axis("off")
+            pdf.savefig(figure, dpi=REPORT_DPI)
+    return path
+
+
+def iter_months(start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """[start, end] 之间的 (年, 月) 列表，两端都包含"""
+    months = []
+    year, month = start
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+class ReportService:
+    """离线报告服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def collect_charts(
+        self, start: Tuple[int, int], end: Tuple[int, int]
+    ) -> List[ReportChart]:
+        """
+        查询报告期间的数据并整理为图表列表
+
+        Args:
+            start: 开始月份 (年, 月)
+            end: 结束月份 (年, 月)，包含
+
+        Returns:
+            按报告顺序排列的图表：先是期间趋势，然后每月饼图和预算图；
+            没有支出的月份不生成饼图，没有预算时不生成预算图
+        """
+        months = iter_months(start, end)
+        if not months:
+            raise ValueError("结束月份不能早于开始月份")
+
+        analytics = AnalyticsService(self.db)
+        budgets = BudgetService(self.db)
+        monthly = {}
+        charts = []
+        for year, month in months:
+            key = month_key(year, month)
+            totals = analytics.monthly_aggregation(year, month)
+            monthly[key] = totals
+            slices = tuple(
+                (name, amount)
+                for name, amount in sorted(totals.items(), key=lambda item: -item[1])
+                if name != "total" and amount > 0
+            )
+            if slices:
+                charts.append(
+                    ReportChart(f"{key}_1_pie", "pie", f"{key} 分类支出", slices)
+                )
+            overview = tuple(
+                (item["category"], item["budget"], item["actual"], item["status"])
+                for item in budgets.overview(year, month)
+            )
+            if overview:
+                charts.append(
+                    ReportChart(
+                        f"{key}_2_budget", "budget", f"{key} 预算执行", overview
+                    )
+                )
+
+        # 期间支出最多的分类的月度趋势，月度合计取自上面的统计
+        period_totals: Dict[str, float] = {}
+        for totals in monthly.values():
+            for name, amount in totals.items():
+                if name != "total":
+                    period_totals[name] = period_totals.get(name, 0.0) + amount
+        top = sorted(period_totals, key=lambda name: -period_totals[name])
+        series = tuple(
+            (name, tuple(monthly[key].get(name, 0.0) for key in monthly))
+            for name in top[:TREND_CATEGORIES]
+        )
+        if series:
+            first, last = month_key(*start), month_key(*end)
+            charts.insert(
+                0,
+                ReportChart(
+                    "0_trend",
+                    "trend",
+                    f"{first} 至 {last} 主要分类支出趋势",
+                    (tuple(monthly), series),
+                ),
+            )
+        return charts
+
+    def generate(
+        self,
+        start: Tuple[int, int],
+        end: Tuple[int, int],
+        output_dir: str,
+        workers: Optional[int] = None,
+        workbooks: bool = True,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        生成报告：图表 PNG、汇总的 PDF 和每月的 Excel 工作簿
+
+        Args:
+            start: 开始月份 (年, 月)
+            end: 结束月份 (年, 月)，包含
+            output_dir: 输出目录（不存在时创建）
+            workers: 绘图进程数，默认为 CPU 核数
+            workbooks: 是否导出每月的 Excel 工作簿（需要 pandas 和 openpyxl）
+            progress: 进度回调 progress(已完成图表数, 图表总数)
+
+        Returns:
+            字典，包含 'pdf'（PDF 路径，没有图表时为 None）、'images' 和 'workbooks'
+        """
+        charts = self.collect_charts(start, end)
+        os.makedirs(output_dir, exist_ok=True)
+
+        images: Dict[str, str] = {}
+        workbook_paths = []
+        # spawn：工作进程不继承主进程的数据库连接和 Qt 状态
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+        ) as pool:
+            futures = {
+                pool.submit(render_chart, chart, output_dir): chart.name
+                for chart in charts
+            }
+            # 工作进程绘图期间在主进程导出工作簿
+            if workbooks:
+                export = ExportService(self.db)
+                for year, month in iter_months(start, end):
+                    workbook_paths.append(
+                        export.export_monthly_report(
+                            year,
+                            month,
+                            os.path.join(output_dir, month_key(year, month)),
+                        )
+                    )
+            for done, future in enumerate(as_completed(futures), 1):
+                images[futures[future]] = future.result()
+                if progress:
+                    progress(done, len(charts))
+
+        image_paths = [images[chart.name] for chart in charts]
+        pdf_path = None
+        if image_paths:
+            pdf_path = assemble_pdf(
+                image_paths,
+                os.path.join(
+                    output_dir, f"report_{month_key(*start)}_{month_key(*end)}.pdf"
+                ),
+            )
+        return {"pdf": pdf_path, "images": image_paths, "workbooks": workbook_paths}
+
+    @staticmethod
+    def default_output_dir(start: Tuple[int, int], end: Tuple[int, int]) -> str:
+        """默认输出目录 exports/report_YYYY-MM_YYYY-MM"""
+        return os.path.join("exports", f"report_{month_key(*start)}_{month_key(*end)}")
@@ -1,9 +1,139 @@
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    String,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session, aliased
 
-from family_account_book.models import Category, Person, Transaction
+from family_account_book.models import (
+    Budget,
+    BudgetActual,
+    CategorizationRule,
+    Category,
+    CategoryClosure,
+    IncomeDetail,
+    Person,
+    RecurringTemplate,
+    Transaction,
+)
+from family_account_book.services.archive import (
+    adapt,
+    archived_reference_exists,
+    transaction_source,
+)
+from family_account_book.services.dedupe import (
+    DuplicateTransactionError,
+    compute_dedupe_key,
+)
+from family_account_book.services.filters import (
+    MIN_MATCH_TERM_LENGTH,
+    TransactionFilter,
+    fts_match,
+    substring_match_available,
+    transactions_fts,
+)
+from family_account_book.services.read_models import (
+    CategoryRow,
+    PersonRow,
+    TransactionRow,
+    project_transaction_rows,
+)
+from family_account_book.services.rules import (
+    UNCATEGORIZED_CATEGORY,
+    RuleMatch,
+    RuleService,
+)
+
+# 分类层级的最大深度，限制重建闭包表时递归的层数
+MAX_CATEGORY_DEPTH = 32
+
+# 批量查询已有去重键时每条 IN 语句的键数，低于 SQLite 的参数个数上限
+DEDUPE_LOOKUP_CHUNK = 500
+
+
+def _insert_category_closure(
+    db: Session, category_id: int, parent_id: Optional[int] = None
+) -> None:
+    """为新分类写入闭包表记录：自身一行，加上父分类的每个祖先各一行"""
+    db.execute(
+        insert(CategoryClosure).values(
+            ancestor_id=category_id, descendant_id=category_id, depth=0
+        )
+    )
+    if parent_id is not None:
+        ancestors = select(
+            CategoryClosure.ancestor_id,
+            literal(category_id),
+            CategoryClosure.depth + 1,
+        ).where(CategoryClosure.descendant_id == parent_id)
+        db.execute(
+            insert(CategoryClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"], ancestors
+            )
+        )
+
+
+def _id_marker(category_id) -> Any:
+    """分类ID在递归路径字符串中的标记 '/ID/'"""
+    return literal("/") + cast(category_id, String) + literal("/")
+
+
+def _rebuild_category_closure(db: Session) -> None:
+    """
+    根据 parent_id 重写整个分类闭包表（一条递归 INSERT），不提交
+
+    递归时记录从祖先出发经过的分类，旧数据中 parent_id 成环时不再回到已经过的分类，
+    每对 (祖先, 子孙) 只写入一次。
+    """
+    tree = select(
+        Category.id.label("ancestor_id"),
+        Category.id.label("descendant_id"),
+        literal(0).label("depth"),
+        _id_marker(Category.id).label("path"),
+    ).cte("category_tree", recursive=True)
+    child = aliased(Category)
+    tree = tree.union_all(
+        select(
+            tree.c.ancestor_id,
+            child.id,
+            tree.c.depth + 1,
+            tree.c.path + cast(child.id, String) + literal("/"),
+        )
+        .join(child, child.parent_id == tree.c.descendant_id)
+        .where(
+            tree.c.depth < MAX_CATEGORY_DEPTH,
+            func.instr(tree.c.path, _id_marker(child.id)) == 0,
+        )
+    )
+
+    db.execute(delete(CategoryClosure))
+    db.execute(
+        insert(CategoryClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth),
+        )
+    )
+
+
+def _detach_rules(db: Session, column, value: int) -> None:
+    """删除分类或人员前解除规则引用，既无分类也无人员的规则随之删除"""
+    db.execute(update(CategorizationRule).where(column == value).values({column: None}))
+    db.execute(
+        delete(CategorizationRule).where(
+            CategorizationRule.category_id.is_(None),
+            CategorizationRule.person_id.is_(None),
+        )
+    )
 
 
 class TransactionService:
@@ -17,8 +147,9 @@ class TransactionService:
         date: datetime,
         amount: float,
         description: str,
-        category_name: str,
+        category_name: Optional[str],
         person_name: Optional[str] = None,
+        allow_duplicate: bool = False,
     ) -> Transaction:
         """
         创建支出交易
@@ -27,27 +158,40 @@ class TransactionService:
             date: 交易日期
             amount: 金额
             description: 描述
-            category_name: 分类名称
-            person_name: 支出者名称（可选）
+            category_name: 分类名称，为空时按自动分类规则匹配
+            person_name: 支出者名称（可选，为空时按规则匹配）
+            allow_duplicate: 为 True 时跳过重复检查
 
         Returns:
             创建的交易对象
-        """
-        # 获取或创建分类
-        category = self._get_or_create_category(category_name)
 
+        Raises:
+            DuplicateTransactionError: 已存在日期、金额、描述和人员都相同的交易
+        """
         # 获取人员（如果提供）
-        person = None
+        person_id = None
         if person_name:
-            person = self._get_or_create_person(person_name)
+            person_id = self._get_or_create_person(person_name).id
+
+        # 未指定分类或人员时按规则匹配
+        match = None
+        if not category_name or person_id is None:
+            match = RuleService(self.db).matcher().match(description, amount, "expense")
+            if person_id is None and match:
+                person_id = match.person_id
+
+        dedupe_key = compute_dedupe_key(date, amount, description, person_id)
+        if not allow_duplicate:
+            self._check_duplicate(dedupe_key)
 
         transaction = Transaction(
             date=date,
             amount=amount,
             transaction_type="expense",
             description=description,
-            category_id=category.id,
-            person_id=person.id if person else None,
+            category_id=self._resolve_category_id(category_name, match),
+            person_id=person_id,
+            dedupe_key=dedupe_key,
         )
 
         self.db.add(transaction)
@@ -60,80 +204,275 @@ class TransactionService:
         date: datetime,
         amount: float,
         description: str,
-        category_name: str,
+        category_name: Optional[str],
         person_name: Optional[str] = None,
+        deductions: Optional[List[Tuple[str, float]]] = None,
+        allow_duplicate: bool = False,
     ) -> Transaction:
         """
         创建收入交易
 
         Args:
             date: 交易日期
-            amount: 金额
+            amount: 金额（税前毛收入）
             description: 描述
-            category_name: 分类名称
-            person_name: 收入者名称（可选）
+            category_name: 分类名称，为空时按自动分类规则匹配
+            person_name: 收入者名称（可选，为空时按规则匹配）
+            deductions: 扣除明细列表，每项为 (项目名称, 金额)，如 ('五险一金', 1000)
+            allow_duplicate: 为 True 时跳过重复检查
 
         Returns:
             创建的交易对象
-        """
-        # 获取或创建分类
-        category = self._get_or_create_category(category_name)
 
+        Raises:
+            DuplicateTransactionError: 已存在日期、金额、描述和人员都相同的交易
+        """
         # 获取人员（如果提供）
-        person = None
+        person_id = None
         if person_name:
-            person = self._get_or_create_person(person_name)
+            person_id = self._get_or_create_person(person_name).id
+
+        # 未指定分类或人员时按规则匹配
+        match = None
+        if not category_name or person_id is None:
+            match = RuleService(self.db).matcher().match(description, amount, "income")
+            if person_id is None and match:
+                person_id = match.person_id
+
+        dedupe_key = compute_dedupe_key(date, amount, description, person_id)
+        if not allow_duplicate:
+            self._check_duplicate(dedupe_key)
 
         transaction = Transaction(
             date=date,
             amount=amount,
             transaction_type="income",
             description=description,
-            category_id=category.id,
-            person_id=person.id if person else None,
+            category_id=self._resolve_category_id(category_name, match),
+            person_id=person_id,
+            dedupe_key=dedupe_key,
         )
 
         self.db.add(transaction)
+        if deductions:
+            self.db.flush()
+            self._insert_income_details(
+                (transaction.id, item_name, item_amount)
+                for item_name, item_amount in deductions
+            )
         self.db.commit()
         self.db.refresh(transaction)
         return transaction
 
+    def add_income_details(self, details: Iterable[Tuple[int, str, float]]) -> int:
+        """
+        批量写入收入扣除明细（一次 executemany，不加载交易对象）
+
+        Args:
+            details: 明细列表，每项为 (交易ID, 项目名称, 金额)
+
+        Returns:
+            写入的明细条数
+        """
+        count = self._insert_income_details(details)
+        self.db.commit()
+        return count
+
+    def import_payslips(
+        self, payslips: Iterable[Dict[str, Any]], skip_duplicates: bool = True
+    ) -> int:
+        """
+        批量导入工资单：收入交易和扣除明细各一次批量插入
+
+        Args:
+            payslips: 工资单列表，每项包含 date、amount、description，
+                可选 category_name、person_name（缺省时按规则匹配）
+                和 deductions [(项目名称, 金额)]
+            skip_duplicates: 是否跳过与已有交易（或本批前面的工资单）重复的工资单
+
+        Returns:
+            导入的收入交易条数
+        """
+        payslips = [dict(payslip, transaction_type="income") for payslip in payslips]
+        rows = self._build_rows(payslips)
+        if skip_duplicates:
+            kept = self._unique_row_indexes(rows)
+            payslips = [payslips[index] for index in kept]
+            rows = [rows[index] for index in kept]
+        if not rows:
+            return 0
+
+        transaction_ids = self.db.scalars(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+
+        self._insert_income_details(
+            (transaction_id, item_name, item_amount)
+            for transaction_id, payslip in zip(transaction_ids, payslips)
+            for item_name, item_amount in payslip.get("deductions") or []
+        )
+        self.db.commit()
+        return len(transaction_ids)
+
+    def bulk_create_transactions(
+        self, transactions: Iterable[Dict[str, Any]], skip_duplicates: bool = True
+    ) -> int:
+        """
+        批量创建交易（一次 executemany），用于导入
+
+        Args:
+            transactions: 交易列表，每项包含 date、amount、transaction_type、
+                description，可选 category_name 和 person_name（缺省时按规则匹配）
+            skip_duplicates: 是否跳过与已有交易（或本批前面的交易）重复的记录
+
+        Returns:
+            实际写入的交易条数
+        """
+        rows = self._build_rows(list(transactions))
+        if skip_duplicates:
+            rows = [rows[index] for index in self._unique_row_indexes(rows)]
+        if rows:
+            self.db.execute(insert(Transaction), rows)
+        self.db.commit()
+        return len(rows)
+
     def get_transactions(
         self,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         transaction_type: Optional[str] = None,
         category_name: Optional[str] = None,
+        filter_spec: Optional[TransactionFilter] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
     ) -> List[Transaction]:
         """
-        查询交易记录
+        查询交易记录，所有条件编译为一条 SQL
 
         Args:
             start_date: 开始日期
             end_date: 结束日期
             transaction_type: 交易类型 ('income' 或 'expense')
             category_name: 分类名称
+            filter_spec: 组合过滤条件，与以上参数同时给出时以上参数优先
+            limit: 最多返回的条数（默认不限）
+            offset: 跳过的条数
 
         Returns:
-            交易列表
+            交易列表，日期范围涉及已归档年份时包含归档交易（只读）；
+            不限日期时只查询当前表
         """
-        query = self.db.query(Transaction)
+        filter_spec = (filter_spec or TransactionFilter()).merged(
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            category_names=(category_name,) if category_name else None,
+        )
+        query, _ = self._filtered_query(filter_spec)
+        return query.limit(limit).offset(offset).all()
 
-        if start_date:
-            query = query.filter(Transaction.date >= start_date)
-        if end_date:
-            query = query.filter(Transaction.date <= end_date)
-        if transaction_type:
-            query = query.filter(Transaction.transaction_type == transaction_type)
-        if category_name:
-            # 查找分类
-            category = (
-                self.db.query(Category).filter(Category.name == category_name).first()
+    def list_transactions(
+        self,
+        filter_spec: Optional[TransactionFilter] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[TransactionRow]:
+        """
+        查询交易的只读数据（列投影，不构造 ORM 对象），条件和顺序同 get_transactions
+
+        Args:
+            filter_spec: 组合过滤条件
+            limit: 最多返回的条数（默认不限）
+            offset: 跳过的条数
+
+        Returns:
+            TransactionRow 列表
+        """
+        query, source = self._filtered_query(filter_spec or TransactionFilter())
+        query = project_transaction_rows(query, source)
+        return [TransactionRow._make(row) for row in query.limit(limit).offset(offset)]
+
+    def _filtered_query(self, filter_spec: TransactionFilter):
+        """按过滤条件查询交易的 Query（按日期倒序）及其使用的交易实体"""
+        source = transaction_source(
+            self.db, filter_spec.start_date, filter_spec.end_date
+        )
+        query = self.db.query(source).filter(
+            *adapt(source, filter_spec.clauses_for(self.db))
+        )
+        return query.order_by(source.date.desc(), source.id.desc()), source
+
+    def search(
+        self,
+        query: str,
+        filters: Optional[TransactionFilter] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[Transaction]:
+        """
+        全文搜索交易（描述、分类名、人员名），按相关度排序
+
+        Args:
+            query: 搜索词，多个词以空格分隔，需全部命中
+            filters: 附加的组合过滤条件
+            limit: 每页条数
+            offset: 跳过的条数
+
+        Returns:
+            当前页的交易列表
+        """
+        return self._search_query(query, filters).limit(limit).offset(offset).all()
+
+    def search_rows(
+        self,
+        query: str,
+        filters: Optional[TransactionFilter] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[TransactionRow]:
+        """全文搜索交易的只读数据，参数和顺序同 search"""
+        results = project_transaction_rows(self._search_query(query, filters))
+        return [
+            TransactionRow._make(row) for row in results.limit(limit).offset(offset)
+        ]
+
+    def _search_query(self, query: str, filters: Optional[TransactionFilter]):
+        """全文搜索的 Query（按相关度排序），search 和 search_rows 共用"""
+        terms = query.split()
+        # 索引不是 trigram 分词时 MATCH 不能匹配子串，全部检索词走 LIKE
+        substring = substring_match_available(self.db)
+        match_length = MIN_MATCH_TERM_LENGTH if substring else float("inf")
+        match_terms = [t for t in terms if len(t) >= match_length]
+        short_terms = [t for t in terms if len(t) < match_length]
+
+        results = self.db.query(Transaction).join(
+            transactions_fts, transactions_fts.c.rowid == Transaction.id
+        )
+        if match_terms:
+            results = results.filter(fts_match(match_terms))
+        for term in short_terms:
+            pattern = f"%{term}%"
+            results = results.filter(
+                or_(
+                    transactions_fts.c.description.like(pattern),
+                    transactions_fts.c.category_name.like(pattern),
+                    transactions_fts.c.person_name.like(pattern),
+                )
             )
-            if category:
-                query = query.filter(Transaction.category_id == category.id)
 
-        return query.order_by(Transaction.date.desc()).all()
+        if filters:
+            results = filters.apply(results, substring)
+
+        if match_terms:
+            results = results.order_by(
+                literal_column(f"{transactions_fts.name}.rank"),
+                Transaction.date.desc(),
+            )
+        else:
+            results = results.order_by(Transaction.date.desc())
+
+        return results
 
     def update_transaction(
         self, transaction_id: int, **kwargs
@@ -164,6 +503,12 @@ class TransactionService:
             elif hasattr(transaction, key):
                 setattr(transaction, key, value)
 
+        transaction.dedupe_key = compute_dedupe_key(
+            transaction.date,
+            transaction.amount,
+            transaction.description,
+            transaction.person_id,
+        )
         transaction.updated_at = datetime.now()
         self.db.commit()
         self.db.refresh(transaction)
@@ -189,6 +534,195 @@ class TransactionService:
         self.db.commit()
         return True
 
+    def count_transactions(self, filter_spec: TransactionFilter) -> int:
+        """当前交易表中符合条件的交易数（即批量操作的作用范围，不含已归档年份）"""
+        return self.db.scalar(
+            select(func.count())
+            .select_from(Transaction)
+            .where(*filter_spec.clauses_for(self.db))
+        )
+
+    def bulk_delete(self, filter_spec: TransactionFilter) -> int:
+        """
+        按过滤条件批量删除交易
+
+        收入明细和交易各用一条 DELETE 删除，不加载 ORM 对象。全文索引、
+        预算计数器和结账状态由交易表的触发器逐行维护。只作用于当前交易表，
+        已归档年份的交易不受影响。
+
+        Args:
+            filter_spec: 过滤条件，不能为空（防止误删全部交易）
+
+        Returns:
+            删除的交易数
+
+        Raises:
+            ValueError: 过滤条件为空
+        """
+        conditions = filter_spec.clauses_for(self.db)
+        if not conditions:
+            raise ValueError("批量删除至少需要一个过滤条件")
+
+        # 没有外键级联，先删除明细（明细的结账触发器需要查到所属交易的日期）
+        self.db.execute(
+            delete(IncomeDetail).where(
+                IncomeDetail.transaction_id.in_(
+                    select(Transaction.id).where(*conditions)
+                )
+            )
+        )
+        result = self.db.execute(delete(Transaction).where(*conditions))
+        self.db.commit()
+        return result.rowcount
+
+    def bulk_reassign_category(
+        self,
+        from_category: str,
+        to_category: str,
+        filter_spec: Optional[TransactionFilter] = None,
+    ) -> int:
+        """
+        把一个分类下的交易批量改为另一个分类（一条 UPDATE）
+
+        预算计数器、全文索引和结账状态由触发器维护；去重键不包含分类，不需要重算。
+        只作用于当前交易表。
+
+        Args:
+            from_category: 原分类名称（只匹配该分类本身，不含子分类）
+            to_category: 新分类名称（不存在时创建）
+            filter_spec: 进一步限定交易的过滤条件（默认该分类下的全部交易）
+
+        Returns:
+            修改的交易数
+
+        Raises:
+            ValueError: 原分类不存在
+        """
+        source_id = self.db.scalar(
+            select(Category.id).where(Category.name == from_category)
+        )
+        if source_id is None:
+            raise ValueError(f"分类不存在: {from_category}")
+        target_id = self._get_or_create_category(to_category).id
+        if target_id == source_id:
+            return 0
+
+        conditions = filter_spec.clauses_for(self.db) if filter_spec else []
+        result = self.db.execute(
+            update(Transaction)
+            .where(Transaction.category_id == source_id, *conditions)
+            .values(category_id=target_id, updated_at=datetime.now())
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def _check_duplicate(self, dedupe_key: str) -> None:
+        """按去重键索引查找已有交易，存在时抛出 DuplicateTransactionError"""
+        existing_id = self.db.scalar(
+            select(Transaction.id).where(Transaction.dedupe_key == dedupe_key).limit(1)
+        )
+        if existing_id is not None:
+            raise DuplicateTransactionError(existing_id)
+
+    def _build_rows(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        把批量导入的条目转换为交易行
+
+        分类和人员按名称只解析一次；缺少分类或人员的条目用同一个编译好的
+        规则匹配器补全。
+        """
+        category_ids: Dict[Optional[str], int] = {}
+        person_ids: Dict[str, int] = {}
+        matcher = RuleService(self.db).matcher()
+        now = datetime.now()
+        rows = []
+        for item in items:
+            category_name = item.get("category_name")
+            person_name = item.get("person_name")
+            if person_name and person_name not in person_ids:
+                person_ids[person_name] = self._get_or_create_person(person_name).id
+            person_id = person_ids.get(person_name) if person_name else None
+
+            category_id = None
+            if not category_name or person_id is None:
+                match = matcher.match(
+                    item["description"], item["amount"], item["transaction_type"]
+                )
+                if match:
+                    category_id = None if category_name else match.category_id
+                    person_id = person_id or match.person_id
+            if category_id is None:
+                if category_name not in category_ids:
+                    category_ids[category_name] = self._resolve_category_id(
+                        category_name
+                    )
+                category_id = category_ids[category_name]
+
+            rows.append(
+                {
+                    "date": item["date"],
+                    "amount": item["amount"],
+                    "transaction_type": item["transaction_type"],
+                    "description": item["description"],
+                    "category_id": category_id,
+                    "person_id": person_id,
+                    "dedupe_key": compute_dedupe_key(
+                        item["date"], item["amount"], item["description"], person_id
+                    ),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+        return rows
+
+    def _resolve_category_id(
+        self, category_name: Optional[str], match: Optional[RuleMatch] = None
+    ) -> int:
+        """指定分类优先，其次是规则匹配的分类，都没有时归入未分类"""
+        if category_name:
+            return self._get_or_create_category(category_name).id
+        if match and match.category_id:
+            return match.category_id
+        return self._get_or_create_category(UNCATEGORIZED_CATEGORY).id
+
+    def _unique_row_indexes(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """返回去重键既不在库中、也未在本批前面出现过的行下标"""
+        keys = list({row["dedupe_key"] for row in rows})
+        seen = set()
+        for start in range(0, len(keys), DEDUPE_LOOKUP_CHUNK):
+            seen.update(
+                self.db.scalars(
+                    select(Transaction.dedupe_key).where(
+                        Transaction.dedupe_key.in_(
+                            keys[start : start + DEDUPE_LOOKUP_CHUNK]
+                        )
+                    )
+                )
+            )
+
+        kept = []
+        for index, row in enumerate(rows):
+            if row["dedupe_key"] not in seen:
+                seen.add(row["dedupe_key"])
+                kept.append(index)
+        return kept
+
+    def _insert_income_details(self, details: Iterable[Tuple[int, str, float]]) -> int:
+        """以 executemany 方式插入扣除明细（不提交）"""
+        now = datetime.now()
+        rows = [
+            {
+                "transaction_id": transaction_id,
+                "item_name": item_name,
+                "amount": amount,
+                "created_at": now,
+            }
+            for transaction_id, item_name, amount in details
+        ]
+        if rows:
+            self.db.execute(insert(IncomeDetail), rows)
+        return len(rows)
+
     def _get_or_create_category(self, category_name: str) -> Category:
         """获取或创建分类"""
         category = (
@@ -197,6 +731,8 @@ class TransactionService:
         if not category:
             category = Category(name=category_name)
             self.db.add(category)
+            self.db.flush()
+            _insert_category_closure(self.db, category.id)
             self.db.commit()
             self.db.refresh(category)
         return category
@@ -222,39 +758,180 @@ class CategoryService:
         """获取所有分类"""
         return self.db.query(Category).order_by(Category.name).all()
 
+    def list_categories(self) -> List[CategoryRow]:
+        """所有分类的只读数据，按名称排序"""
+        query = select(Category.id, Category.name, Category.parent_id)
+        return [
+            CategoryRow._make(row)
+            for row in self.db.execute(query.order_by(Category.name))
+        ]
+
     def create_category(
         self,
         name: str,
         description: Optional[str] = None,
         parent_id: Optional[int] = None,
     ) -> Category:
-        """创建分类"""
+        """创建分类，同时维护分类闭包表"""
         category = Category(name=name, description=description, parent_id=parent_id)
         self.db.add(category)
+        self.db.flush()
+        _insert_category_closure(self.db, category.id, parent_id)
         self.db.commit()
         self.db.refresh(category)
         return category
 
     def delete_category(self, category_id: int) -> bool:
-        """删除分类（如果没有关联交易）"""
+        """删除分类（如果没有关联交易和子分类）"""
         category = self.db.query(Category).filter(Category.id == category_id).first()
         if not category:
             return False
 
-        # 检查是否有关联交易
+        # 检查是否有子分类，避免留下悬空的 parent_id
+        child_count = (
+            self.db.query(Category).filter(Category.parent_id == category_id).count()
+        )
+        if child_count > 0:
+            return False
+
+        # 检查是否有关联交易（包括已归档的交易）
         transaction_count = (
             self.db.query(Transaction)
             .filter(Transaction.category_id == category_id)
             .count()
         )
 
-        if transaction_count > 0:
+        if transaction_count > 0 or archived_reference_exists(
+            self.db, "category_id", category_id
+        ):
             return False  # 不能删除有交易的分类
 
+        # 周期模板生成交易时需要分类
+        template_count = (
+            self.db.query(RecurringTemplate)
+            .filter(RecurringTemplate.category_id == category_id)
+            .count()
+        )
+        if template_count > 0:
+            return False
+
+        self.db.execute(
+            delete(CategoryClosure).where(
+                (CategoryClosure.ancestor_id == category_id)
+                | (CategoryClosure.descendant_id == category_id)
+            )
+        )
+        _detach_rules(self.db, CategorizationRule.category_id, category_id)
+        self.db.execute(delete(Budget).where(Budget.category_id == category_id))
+        self.db.execute(
+            delete(BudgetActual).where(BudgetActual.category_id == category_id)
+        )
         self.db.delete(category)
         self.db.commit()
         return True
 
+    def merge_category(self, source_id: int, target_id: int) -> int:
+        """
+        把一个分类合并到另一个分类，然后删除原分类
+
+        交易用一条 UPDATE 改为目标分类，全文索引、预算计数器和结账状态
+        由交易表的触发器维护；子分类改挂到目标分类下并重建闭包表；
+        自动分类规则和周期模板改为引用目标分类；目标分类没有预算时沿用原分类的预算，
+        否则保留目标分类的预算。全部修改在同一个事务中提交，语句数与交易数无关。
+
+        Args:
+            source_id: 被合并（随后删除）的分类ID
+            target_id: 保留的分类ID
+
+        Returns:
+            改为目标分类的交易数
+
+        Raises:
+            ValueError: 分类不存在、两者相同、目标是原分类的子分类，
+                或已归档的交易引用原分类（归档文件不再修改）
+        """
+        if source_id == target_id:
+            raise ValueError("不能把分类合并到自身")
+        found = set(
+            self.db.scalars(
+                select(Category.id).where(Category.id.in_((source_id, target_id)))
+            )
+        )
+        if found != {source_id, target_id}:
+            raise ValueError("分类不存在")
+        # 原分类的子分类将改挂到目标分类下，目标在原分类子树中时会形成环
+        if self.db.scalar(
+            select(func.count())
+            .select_from(CategoryClosure)
+            .where(
+                CategoryClosure.ancestor_id == source_id,
+                CategoryClosure.descendant_id == target_id,
+            )
+        ):
+            raise ValueError("不能把分类合并到它的子分类")
+        if archived_reference_exists(self.db, "category_id", source_id):
+            raise ValueError("已归档的交易使用该分类，不能合并")
+
+        result = self.db.execute(
+            update(Transaction)
+            .where(Transaction.category_id == source_id)
+            .values(category_id=target_id, updated_at=datetime.now())
+        )
+        self.db.execute(
+            update(Category)
+            .where(Category.parent_id == source_id)
+            .values(parent_id=target_id)
+        )
+        for model in (CategorizationRule, RecurringTemplate):
+            self.db.execute(
+                update(model)
+                .where(model.category_id == source_id)
+                .values(category_id=target_id)
+            )
+
+        target_has_budget = self.db.scalar(
+            select(Budget.id).where(Budget.category_id == target_id)
+        )
+        if target_has_budget is None:
+            self.db.execute(
+                update(Budget)
+                .where(Budget.category_id == source_id)
+                .values(category_id=target_id)
+            )
+        else:
+            self.db.execute(delete(Budget).where(Budget.category_id == source_id))
+        # 触发器已把原分类的计数转到目标分类，剩下的都是 0
+        self.db.execute(
+            delete(BudgetActual).where(BudgetActual.category_id == source_id)
+        )
+
+        self.db.execute(delete(Category).where(Category.id == source_id))
+        _rebuild_category_closure(self.db)
+        self.db.commit()
+        return result.rowcount
+
+    def rebuild_closure(self) -> int:
+        """
+        根据 parent_id 重建分类闭包表（用于旧数据库回填或修复）
+
+        Returns:
+            写入的闭包记录数
+        """
+        _rebuild_category_closure(self.db)
+        self.db.commit()
+        return self.db.query(func.count()).select_from(CategoryClosure).scalar()
+
+    def closure_needs_rebuild(self) -> bool:
+        """闭包表中缺少某些分类的自身记录时需要重建"""
+        category_count = self.db.query(func.count(Category.id)).scalar()
+        self_row_count = (
+            self.db.query(func.count())
+            .select_from(CategoryClosure)
+            .filter(CategoryClosure.depth == 0)
+            .scalar()
+        )
+        return category_count != self_row_count
+
 
 class PersonService:
     """人员服务类"""
@@ -266,6 +943,13 @@ class PersonService:
         """获取所有人员"""
         return self.db.query(Person).order_by(Person.name).all()
 
+    def list_persons(self) -> List[PersonRow]:
+        """所有人员的只读数据，按名称排序"""
+        query = select(Person.id, Person.name, Person.description)
+        return [
+            PersonRow._make(row) for row in self.db.execute(query.order_by(Person.name))
+        ]
+
     def create_person(
         self,
         name: str,
@@ -284,16 +968,92 @@ class PersonService:
         if not person:
             return False
 
-        # 检查是否有关联交易
+        # 检查是否有关联交易（包括已归档的交易）
         transaction_count = (
             self.db.query(Transaction)
             .filter(Transaction.person_id == person_id)
             .count()
         )
 
-        if transaction_count > 0:
+        if transaction_count > 0 or archived_reference_exists(
+            self.db, "person_id", person_id
+        ):
             return False  # 不能删除有交易的人员
 
+        _detach_rules(self.db, CategorizationRule.person_id, person_id)
+        self.db.execute(
+            update(RecurringTemplate)
+            .where(RecurringTemplate.person_id == person_id)
+            .values(person_id=None)
+        )
         self.db.delete(person)
         self.db.commit()
         return True
+
+    def merge_person(self, source_id: int, target_id: int) -> int:
+        """
+        把一个人员合并到另一个人员，然后删除原人员
+
+        交易用一条 UPDATE 改为目标人员，全文索引由触发器维护。去重键包含人员，
+        受影响交易的去重键在 SQLite 中无法计算，先一次查出这些交易，
+        改人员后用一次批量 UPDATE 写回新的去重键。自动分类规则和周期模板
+        改为引用目标人员。全部修改在同一个事务中提交，语句数与交易数无关。
+
+        Args:
+            source_id: 被合并（随后删除）的人员ID
+            target_id: 保留的人员ID
+
+        Returns:
+            改为目标人员的交易数
+
+        Raises:
+            ValueError: 人员不存在、两者相同，或已归档的交易引用原人员
+        """
+        if source_id == target_id:
+            raise ValueError("不能把人员合并到自身")
+        found = set(
+            self.db.scalars(
+                select(Person.id).where(Person.id.in_((source_id, target_id)))
+            )
+        )
+        if found != {source_id, target_id}:
+            raise ValueError("人员不存在")
+        if archived_reference_exists(self.db, "person_id", source_id):
+            raise ValueError("已归档的交易涉及该人员，不能合并")
+
+        rows = self.db.execute(
+            select(
+                Transaction.id,
+                Transaction.date,
+                Transaction.amount,
+                Transaction.description,
+            ).where(Transaction.person_id == source_id)
+        ).all()
+        result = self.db.execute(
+            update(Transaction)
+            .where(Transaction.person_id == source_id)
+            .values(person_id=target_id, updated_at=datetime.now())
+        )
+        if rows:
+            self.db.execute(
+                update(Transaction),
+                [
+                    {
+                        "id": row.id,
+                        "dedupe_key": compute_dedupe_key(
+                            row.date, row.amount, row.description, target_id
+                        ),
+                    }
+                    for row in rows
+                ],
+            )
+        for model in (CategorizationRule, RecurringTemplate):
+            self.db.execute(
+                update(model)
+                .where(model.person_id == source_id)
+                .values(person_id=target_id)
+            )
+
+        self.db.execute(delete(Person).where(Person.id == source_id))
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,297 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from family_account_book.models import CategorizationRule, Category, Person
+
+# 没有指定分类、也没有规则命中时使用的分类
+UNCATEGORIZED_CATEGORY = "未分类"
+
+# 每个匹配器缓存的描述扫描结果条数（导入数据中描述重复率很高）
+DESCRIPTION_CACHE_SIZE = 65536
+
+# 编号反向引用在合并正则中会指向别的分组，因此不允许使用
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class RuleSpec(NamedTuple):
+    """规则的不可变快照，用于编译和缓存匹配器"""
+
+    id: int
+    pattern: Optional[str]
+    is_regex: bool
+    transaction_type: Optional[str]
+    amount_min: Optional[float]
+    amount_max: Optional[float]
+    category_id: Optional[int]
+    person_id: Optional[int]
+    priority: int
+
+
+class RuleMatch(NamedTuple):
+    """规则匹配结果，分类和人员分别取命中的最高优先级规则"""
+
+    category_id: Optional[int]
+    person_id: Optional[int]
+
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """
+    把关键字列表编译成前缀树形状的正则
+
+    共享前缀只写一次，正则引擎在每个位置只需检查一个首字符分支，
+    而不是逐个尝试全部关键字。同一位置总是匹配最长的关键字。
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        is_word = "" in node
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items())
+            if char != ""
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_word:
+            return branches[0]
+        pattern = "(?:" + "|".join(branches) + ")"
+        return pattern + "?" if is_word else pattern
+
+    return build(trie)
+
+
+class RuleMatcher:
+    """
+    把全部规则编译成一个合并正则的匹配器
+
+    所有关键字合并为一个前缀树形状的分组，每条正则规则各占一个命名分组，
+    一次扫描即可得到描述命中的全部模式。同一模式下的多条规则（如按金额
+    区间区分）再按优先级逐条检查类型和金额。关键字不区分大小写。
+
+    合并正则的分支在同一位置只会命中第一个，因此它只用来找出有模式命中的位置，
+    再在该位置用逐个可选的零宽前瞻检查全部分组，从同一位置开始的关键字和
+    各条正则都会被记录。
+    """
+
+    def __init__(self, rules: Sequence[RuleSpec]):
+        rules = sorted(rules, key=lambda rule: (-rule.priority, rule.id))
+
+        # 关键字（小写）/正则 -> 规则下标列表（按优先级），无模式的规则对所有描述生效
+        self._keyword_rules: Dict[str, List[int]] = {}
+        regex_rules: Dict[str, List[int]] = {}
+        self._always: List[int] = []
+        for index, rule in enumerate(rules):
+            if not rule.pattern:
+                self._always.append(index)
+            elif rule.is_regex:
+                regex_rules.setdefault(rule.pattern, []).append(index)
+            else:
+                self._keyword_rules.setdefault(rule.pattern.lower(), []).append(index)
+
+        self._rules = rules
+        self._regex_rules: List[List[int]] = list(regex_rules.values())
+
+        alternatives = []
+        if self._keyword_rules:
+            alternatives.append(f"(?P<kw>{_trie_pattern(list(self._keyword_rules))})")
+        alternatives.extend(
+            f"(?P<g{number}>(?i:{pattern}))"
+            for number, pattern in enumerate(regex_rules)
+        )
+        self._regex = None
+        if alternatives:
+            self._regex = re.compile("|".join(alternatives))
+            self._probe = re.compile(
+                "".join(f"(?:(?={alternative}))?" for alternative in alternatives)
+            )
+        self._scan = lru_cache(maxsize=DESCRIPTION_CACHE_SIZE)(self._scan_description)
+
+    def _scan_description(self, description: str) -> Tuple[int, ...]:
+        """返回描述命中的规则下标（已排序），允许不同模式的命中相互重叠"""
+        hits = set(self._always)
+        if self._regex is None:
+            return tuple(sorted(hits))
+
+        text = description.lower()
+        position = 0
+        while True:
+            found = self._regex.search(text, position)
+            if found is None:
+                break
+            start = found.start()
+            probe = self._probe.match(text, start)
+            for name, matched in probe.groupdict().items():
+                if matched is None:
+                    continue
+                if name == "kw":
+                    # 前缀树只给出该位置最长的关键字，更短的关键字是它的前缀
+                    for end in range(start + len(matched), start, -1):
+                        hits.update(self._keyword_rules.get(text[start:end], ()))
+                else:
+                    hits.update(self._regex_rules[int(name[1:])])
+            position = start + 1
+        return tuple(sorted(hits))
+
+    def match(
+        self, description: str, amount: float, transaction_type: str
+    ) -> Optional[RuleMatch]:
+        """
+        为一条交易匹配分类和人员
+
+        Args:
+            description: 描述
+            amount: 金额
+            transaction_type: 交易类型 ('income' 或 'expense')
+
+        Returns:
+            匹配结果，没有规则命中时返回 None
+        """
+        category_id = person_id = None
+        for index in self._scan(description or ""):
+            rule = self._rules[index]
+            if rule.transaction_type and rule.transaction_type != transaction_type:
+                continue
+            if rule.amount_min is not None and amount < rule.amount_min:
+                continue
+            if rule.amount_max is not None and amount > rule.amount_max:
+                continue
+            category_id = category_id or rule.category_id
+            person_id = person_id or rule.person_id
+            if category_id and person_id:
+                break
+
+        if category_id is None and person_id is None:
+            return None
+        return RuleMatch(category_id, person_id)
+
+
+@lru_cache(maxsize=8)
+def _compile_matcher(rules: Tuple[RuleSpec, ...]) -> RuleMatcher:
+    """规则未变化时复用已编译的匹配器"""
+    return RuleMatcher(rules)
+
+
+class RuleService:
+    """自动分类规则服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_all_rules(self) -> List[CategorizationRule]:
+        """获取所有规则（按优先级）"""
+        return (
+            self.db.query(CategorizationRule)
+            .order_by(CategorizationRule.priority.desc(), CategorizationRule.id)
+            .all()
+        )
+
+    def create_rule(
+        self,
+        pattern: Optional[str],
+        category_name: Optional[str] = None,
+        person_name: Optional[str] = None,
+        is_regex: bool = False,
+        transaction_type: Optional[str] = None,
+        amount_min: Optional[float] = None,
+        amount_max: Optional[float] = None,
+        priority: int = 0,
+    ) -> CategorizationRule:
+        """
+        创建规则
+
+        Args:
+            pattern: 描述关键字或正则，为空时只按金额区间匹配
+            category_name: 命中时使用的分类名称
+            person_name: 命中时使用的人员名称
+            is_regex: pattern 是否为正则表达式（不区分大小写）
+            transaction_type: 只对该类型的交易生效
+            amount_min: 金额下限（包含）
+            amount_max: 金额上限（包含）
+            priority: 优先级，越大越优先
+
+        Returns:
+            创建的规则
+
+        Raises:
+            ValueError: 规则无效，或分类、人员不存在
+        """
+        if not category_name and not person_name:
+            raise ValueError("规则至少需要指定分类或人员")
+        if not pattern and amount_min is None and amount_max is None:
+            raise ValueError("规则至少需要关键字或金额区间")
+        if pattern and is_regex:
+            if _BACKREFERENCE.search(pattern):
+                raise ValueError("规则正则不支持反向引用")
+            try:
+                # 与合并正则中的写法一致，全局标志等不能嵌入的写法在这里报错
+                re.compile(f"(?i:{pattern})")
+            except re.error as e:
+                raise ValueError(f"正则表达式无效: {e}") from e
+
+        category_id = person_id = None
+        if category_name:
+            category_id = self.db.scalar(
+                select(Category.id).where(Category.name == category_name)
+            )
+            if category_id is None:
+                raise ValueError(f"分类不存在: {category_name}")
+        if person_name:
+            person_id = self.db.scalar(
+                select(Person.id).where(Person.name == person_name)
+            )
+            if person_id is None:
+                raise ValueError(f"人员不存在: {person_name}")
+
+        rule = CategorizationRule(
+            pattern=pattern or None,
+            is_regex=is_regex,
+            transaction_type=transaction_type,
+            amount_min=amount_min,
+            amount_max=amount_max,
+            category_id=category_id,
+            person_id=person_id,
+            priority=priority,
+        )
+        self.db.add(rule)
+        self.db.commit()
+        self.db.refresh(rule)
+        return rule
+
+    def delete_rule(self, rule_id: int) -> bool:
+        """删除规则"""
+        rule = self.db.get(CategorizationRule, rule_id)
+        if not rule:
+            return False
+        self.db.delete(rule)
+        self.db.commit()
+        return True
+
+    def matcher(self) -> RuleMatcher:
+        """
+        获取当前规则的匹配器
+
+        只读取规则列（一条小查询），规则不变时直接复用已编译的匹配器。
+        """
+        rows = self.db.execute(
+            select(
+                CategorizationRule.id,
+                CategorizationRule.pattern,
+                CategorizationRule.is_regex,
+                CategorizationRule.transaction_type,
+                CategorizationRule.amount_min,
+                CategorizationRule.amount_max,
+                CategorizationRule.category_id,
+                CategorizationRule.person_id,
+                CategorizationRule.priority,
+            ).order_by(CategorizationRule.id)
+        ).all()
+        return _compile_matcher(tuple(RuleSpec(*row) for row in rows))
@@ -0,0 +1,350 @@
+"""
+月度快照（结账）
+
+结账把一个已结束月份的统计冻结到 month_snapshots：按 (交易类型, 分类) 汇总金额和笔数，
+收入另按扣除项目汇总。month_closures 记录结账时间、交易笔数和汇总的校验和。
+AnalyticsService 对完整落在统计范围内的已结账月份直接读取快照，
+多年报表读取的行数与月份数成正比，与交易笔数无关。
+
+写入已结账月份的交易或收入明细时，触发器删除该月的快照和结账记录（自动重新开账），
+统计随即回到实时计算。verify_month 重新计算汇总并与校验和比较，
+用于发现绕过触发器的修改（如直接编辑数据库文件）。
+"""
+
+import hashlib
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from family_account_book.models import MonthClosure, MonthSnapshot, Transaction
+from family_account_book.services.archive import (
+    income_detail_source,
+    transaction_source,
+)
+
+DateLike = Union[date, datetime]
+
+# 快照行：(交易类型, 分类ID, 扣除项目, 金额, 笔数)，扣除项目为 None 表示交易金额
+SnapshotRow = Tuple[str, Optional[int], Optional[str], float, int]
+
+
+def month_key(year: int, month: int) -> str:
+    """月份键 'YYYY-MM'"""
+    return f"{year:04d}-{month:02d}"
+
+
+def month_range(year: int, month: int) -> Tuple[date, date]:
+    """月份的 [开始日期, 下月第一天)"""
+    if month == 12:
+        return date(year, month, 1), date(year + 1, 1, 1)
+    return date(year, month, 1), date(year, month + 1, 1)
+
+
+def _first_full_month(start: DateLike) -> str:
+    """从 start 开始的第一个完整月份"""
+    if start.day == 1 and (
+        not isinstance(start, datetime) or start.time() == datetime.min.time()
+    ):
+        return month_key(start.year, start.month)
+    return month_key(*_next_month(start.year, start.month))
+
+
+def _next_month(year: int, month: int) -> Tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def closed_months(
+    db: Session,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+) -> List[str]:
+    """
+    完整落在 [start_date, end_date) 内的已结账月份
+
+    Args:
+        db: 数据库会话
+        start_date: 开始日期（包含，不限时为 None）
+        end_date: 结束日期（不包含，不限时为 None）
+
+    Returns:
+        按时间排序的 'YYYY-MM' 列表
+    """
+    query = select(MonthClosure.month).order_by(MonthClosure.month)
+    if start_date is not None:
+        query = query.where(MonthClosure.month >= _first_full_month(start_date))
+    if end_date is not None:
+        # 月份结束于下月第一天，不晚于 end_date 即完整落在范围内
+        query = query.where(
+            MonthClosure.month < month_key(end_date.year, end_date.month)
+        )
+    return [month for (month,) in db.execute(query)]
+
+
+def snapshot_totals(
+    db: Session,
+    months: Sequence[str],
+    transaction_type: str,
+    category_id: Optional[int] = None,
+) -> Dict[Optional[int], float]:
+    """
+    已结账月份按分类合计的交易金额
+
+    Args:
+        db: 数据库会话
+        months: 已结账月份（closed_months 的结果）
+        transaction_type: 交易类型
+        category_id: 只统计该分类（默认全部）
+
+    Returns:
+        分类ID到金额的字典
+    """
+    query = (
+        select(MonthSnapshot.category_id, func.sum(MonthSnapshot.amount))
+        .where(
+            MonthSnapshot.month.in_(months),
+            MonthSnapshot.transaction_type == transaction_type,
+            MonthSnapshot.item_name.is_(None),
+        )
+        .group_by(MonthSnapshot.category_id)
+    )
+    if category_id is not None:
+        query = query.where(MonthSnapshot.category_id == category_id)
+    return {category: float(amount) for category, amount in db.execute(query)}
+
+
+def snapshot_month_totals(
+    db: Session,
+    months: Sequence[str],
+    transaction_type: str,
+    category_id: Optional[int] = None,
+) -> Dict[str, float]:
+    """已结账月份逐月的交易金额（'YYYY-MM' 到金额），参数同 snapshot_totals"""
+    query = (
+        select(MonthSnapshot.month, func.sum(MonthSnapshot.amount))
+        .where(
+            MonthSnapshot.month.in_(months),
+            MonthSnapshot.transaction_type == transaction_type,
+            MonthSnapshot.item_name.is_(None),
+        )
+        .group_by(MonthSnapshot.month)
+    )
+    if category_id is not None:
+        query = query.where(MonthSnapshot.category_id == category_id)
+    return {month: float(amount) for month, amount in db.execute(query)}
+
+
+def snapshot_income_items(
+    db: Session, months: Sequence[str]
+) -> List[Tuple[str, Optional[str], float]]:
+    """
+    已结账月份逐月的收入合计和各扣除项目合计
+
+    Returns:
+        (月份, 扣除项目, 金额) 列表，扣除项目为 None 的是税前收入
+    """
+    query = (
+        select(
+            MonthSnapshot.month,
+            MonthSnapshot.item_name,
+            func.sum(MonthSnapshot.amount),
+        )
+        .where(
+            MonthSnapshot.month.in_(months),
+            MonthSnapshot.transaction_type == "income",
+        )
+        .group_by(MonthSnapshot.month, MonthSnapshot.item_name)
+    )
+    return [(month, item, float(amount)) for month, item, amount in db.execute(query)]
+
+
+def checksum(rows: Iterable[SnapshotRow]) -> str:
+    """快照汇总的 SHA-256，与行的顺序无关"""
+    lines = sorted(
+        f"{transaction_type}|{'' if category_id is None else category_id}|"
+        f"{item_name or ''}|{amount:.6f}|{count}"
+        for transaction_type, category_id, item_name, amount, count in rows
+    )
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+class SnapshotService:
+    """月度结账服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_closures(self) -> List[MonthClosure]:
+        """已结账的月份"""
+        return self.db.query(MonthClosure).order_by(MonthClosure.month).all()
+
+    def is_closed(self, year: int, month: int) -> bool:
+        """月份是否已结账"""
+        return self._closure(year, month) is not None
+
+    def close_month(self, year: int, month: int) -> MonthClosure:
+        """
+        结账：冻结一个已结束月份的汇总
+
+        Args:
+            year: 年份
+            month: 月份，必须早于本月
+
+        Returns:
+            结账记录
+
+        Raises:
+            ValueError: 月份未结束或已结账
+        """
+        today = date.today()
+        if (year, month) >= (today.year, today.month):
+            raise ValueError(f"只能结账已经结束的月份: {month_key(year, month)}")
+        if self.is_closed(year, month):
+            raise ValueError(f"{month_key(year, month)} 已结账")
+
+        start_date, end_date = month_range(year, month)
+        # 先附加可能需要的归档文件：写事务开始后不能再 ATTACH
+        sources = (
+            transaction_source(self.db, start_date, end_date),
+            income_detail_source(self.db, start_date, end_date),
+        )
+
+        # 先写入结账记录取得写锁，汇总和快照在同一事务中完成，不会漏掉并发写入
+        closure = MonthClosure(month=month_key(year, month), row_count=0, checksum="")
+        self.db.add(closure)
+        self.db.flush()
+
+        rows = self._aggregate(*sources, start_date, end_date)
+        if rows:
+            self.db.execute(
+                insert(MonthSnapshot),
+                [
+                    {
+                        "month": closure.month,
+                        "transaction_type": transaction_type,
+                        "category_id": category_id,
+                        "item_name": item_name,
+                        "amount": amount,
+                        "count": count,
+                    }
+                    for transaction_type, category_id, item_name, amount, count in rows
+                ],
+            )
+        closure.row_count = sum(row[4] for row in rows if row[2] is None)
+        closure.checksum = checksum(rows)
+        self.db.commit()
+        return closure
+
+    def close_finished_months(self, before: Optional[date] = None) -> List[str]:
+        """
+        结账所有有交易、已结束且尚未结账的月份
+
+        只查找当前表中的月份，已归档年份的月份可以用 close_month 逐月结账。
+
+        Args:
+            before: 只结账该日期所在月份之前的月份（默认本月之前）
+
+        Returns:
+            本次结账的月份列表
+        """
+        before = before or date.today()
+        month = func.strftime("%Y-%m", Transaction.date)
+        candidates = self.db.scalars(
+            select(month)
+            .where(Transaction.date < date(before.year, before.month, 1))
+            .group_by(month)
+            .order_by(month)
+        ).all()
+        already = set(closed_months(self.db))
+
+        closed = []
+        for key in candidates:
+            if key in already:
+                continue
+            self.close_month(int(key[:4]), int(key[5:7]))
+            closed.append(key)
+        return closed
+
+    def reopen_month(self, year: int, month: int) -> bool:
+        """
+        重新开账，统计回到实时计算
+
+        Returns:
+            月份原来是否已结账
+        """
+        key = month_key(year, month)
+        self.db.execute(delete(MonthSnapshot).where(MonthSnapshot.month == key))
+        result = self.db.execute(delete(MonthClosure).where(MonthClosure.month == key))
+        self.db.commit()
+        return result.rowcount > 0
+
+    def verify_month(self, year: int, month: int) -> bool:
+        """
+        校验已结账月份：快照与校验和一致，且与重新计算的汇总一致
+
+        Raises:
+            ValueError: 月份未结账
+        """
+        closure = self._closure(year, month)
+        if closure is None:
+            raise ValueError(f"{month_key(year, month)} 未结账")
+
+        stored = self.db.execute(
+            select(
+                MonthSnapshot.transaction_type,
+                MonthSnapshot.category_id,
+                MonthSnapshot.item_name,
+                MonthSnapshot.amount,
+                MonthSnapshot.count,
+            ).where(MonthSnapshot.month == closure.month)
+        ).all()
+        start_date, end_date = month_range(year, month)
+        current = self._aggregate(
+            transaction_source(self.db, start_date, end_date),
+            income_detail_source(self.db, start_date, end_date),
+            start_date,
+            end_date,
+        )
+        return checksum(stored) == closure.checksum == checksum(current)
+
+    def _closure(self, year: int, month: int) -> Optional[MonthClosure]:
+        # 不用 Session.get：结账记录可能已被触发器删除，身份映射中的对象不可信
+        return self.db.scalars(
+            select(MonthClosure).where(MonthClosure.month == month_key(year, month))
+        ).first()
+
+    def _aggregate(
+        self, source, details, start_date: date, end_date: date
+    ) -> List[SnapshotRow]:
+        """按快照的粒度实时汇总一个月的交易和收入扣除明细"""
+        in_month = [source.date >= start_date, source.date < end_date]
+        totals = self.db.execute(
+            select(
+                source.transaction_type,
+                source.category_id,
+                func.sum(source.amount),
+                func.count(),
+            )
+            .where(*in_month)
+            .group_by(source.transaction_type, source.category_id)
+        ).all()
+        deductions = self.db.execute(
+            select(
+                source.category_id,
+                details.item_name,
+                func.sum(details.amount),
+                func.count(),
+            )
+            .select_from(source)
+            .join(details, details.transaction_id == source.id)
+            .where(source.transaction_type == "income", *in_month)
+            .group_by(source.category_id, details.item_name)
+        ).all()
+        return [
+            (transaction_type, category_id, None, float(amount), count)
+            for transaction_type, category_id, amount, count in totals
+        ] + [
+            ("income", category_id, item_name, float(amount), count)
+            for category_id, item_name, amount, count in deductions
+        ]
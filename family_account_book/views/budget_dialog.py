@@ -0,0 +1,141 @@
+from PyQt6.QtWidgets import (
+    QComboBox,
+    QDialog,
+    QDoubleSpinBox,
+    QFormLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from family_account_book.services.budget import BudgetService
+from family_account_book.views.lookup_models import bind_combo
+
+
+class BudgetDialog(QDialog):
+    """分类月度预算设置对话框"""
+
+    COLUMNS = ["ID", "分类", "每月预算", "提醒比例"]
+
+    def __init__(self, session_scope, lookups, parent=None):
+        """
+        Args:
+            session_scope: 打开短生命周期会话的回调
+            lookups: 主窗口共享的分类、人员名称模型（LookupModels）
+            parent: 父窗口
+        """
+        super().__init__(parent)
+        self.session_scope = session_scope
+        self.lookups = lookups
+
+        self.setWindowTitle("预算")
+        self.resize(600, 500)
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        """设置用户界面"""
+        layout = QVBoxLayout(self)
+
+        self.budget_table = QTableWidget()
+        self.budget_table.setColumnCount(len(self.COLUMNS))
+        self.budget_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.budget_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.budget_table.setSelectionBehavior(
+            QTableWidget.SelectionBehavior.SelectRows
+        )
+        layout.addWidget(self.budget_table)
+
+        set_group = QGroupBox("设置预算（已有预算的分类会被更新）")
+        form = QFormLayout(set_group)
+
+        self.category_combo = bind_combo(QComboBox(), self.lookups.categories())
+        form.addRow("分类:", self.category_combo)
+
+        self.amount_edit = QLineEdit()
+        form.addRow("每月预算:", self.amount_edit)
+
+        self.warn_ratio_spin = QDoubleSpinBox()
+        self.warn_ratio_spin.setRange(0.1, 1.0)
+        self.warn_ratio_spin.setSingleStep(0.05)
+        self.warn_ratio_spin.setValue(0.8)
+        form.addRow("提醒比例:", self.warn_ratio_spin)
+
+        set_button = QPushButton("保存预算")
+        set_button.clicked.connect(self.set_budget)
+        form.addRow(set_button)
+
+        layout.addWidget(set_group)
+
+        button_layout = QHBoxLayout()
+
+        delete_button = QPushButton("删除选中预算")
+        delete_button.clicked.connect(self.delete_budget)
+        button_layout.addWidget(delete_button)
+
+        button_layout.addStretch()
+
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        """重新加载预算"""
+        with self.session_scope() as db:
+            rows = [
+                [
+                    str(budget.id),
+                    budget.category.name,
+                    f"¥{budget.amount:.2f}",
+                    f"{budget.warn_ratio:.0%}",
+                ]
+                for budget in BudgetService(db).get_all_budgets()
+            ]
+
+        self.budget_table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                self.budget_table.setItem(row, column, QTableWidgetItem(value))
+        self.budget_table.resizeColumnsToContents()
+
+    def set_budget(self):
+        """保存预算"""
+        try:
+            amount = float(self.amount_edit.text().strip())
+        except ValueError:
+            QMessageBox.warning(self, "输入错误", "金额格式不正确")
+            return
+
+        try:
+            with self.session_scope() as db:
+                BudgetService(db).set_budget(
+                    self.category_combo.currentText(),
+                    amount,
+                    self.warn_ratio_spin.value(),
+                )
+        except ValueError as e:
+            QMessageBox.warning(self, "输入错误", str(e))
+            return
+
+        self.amount_edit.clear()
+        self.refresh()
+
+    def delete_budget(self):
+        """删除选中的预算"""
+        current_row = self.budget_table.currentRow()
+        if current_row < 0:
+            QMessageBox.warning(self, "选择错误", "请选择要删除的预算")
+            return
+
+        budget_id = int(self.budget_table.item(current_row, 0).text())
+        with self.session_scope() as db:
+            BudgetService(db).delete_budget(budget_id)
+        self.refresh()
@@ -0,0 +1,132 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QMessageBox,
+    QPushButton,
+    QSplitter,
+    QTableWidget,
+    QTableWidgetItem,
+    QTextEdit,
+    QVBoxLayout,
+)
+
+from family_account_book.instrumentation import QueryStats
+
+
+class DiagnosticsDialog(QDialog):
+    """SQL 诊断对话框，显示各服务方法的查询次数、耗时分布和慢查询"""
+
+    COLUMNS = [
+        "服务方法",
+        "次数",
+        "总耗时(ms)",
+        "P50(ms)",
+        "P95(ms)",
+        "P99(ms)",
+        "最大(ms)",
+    ]
+
+    def __init__(self, query_stats: QueryStats, parent=None):
+        super().__init__(parent)
+        self.query_stats = query_stats
+
+        self.setWindowTitle("SQL 诊断")
+        self.resize(900, 600)
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        """设置用户界面"""
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel(f"慢查询阈值: {self.query_stats.slow_query_ms:.0f} ms"))
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+
+        self.operation_table = QTableWidget()
+        self.operation_table.setColumnCount(len(self.COLUMNS))
+        self.operation_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.operation_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        splitter.addWidget(self.operation_table)
+
+        self.slow_query_text = QTextEdit()
+        self.slow_query_text.setReadOnly(True)
+        splitter.addWidget(self.slow_query_text)
+
+        layout.addWidget(splitter)
+
+        button_layout = QHBoxLayout()
+
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+
+        reset_button = QPushButton("清空统计")
+        reset_button.clicked.connect(self.reset)
+        button_layout.addWidget(reset_button)
+
+        dump_button = QPushButton("导出 JSON")
+        dump_button.clicked.connect(self.dump)
+        button_layout.addWidget(dump_button)
+
+        button_layout.addStretch()
+
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        """刷新统计显示"""
+        snapshot = self.query_stats.snapshot()
+
+        operations = snapshot["operations"]
+        self.operation_table.setRowCount(len(operations))
+        for row, (name, stats) in enumerate(operations.items()):
+            values = [
+                name,
+                str(stats["count"]),
+                f"{stats['total_ms']:.1f}",
+                f"{stats['p50_ms']:.2f}",
+                f"{stats['p95_ms']:.2f}",
+                f"{stats['p99_ms']:.2f}",
+                f"{stats['max_ms']:.2f}",
+            ]
+            for column, value in enumerate(values):
+                self.operation_table.setItem(row, column, QTableWidgetItem(value))
+        self.operation_table.resizeColumnsToContents()
+
+        lines = []
+        for entry in reversed(snapshot["slow_queries"]):
+            lines.append(
+                f"[{entry['timestamp']}] {entry['operation']} "
+                f"{entry['elapsed_ms']:.1f} ms"
+            )
+            lines.append(entry["statement"])
+            for step in entry["plan"] or []:
+                lines.append(f"    {step}")
+            lines.append("")
+        self.slow_query_text.setPlainText("\n".join(lines) or "暂无慢查询")
+
+    def reset(self):
+        """清空统计数据"""
+        self.query_stats.reset()
+        self.refresh()
+
+    def dump(self):
+        """导出统计数据到 JSON 文件"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出诊断数据", "sql_stats.json", "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            self.query_stats.dump(path)
+            QMessageBox.information(self, "成功", f"诊断数据已导出到 {path}")
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
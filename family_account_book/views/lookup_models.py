@@ -0,0 +1,181 @@
+"""
+分类和人员名称的共享列表模型
+
+主窗口持有一个 LookupModels，所有分类、人员下拉框（包括对话框和历史表格的人员编辑器）
+都绑定其中的模型：启动时查询一次，之后在新增或删除时逐行插入、删除，
+绑定的下拉框随模型自动更新，不再在每次刷新时清空重填。
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QStringListModel
+from PyQt6.QtWidgets import QComboBox, QStyledItemDelegate
+
+from family_account_book.services.repository import CategoryService, PersonService
+
+
+class NameListModel(QStringListModel):
+    """按名称排序的列表模型，可带固定的首行（如空白或“全部”）"""
+
+    def __init__(self, leading: Tuple[str, ...] = (), parent=None):
+        super().__init__(list(leading), parent)
+        self.leading = leading
+
+    def names(self) -> List[str]:
+        """首行之后的名称"""
+        return self.stringList()[len(self.leading) :]
+
+    def set_names(self, names: Iterable[str]) -> None:
+        """整体替换名称（重置模型）"""
+        self.setStringList(list(self.leading) + sorted(names))
+
+    def add_name(self, name: str) -> bool:
+        """
+        按顺序插入一个名称
+
+        Returns:
+            是否插入（已存在时为 False）
+        """
+        names = self.names()
+        position = bisect_left(names, name)
+        if position < len(names) and names[position] == name:
+            return False
+        row = len(self.leading) + position
+        self.insertRows(row, 1)
+        self.setData(self.index(row), name)
+        return True
+
+    def remove_name(self, name: str) -> bool:
+        """
+        删除一个名称
+
+        Returns:
+            是否删除（不存在时为 False）
+        """
+        names = self.names()
+        position = bisect_left(names, name)
+        if position == len(names) or names[position] != name:
+            return False
+        return self.removeRows(len(self.leading) + position, 1)
+
+
+def bind_combo(combo: QComboBox, model: NameListModel) -> QComboBox:
+    """
+    让下拉框使用共享模型
+
+    可编辑下拉框默认把输入的新文本插入模型，共享模型只由 LookupModels 修改，
+    因此关闭插入。
+
+    Returns:
+        传入的下拉框
+    """
+    combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+    combo.setModel(model)
+    return combo
+
+
+class NameComboDelegate(QStyledItemDelegate):
+    """用共享名称模型编辑单元格的委托，只在编辑时创建下拉框"""
+
+    def __init__(self, model: NameListModel, parent=None):
+        super().__init__(parent)
+        self.model = model
+
+    def createEditor(self, parent, option, index):
+        combo = bind_combo(QComboBox(parent), self.model)
+        combo.setEditable(True)  # 允许输入新的名称
+        return combo
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data() or "")
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText().strip())
+
+
+class LookupModels(QObject):
+    """
+    分类和人员名称的缓存
+
+    同一种名称可能需要不同的首行（如记支出时留空表示自动分类，
+    历史过滤用“全部”），每种首行对应一个模型，按需创建并一起更新。
+    """
+
+    CATEGORY = "category"
+    PERSON = "person"
+
+    def __init__(self, session_scope, parent=None):
+        """
+        Args:
+            session_scope: 打开短生命周期会话的回调
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.session_scope = session_scope
+        self._names: Dict[str, List[str]] = {self.CATEGORY: [], self.PERSON: []}
+        self._models: Dict[str, Dict[Tuple[str, ...], NameListModel]] = {
+            self.CATEGORY: {},
+            self.PERSON: {},
+        }
+
+    def categories(self, *leading: str) -> NameListModel:
+        """分类名称模型，leading 为固定的首行"""
+        return self._model(self.CATEGORY, leading)
+
+    def persons(self, *leading: str) -> NameListModel:
+        """人员名称模型，leading 为固定的首行"""
+        return self._model(self.PERSON, leading)
+
+    def reload(self) -> None:
+        """从数据库重新加载全部名称（启动时，或数据库被外部修改后）"""
+        with self.session_scope() as db:
+            self._names[self.CATEGORY] = sorted(
+                c.name for c in CategoryService(db).list_categories()
+            )
+            self._names[self.PERSON] = sorted(
+                p.name for p in PersonService(db).list_persons()
+            )
+        for kind, models in self._models.items():
+            for model in models.values():
+                model.set_names(self._names[kind])
+
+    def add_category(self, name: Optional[str]) -> None:
+        """新建（或可能新建了）分类后调用，已有的名称忽略"""
+        self._add(self.CATEGORY, name)
+
+    def remove_category(self, name: str) -> None:
+        """删除分类后调用"""
+        self._remove(self.CATEGORY, name)
+
+    def add_person(self, name: Optional[str]) -> None:
+        """新建（或可能新建了）人员后调用，已有的名称忽略"""
+        self._add(self.PERSON, name)
+
+    def remove_person(self, name: str) -> None:
+        """删除人员后调用"""
+        self._remove(self.PERSON, name)
+
+    def _model(self, kind: str, leading: Tuple[str, ...]) -> NameListModel:
+        model = self._models[kind].get(leading)
+        if model is None:
+            model = NameListModel(leading, self)
+            model.set_names(self._names[kind])
+            self._models[kind][leading] = model
+        return model
+
+    def _add(self, kind: str, name: Optional[str]) -> None:
+        names = self._names[kind]
+        position = bisect_left(names, name) if name else None
+        if position is None or (position < len(names) and names[position] == name):
+            return
+        names.insert(position, name)
+        for model in self._models[kind].values():
+            model.add_name(name)
+
+    def _remove(self, kind: str, name: str) -> None:
+        names = self._names[kind]
+        if name in names:
+            names.remove(name)
+            for model in self._models[kind].values():
+                model.remove_name(name)
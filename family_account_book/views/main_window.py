@@ -1,15 +1,19 @@
+import os
 import sys
 from datetime import datetime
 
 import matplotlib
-from PyQt6.QtCore import QDate, Qt
+from PyQt6.QtCore import QDate, QEvent, Qt, QTimer
+from PyQt6.QtGui import QAction, QColor
 from PyQt6.QtWidgets import (
     QApplication,
     QComboBox,
     QDateEdit,
+    QFileDialog,
     QFormLayout,
     QGroupBox,
     QHBoxLayout,
+    QInputDialog,
     QLabel,
     QLineEdit,
     QMainWindow,
@@ -29,13 +33,45 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-from family_account_book.database import get_db
-from family_account_book.services.analytics import AnalyticsService
+from family_account_book import maintenance
+from family_account_book.database import (
+    SessionLocal,
+    enable_query_stats,
+    query_stats,
+    session_scope,
+)
+from family_account_book.models import Transaction
+from family_account_book.services.analytics import (
+    MARGIN_KEY,
+    UNASSIGNED_NAME,
+    AnalyticsService,
+    pivot_crosstab,
+)
+from family_account_book.services.budget import (
+    STATUS_OK,
+    STATUS_OVER,
+    STATUS_WARNING,
+    BudgetService,
+)
+from family_account_book.services.dedupe import (
+    DedupeService,
+    DuplicateTransactionError,
+)
+from family_account_book.services.export import ExportService
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.read_models import TransactionRow
+from family_account_book.services.recurring import RecurringService
 from family_account_book.services.repository import (
     CategoryService,
     PersonService,
     TransactionService,
 )
+from family_account_book.views.lookup_models import (
+    LookupModels,
+    NameComboDelegate,
+    bind_combo,
+)
+from family_account_book.views.trend_chart import TrendChartWidget
 
 
 class MainWindow(QMainWindow):
@@ -51,26 +87,94 @@ class MainWindow(QMainWindow):
         "sans-serif",
     ]
 
-    def __init__(self):
+    # 历史标签页搜索结果最多显示的条数（按相关度排序）
+    HISTORY_SEARCH_LIMIT = 500
+
+    # 预算执行表的列和状态颜色
+    BUDGET_COLUMNS = ["预算分类", "预算", "已支出", "剩余", "使用率"]
+    BUDGET_STATUS_COLORS = {
+        STATUS_WARNING: QColor("darkorange"),
+        STATUS_OVER: QColor("red"),
+    }
+
+    # 疑似重复扫描结果最多显示的对数
+    NEAR_DUPLICATE_DISPLAY_LIMIT = 50
+
+    # 无键盘鼠标操作多久后在后台执行例行数据库维护
+    IDLE_MAINTENANCE_MS = 10 * 60 * 1000
+    USER_INPUT_EVENTS = (
+        QEvent.Type.KeyPress,
+        QEvent.Type.MouseButtonPress,
+        QEvent.Type.Wheel,
+    )
+
+    def __init__(self, session_factory=None):
         super().__init__()
         # 设置matplotlib中文字体
         plt.rcParams["font.sans-serif"] = self.CHINESE_FONTS
         plt.rcParams["axes.unicode_minus"] = False  # 解决负号显示问题
 
-        self.db = get_db()
-        self.transaction_service = TransactionService(self.db)
-        self.category_service = CategoryService(self.db)
-        self.person_service = PersonService(self.db)
-        self.analytics_service = AnalyticsService(self.db)
+        # 每次界面操作使用独立的短生命周期会话，避免身份映射随运行时间增长
+        self.session_factory = session_factory or SessionLocal
 
         # 存储历史记录的交易ID，用于编辑
         self.history_transaction_ids = []
+        # 用户修改过的历史记录行，保存时只更新这些行
+        self.history_edited_rows = set()
+        # 后台生成报告的线程
+        self.report_worker = None
+
+        # 所有分类、人员下拉框共用的名称模型，启动时加载一次，之后增量更新
+        self.lookups = LookupModels(self.session_scope, self)
+        self.lookups.reload()
 
         self.setWindowTitle("家庭账本应用")
         self.setGeometry(100, 100, 1200, 800)
 
         self.setup_ui()
+        self.run_recurring()
         self.load_data()
+        self.setup_idle_maintenance()
+
+    def session_scope(self):
+        """为单次界面操作打开会话"""
+        return session_scope(self.session_factory)
+
+    @property
+    def engine(self):
+        """会话工厂绑定的数据库引擎"""
+        return self.session_factory.kw["bind"]
+
+    def setup_idle_maintenance(self):
+        """用户无操作一段时间后执行一次例行维护，有操作时重新计时"""
+        from family_account_book.views.maintenance_dialog import MaintenanceWorker
+
+        self.maintenance_worker = MaintenanceWorker(
+            lambda progress: maintenance.run_idle_maintenance(self.engine), self
+        )
+        self.maintenance_worker.failed.connect(
+            lambda message: self.statusBar().showMessage(
+                f"数据库维护失败: {message}", 10000
+            )
+        )
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(self.IDLE_MAINTENANCE_MS)
+        self.idle_timer.timeout.connect(self.run_idle_maintenance)
+        self.idle_timer.start()
+        QApplication.instance().installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        """键盘鼠标操作时重新开始空闲计时"""
+        if event.type() in self.USER_INPUT_EVENTS:
+            self.idle_timer.start()
+        return super().eventFilter(watched, event)
+
+    def run_idle_maintenance(self):
+        """空闲时在后台线程更新统计信息并增量整理"""
+        if not self.maintenance_worker.isRunning():
+            self.maintenance_worker.start()
 
     def setup_ui(self):
         """设置用户界面"""
@@ -91,12 +195,235 @@ class MainWindow(QMainWindow):
         # 统计标签页
         self.setup_stats_tab()
 
+        # 趋势标签页
+        self.trend_chart = TrendChartWidget(self.session_scope, self.lookups)
+        self.tab_widget.addTab(self.trend_chart, "趋势")
+
         # 历史标签页
         self.setup_history_tab()
 
         # 人员标签页
         self.setup_person_tab()
 
+        # 菜单栏
+        self.setup_menu()
+
+    def setup_menu(self):
+        """设置菜单栏"""
+        tools_menu = self.menuBar().addMenu("工具")
+
+        diagnostics_action = QAction("SQL 诊断...", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        tools_menu.addAction(diagnostics_action)
+
+        duplicates_action = QAction("查找疑似重复...", self)
+        duplicates_action.triggered.connect(self.show_near_duplicates)
+        tools_menu.addAction(duplicates_action)
+
+        rules_action = QAction("自动分类规则...", self)
+        rules_action.triggered.connect(self.show_rules)
+        tools_menu.addAction(rules_action)
+
+        recurring_action = QAction("周期交易...", self)
+        recurring_action.triggered.connect(self.show_recurring)
+        tools_menu.addAction(recurring_action)
+
+        budget_action = QAction("预算...", self)
+        budget_action.triggered.connect(self.show_budgets)
+        tools_menu.addAction(budget_action)
+
+        merge_category_action = QAction("合并分类...", self)
+        merge_category_action.triggered.connect(self.merge_category)
+        tools_menu.addAction(merge_category_action)
+
+        report_action = QAction("生成年度报告...", self)
+        report_action.triggered.connect(self.generate_report)
+        tools_menu.addAction(report_action)
+
+        tools_menu.addSeparator()
+
+        maintenance_action = QAction("数据库维护...", self)
+        maintenance_action.triggered.connect(self.show_maintenance)
+        tools_menu.addAction(maintenance_action)
+
+    def generate_report(self):
+        """为统计标签页选中的年份生成图表报告（PDF）和月度工作簿，在后台执行"""
+        from family_account_book.services.report import ReportService
+        from family_account_book.views.maintenance_dialog import MaintenanceWorker
+
+        if self.report_worker is not None and self.report_worker.isRunning():
+            QMessageBox.information(self, "提示", "报告正在生成")
+            return
+        year = int(self.stats_year_combo.currentText())
+        output_dir = QFileDialog.getExistingDirectory(
+            self, f"选择 {year} 年报告的输出目录"
+        )
+        if not output_dir:
+            return
+
+        def work(progress):
+            with self.session_scope() as db:
+                return ReportService(db).generate(
+                    (year, 1), (year, 12), output_dir, progress=progress
+                )
+
+        self.report_worker = MaintenanceWorker(work, self)
+        self.report_worker.progress.connect(
+            lambda done, total: self.statusBar().showMessage(
+                f"正在生成报告: {done}/{total} 张图表"
+            )
+        )
+        self.report_worker.succeeded.connect(
+            lambda result: QMessageBox.information(
+                self, "成功", f"报告已生成: {result['pdf'] or output_dir}"
+            )
+        )
+        self.report_worker.failed.connect(
+            lambda message: QMessageBox.critical(
+                self, "错误", f"生成报告失败: {message}"
+            )
+        )
+        self.report_worker.finished.connect(self.statusBar().clearMessage)
+        self.statusBar().showMessage("正在生成报告...")
+        self.report_worker.start()
+
+    def show_diagnostics(self):
+        """显示 SQL 诊断对话框"""
+        from family_account_book.views.diagnostics_dialog import DiagnosticsDialog
+
+        DiagnosticsDialog(query_stats, self).exec()
+
+    def show_maintenance(self):
+        """显示数据库维护对话框"""
+        from family_account_book.views.maintenance_dialog import MaintenanceDialog
+
+        MaintenanceDialog(self.engine, self).exec()
+
+    def run_recurring(self):
+        """启动时补生成所有到期的周期交易"""
+        try:
+            with self.session_scope() as db:
+                count = RecurringService(db).run_pending()
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"生成周期交易失败: {str(e)}")
+            return
+        if count:
+            self.statusBar().showMessage(f"已补生成 {count} 条周期交易", 10000)
+
+    def show_recurring(self):
+        """显示周期交易对话框"""
+        from family_account_book.views.recurring_dialog import RecurringDialog
+
+        dialog = RecurringDialog(self.session_scope, self.lookups, self)
+        dialog.exec()
+        if dialog.generated:
+            self.load_data()
+
+    def show_budgets(self):
+        """显示预算设置对话框"""
+        from family_account_book.views.budget_dialog import BudgetDialog
+
+        BudgetDialog(self.session_scope, self.lookups, self).exec()
+        self.refresh_stats()
+
+    def show_rules(self):
+        """显示自动分类规则对话框"""
+        from family_account_book.views.rules_dialog import RulesDialog
+
+        RulesDialog(self.session_scope, self.lookups, self).exec()
+
+    def show_near_duplicates(self):
+        """扫描全账本并显示疑似重复的交易"""
+        try:
+            with self.session_scope() as db:
+                pairs = DedupeService(db).find_near_duplicates()
+                shown = pairs[: self.NEAR_DUPLICATE_DISPLAY_LIMIT]
+                ids = {transaction_id for pair in shown for transaction_id in pair[:2]}
+                transactions = {
+                    t.id: t
+                    for t in db.query(Transaction).filter(Transaction.id.in_(ids))
+                }
+
+                def describe(transaction_id):
+                    t = transactions[transaction_id]
+                    return (
+                        f"#{t.id} {t.date.strftime('%Y-%m-%d')} "
+                        f"¥{t.amount:.2f} {t.description}"
+                    )
+
+                lines = [
+                    f"{describe(first)}\n{describe(second)}  相似度 {similarity:.0%}"
+                    for first, second, similarity in shown
+                ]
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"扫描失败: {str(e)}")
+            return
+
+        if not pairs:
+            QMessageBox.information(self, "查找疑似重复", "未发现疑似重复的交易")
+            return
+
+        message = QMessageBox(self)
+        message.setWindowTitle("查找疑似重复")
+        message.setText(
+            f"发现 {len(pairs)} 对疑似重复的交易"
+            + (
+                f"（显示相似度最高的 {len(shown)} 对）"
+                if len(pairs) > len(shown)
+                else ""
+            )
+        )
+        message.setDetailedText("\n\n".join(lines))
+        message.exec()
+
+    def create_confirming_duplicates(self, create):
+        """
+        执行创建操作，遇到疑似重复时询问用户是否仍然记录
+
+        每次尝试使用独立的会话，询问期间不持有会话。
+
+        Args:
+            create: 回调 create(service, allow_duplicate)
+
+        Returns:
+            创建的交易（只读数据），用户放弃时返回 None
+        """
+        try:
+            with self.session_scope() as db:
+                return TransactionRow.from_transaction(
+                    create(TransactionService(db), False)
+                )
+        except DuplicateTransactionError as e:
+            reply = QMessageBox.question(
+                self,
+                "疑似重复",
+                f"已存在日期、金额和描述都相同的记录（ID {e.existing_id}），仍然记录吗？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return None
+            with self.session_scope() as db:
+                return TransactionRow.from_transaction(
+                    create(TransactionService(db), True)
+                )
+
+    def check_budget_alerts(self, transaction):
+        """支出记录后，提示因这笔支出越过提醒线或超出预算的分类"""
+        with self.session_scope() as db:
+            alerts = BudgetService(db).alerts_for_expense(
+                transaction.category_id, transaction.date, transaction.amount
+            )
+        if not alerts:
+            return
+
+        lines = [
+            f"{item['category']}: 本月已支出 ¥{item['actual']:.2f}，"
+            f"预算 ¥{item['budget']:.2f}（{item['ratio']:.0%}）"
+            + ("，已超出预算" if item["status"] == STATUS_OVER else "")
+            for item in alerts
+        ]
+        QMessageBox.warning(self, "预算提醒", "\n".join(lines))
+
     def setup_record_tab(self):
         """设置记录标签页"""
         record_tab = QWidget()
@@ -115,11 +442,14 @@ class MainWindow(QMainWindow):
         self.expense_amount_edit = QLineEdit()
         expense_layout.addRow("金额:", self.expense_amount_edit)
 
-        self.expense_category_combo = QComboBox()
+        self.expense_category_combo = bind_combo(
+            QComboBox(), self.lookups.categories("")  # 留空表示自动分类
+        )
         self.expense_category_combo.setEditable(True)
+        self.expense_category_combo.lineEdit().setPlaceholderText("留空按规则自动分类")
         expense_layout.addRow("分类:", self.expense_category_combo)
 
-        self.expense_person_combo = QComboBox()
+        self.expense_person_combo = bind_combo(QComboBox(), self.lookups.persons())
         self.expense_person_combo.setEditable(True)
         expense_layout.addRow("支出者:", self.expense_person_combo)
 
@@ -144,11 +474,11 @@ class MainWindow(QMainWindow):
         self.income_amount_edit = QLineEdit()
         income_layout.addRow("金额:", self.income_amount_edit)
 
-        self.income_category_combo = QComboBox()
+        self.income_category_combo = bind_combo(QComboBox(), self.lookups.categories())
         self.income_category_combo.setEditable(True)
         income_layout.addRow("分类:", self.income_category_combo)
 
-        self.income_person_combo = QComboBox()
+        self.income_person_combo = bind_combo(QComboBox(), self.lookups.persons())
         self.income_person_combo.setEditable(True)
         income_layout.addRow("收入者:", self.income_person_combo)
 
@@ -205,6 +535,16 @@ class MainWindow(QMainWindow):
         self.stats_table.setHorizontalHeaderLabels(["分类", "金额"])
         splitter.addWidget(self.stats_table)
 
+        # 人员 × 分类 交叉统计表格
+        self.person_stats_table = QTableWidget()
+        splitter.addWidget(self.person_stats_table)
+
+        # 预算执行表格
+        self.budget_table = QTableWidget()
+        self.budget_table.setColumnCount(len(self.BUDGET_COLUMNS))
+        self.budget_table.setHorizontalHeaderLabels(self.BUDGET_COLUMNS)
+        splitter.addWidget(self.budget_table)
+
         # 图表区域
         self.chart_canvas = FigureCanvas(Figure(figsize=(8, 4)))
         splitter.addWidget(self.chart_canvas)
@@ -226,15 +566,35 @@ class MainWindow(QMainWindow):
         filter_layout.addWidget(QLabel("类型:"))
         filter_layout.addWidget(self.history_type_combo)
 
-        self.history_category_combo = QComboBox()
-        self.history_category_combo.addItems(["全部"])
+        self.history_category_combo = bind_combo(
+            QComboBox(), self.lookups.categories("全部")
+        )
         filter_layout.addWidget(QLabel("分类:"))
         filter_layout.addWidget(self.history_category_combo)
 
+        self.history_amount_min_edit = QLineEdit()
+        self.history_amount_min_edit.setMaximumWidth(80)
+        self.history_amount_max_edit = QLineEdit()
+        self.history_amount_max_edit.setMaximumWidth(80)
+        filter_layout.addWidget(QLabel("金额:"))
+        filter_layout.addWidget(self.history_amount_min_edit)
+        filter_layout.addWidget(QLabel("-"))
+        filter_layout.addWidget(self.history_amount_max_edit)
+
+        self.history_search_edit = QLineEdit()
+        self.history_search_edit.setPlaceholderText("搜索描述、分类或人员")
+        self.history_search_edit.returnPressed.connect(self.filter_history)
+        filter_layout.addWidget(QLabel("搜索:"))
+        filter_layout.addWidget(self.history_search_edit)
+
         self.filter_button = QPushButton("筛选")
         self.filter_button.clicked.connect(self.filter_history)
         filter_layout.addWidget(self.filter_button)
 
+        self.export_history_button = QPushButton("导出")
+        self.export_history_button.clicked.connect(self.export_history)
+        filter_layout.addWidget(self.export_history_button)
+
         filter_layout.addStretch()
         layout.addLayout(filter_layout)
 
@@ -246,6 +606,13 @@ class MainWindow(QMainWindow):
         )
         # 使表格可编辑
         self.history_table.setEditTriggers(QTableWidget.EditTrigger.DoubleClicked)
+        self.history_table.itemChanged.connect(
+            lambda item: self.history_edited_rows.add(item.row())
+        )
+        # 人员列编辑时才创建下拉框，所有行共用人员模型（空白表示无人员）
+        self.history_table.setItemDelegateForColumn(
+            3, NameComboDelegate(self.lookups.persons(""), self.history_table)
+        )
         layout.addWidget(self.history_table)
 
         # 编辑控制按钮
@@ -258,6 +625,10 @@ class MainWindow(QMainWindow):
         self.cancel_history_button.clicked.connect(self.cancel_history_changes)
         edit_layout.addWidget(self.cancel_history_button)
 
+        self.delete_filtered_button = QPushButton("删除筛选结果")
+        self.delete_filtered_button.clicked.connect(self.delete_filtered_history)
+        edit_layout.addWidget(self.delete_filtered_button)
+
         edit_layout.addStretch()
         layout.addLayout(edit_layout)
 
@@ -299,37 +670,16 @@ class MainWindow(QMainWindow):
         self.delete_person_button.clicked.connect(self.delete_person)
         list_layout.addWidget(self.delete_person_button)
 
-        layout.addWidget(list_group)
+        self.merge_person_button = QPushButton("合并到其他人员...")
+        self.merge_person_button.clicked.connect(self.merge_person)
+        list_layout.addWidget(self.merge_person_button)
 
-    def reload_categories(self):
-        """重新加载分类列表"""
-        categories = self.category_service.get_all_categories()
-        self.expense_category_combo.clear()
-        self.income_category_combo.clear()
-        self.history_category_combo.clear()
-        self.history_category_combo.addItem("全部")
-
-        for category in categories:
-            self.expense_category_combo.addItem(category.name)
-            self.income_category_combo.addItem(category.name)
-            self.history_category_combo.addItem(category.name)
-
-    def reload_persons(self):
-        """重新加载人员列表"""
-        persons = self.person_service.get_all_persons()
-        self.expense_person_combo.clear()
-        self.income_person_combo.clear()
-
-        for person in persons:
-            self.expense_person_combo.addItem(person.name)
-            self.income_person_combo.addItem(person.name)
+        layout.addWidget(list_group)
 
     def load_data(self):
-        """加载数据"""
-        # 加载分类
-        self.reload_categories()
-        # 加载人员
-        self.reload_persons()
+        """加载数据（分类和人员名称由 self.lookups 增量维护，不在此重新加载）"""
+        # 交易可能已变化，趋势图下次绘制时重新查询
+        self.trend_chart.invalidate()
 
         # 加载历史记录
         self.filter_history()
@@ -349,15 +699,28 @@ class MainWindow(QMainWindow):
             person = self.expense_person_combo.currentText().strip()
             description = self.expense_desc_edit.toPlainText().strip()
 
-            if not amount_text or not category or not description:
-                QMessageBox.warning(self, "输入错误", "请填写所有字段")
+            # 分类留空时由自动分类规则决定
+            if not amount_text or not description:
+                QMessageBox.warning(self, "输入错误", "请填写金额和描述")
                 return
 
             amount = float(amount_text)
 
-            self.transaction_service.create_expense(
-                date, amount, description, category, person_name=person
+            transaction = self.create_confirming_duplicates(
+                lambda service, allow_duplicate: service.create_expense(
+                    date,
+                    amount,
+                    description,
+                    category,
+                    person_name=person,
+                    allow_duplicate=allow_duplicate,
+                )
             )
+            if transaction is None:
+                return
+            # 分类、人员可能是本次新建的（包括规则匹配或归入未分类的结果）
+            self.lookups.add_category(transaction.category_name)
+            self.lookups.add_person(transaction.person_name)
 
             # 清空表单
             self.expense_amount_edit.clear()
@@ -367,6 +730,7 @@ class MainWindow(QMainWindow):
             self.load_data()
 
             QMessageBox.information(self, "成功", "支出记录成功")
+            self.check_budget_alerts(transaction)
 
         except ValueError:
             QMessageBox.warning(self, "输入错误", "金额格式不正确")
@@ -388,9 +752,21 @@ class MainWindow(QMainWindow):
 
             amount = float(amount_text)
 
-            self.transaction_service.create_income(
-                date, amount, description, category, person_name=person
+            transaction = self.create_confirming_duplicates(
+                lambda service, allow_duplicate: service.create_income(
+                    date,
+                    amount,
+                    description,
+                    category,
+                    person_name=person,
+                    allow_duplicate=allow_duplicate,
+                )
             )
+            if transaction is None:
+                return
+            # 分类、人员可能是本次新建的（包括规则匹配或归入未分类的结果）
+            self.lookups.add_category(transaction.category_name)
+            self.lookups.add_person(transaction.person_name)
 
             # 清空表单
             self.income_amount_edit.clear()
@@ -414,7 +790,8 @@ class MainWindow(QMainWindow):
             month = int(self.stats_month_combo.currentText())
 
             # 获取月度统计
-            monthly_data = self.analytics_service.monthly_aggregation(year, month)
+            with self.session_scope() as db:
+                monthly_data = AnalyticsService(db).monthly_aggregation(year, month)
 
             # 更新表格
             self.stats_table.setRowCount(0)
@@ -435,12 +812,82 @@ class MainWindow(QMainWindow):
                     self.stats_table.setItem(row, 1, QTableWidgetItem(f"¥{amount:.2f}"))
                     row += 1
 
+            # 更新人员交叉统计
+            self.update_person_stats(year, month)
+
+            # 更新预算执行情况
+            self.update_budget_overview(year, month)
+
             # 更新图表
             self.update_chart(monthly_data)
 
         except Exception as e:
             QMessageBox.critical(self, "错误", f"刷新统计失败: {str(e)}")
 
+    def update_budget_overview(self, year, month):
+        """更新预算执行表（读取月度计数器）"""
+        with self.session_scope() as db:
+            overview = BudgetService(db).overview(year, month)
+
+        self.budget_table.setRowCount(len(overview))
+        for row, item in enumerate(overview):
+            values = [
+                item["category"],
+                f"¥{item['budget']:.2f}",
+                f"¥{item['actual']:.2f}",
+                f"¥{item['remaining']:.2f}",
+                f"{item['ratio']:.0%}",
+            ]
+            for column, value in enumerate(values):
+                cell = QTableWidgetItem(value)
+                if item["status"] != STATUS_OK:
+                    cell.setForeground(self.BUDGET_STATUS_COLORS[item["status"]])
+                self.budget_table.setItem(row, column, cell)
+
+    def update_person_stats(self, year, month):
+        """更新人员 × 分类交叉统计表"""
+        start_date = datetime(year, month, 1)
+        end_date = (
+            datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        )
+        with self.session_scope() as db:
+            crosstab = AnalyticsService(db).person_category_month_crosstab(
+                start_date, end_date, margins=True
+            )
+        table = pivot_crosstab(crosstab, row_axis=0, column_axis=1)
+
+        # 未指定（None）排在有名称的之后，汇总行列放在最后
+        def order(name):
+            return (name is None, name or "")
+
+        persons = sorted((name for name in table if name is not MARGIN_KEY), key=order)
+        categories = sorted(
+            {name for row in table.values() for name in row} - {MARGIN_KEY},
+            key=order,
+        )
+        if table:
+            persons.append(MARGIN_KEY)
+            categories.append(MARGIN_KEY)
+
+        def header(name):
+            if name is MARGIN_KEY:
+                return "合计"
+            return UNASSIGNED_NAME if name is None else name
+
+        self.person_stats_table.clear()
+        self.person_stats_table.setRowCount(len(persons))
+        self.person_stats_table.setColumnCount(len(categories))
+        self.person_stats_table.setVerticalHeaderLabels([header(p) for p in persons])
+        self.person_stats_table.setHorizontalHeaderLabels(
+            [header(c) for c in categories]
+        )
+        for row, person_name in enumerate(persons):
+            for column, category_name in enumerate(categories):
+                amount = table.get(person_name, {}).get(category_name, 0.0)
+                self.person_stats_table.setItem(
+                    row, column, QTableWidgetItem(f"¥{amount:.2f}")
+                )
+
     def update_chart(self, monthly_data):
         """更新图表"""
         self.chart_canvas.figure.clear()
@@ -481,31 +928,52 @@ class MainWindow(QMainWindow):
 
         self.chart_canvas.draw()
 
+    def history_filter_spec(self) -> TransactionFilter:
+        """根据历史标签页的过滤控件生成过滤条件"""
+        transaction_type = self.history_type_combo.currentText()
+        category_name = self.history_category_combo.currentText()
+        amount_min = self.history_amount_min_edit.text().strip()
+        amount_max = self.history_amount_max_edit.text().strip()
+
+        # 转换类型
+        type_filter = None
+        if transaction_type == "收入":
+            type_filter = "income"
+        elif transaction_type == "支出":
+            type_filter = "expense"
+
+        return TransactionFilter(
+            transaction_type=type_filter,
+            category_names=(category_name,) if category_name != "全部" else (),
+            amount_min=float(amount_min) if amount_min else None,
+            amount_max=float(amount_max) if amount_max else None,
+        )
+
     def filter_history(self):
         """筛选历史记录"""
         try:
-            transaction_type = self.history_type_combo.currentText()
-            category_name = self.history_category_combo.currentText()
-
-            # 转换类型
-            type_filter = None
-            if transaction_type == "收入":
-                type_filter = "income"
-            elif transaction_type == "支出":
-                type_filter = "expense"
-
-            category_filter = None
-            if category_name != "全部":
-                category_filter = category_name
-
-            # 获取交易记录
-            transactions = self.transaction_service.get_transactions(
-                transaction_type=type_filter, category_name=category_filter
-            )
+            search_text = self.history_search_edit.text().strip()
+            try:
+                filter_spec = self.history_filter_spec()
+            except ValueError:
+                QMessageBox.warning(self, "输入错误", "金额格式不正确")
+                return
 
-            # 更新表格
+            # 列投影的只读数据已带分类和人员名称，渲染不需要会话。
+            # 历史记录不限日期，只查询当前表：已归档的交易不能修改，不出现在可编辑表格中
+            with self.session_scope() as db:
+                if search_text:
+                    transactions = TransactionService(db).search_rows(
+                        search_text, filter_spec, limit=self.HISTORY_SEARCH_LIMIT
+                    )
+                else:
+                    transactions = TransactionService(db).list_transactions(filter_spec)
+
+            # 更新表格（填充时不记录为用户修改）
+            self.history_table.blockSignals(True)
             self.history_table.setRowCount(0)
             self.history_transaction_ids = []
+            self.history_edited_rows = set()
 
             for transaction in transactions:
                 row = self.history_table.rowCount()
@@ -527,24 +995,14 @@ class MainWindow(QMainWindow):
                 self.history_table.setItem(row, 1, type_item)
 
                 # 分类
-                category_text = ""
-                if transaction.category:
-                    category_text = transaction.category.name
-                self.history_table.setItem(row, 2, QTableWidgetItem(category_text))
-
-                # 人员
-                person_combo = QComboBox()
-                person_combo.setEditable(True)  # 允许编辑输入新的人员名
-                # 添加空选项
-                person_combo.addItem("")
-                # 添加所有人员选项
-                persons = self.person_service.get_all_persons()
-                for person in persons:
-                    person_combo.addItem(person.name)
-                # 设置当前值
-                if transaction.person:
-                    person_combo.setCurrentText(transaction.person.name)
-                self.history_table.setCellWidget(row, 3, person_combo)
+                self.history_table.setItem(
+                    row, 2, QTableWidgetItem(transaction.category_name or "")
+                )
+
+                # 人员（编辑时由 NameComboDelegate 提供下拉框）
+                self.history_table.setItem(
+                    row, 3, QTableWidgetItem(transaction.person_name or "")
+                )
 
                 # 金额
                 self.history_table.setItem(
@@ -558,20 +1016,46 @@ class MainWindow(QMainWindow):
 
         except Exception as e:
             QMessageBox.critical(self, "错误", f"加载历史记录失败: {str(e)}")
+        finally:
+            self.history_table.blockSignals(False)
+
+    def export_history(self):
+        """按当前过滤条件导出交易记录"""
+        try:
+            filter_spec = self.history_filter_spec()
+        except ValueError:
+            QMessageBox.warning(self, "输入错误", "金额格式不正确")
+            return
+
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self, "导出交易记录", "transactions", "CSV (*.csv);;Excel (*.xlsx)"
+        )
+        if not filename:
+            return
+
+        try:
+            file_format = "excel" if "xlsx" in selected_filter else "csv"
+            base_name = os.path.splitext(filename)[0]
+            with self.session_scope() as db:
+                output_file = ExportService(db).export_transactions(
+                    filter_spec, base_name, file_format
+                )
+            QMessageBox.information(self, "成功", f"已导出到 {output_file}")
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
 
     def save_history_changes(self):
         """保存历史记录的修改"""
         try:
             updated_count = 0
-            for row in range(self.history_table.rowCount()):
+            # 只保存修改过的行，未修改的行不写入（避免已结账月份被重新开账）
+            for row in sorted(self.history_edited_rows):
                 transaction_id = self.history_transaction_ids[row]
 
                 # 获取修改后的数据
                 date_text = self.history_table.item(row, 0).text()
                 category_text = self.history_table.item(row, 2).text().strip()
-                # 从人员下拉框获取值
-                person_combo = self.history_table.cellWidget(row, 3)
-                person_text = person_combo.currentText().strip() if person_combo else ""
+                person_text = self.history_table.item(row, 3).text().strip()
                 amount_text = self.history_table.item(row, 4).text()
                 description_text = self.history_table.item(row, 5).text()
 
@@ -593,17 +1077,20 @@ class MainWindow(QMainWindow):
                     continue
 
                 # 更新交易
-                result = self.transaction_service.update_transaction(
-                    transaction_id,
-                    date=date,
-                    amount=amount,
-                    description=description_text,
-                    category_name=category_text,
-                    person_name=person_text,
-                )
+                with self.session_scope() as db:
+                    result = TransactionService(db).update_transaction(
+                        transaction_id,
+                        date=date,
+                        amount=amount,
+                        description=description_text,
+                        category_name=category_text,
+                        person_name=person_text,
+                    )
 
                 if result:
                     updated_count += 1
+                    self.lookups.add_category(category_text)
+                    self.lookups.add_person(person_text)
                 else:
                     QMessageBox.warning(self, "保存失败", f"第{row + 1}行保存失败")
 
@@ -617,6 +1104,46 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"保存失败: {str(e)}")
 
+    def delete_filtered_history(self):
+        """按当前过滤条件批量删除交易（一条 DELETE，不逐条加载）"""
+        if self.history_search_edit.text().strip():
+            QMessageBox.warning(
+                self, "提示", "批量删除按类型、分类和金额筛选，请先清空搜索框"
+            )
+            return
+        try:
+            filter_spec = self.history_filter_spec()
+        except ValueError:
+            QMessageBox.warning(self, "输入错误", "金额格式不正确")
+            return
+        if not filter_spec.clauses():
+            QMessageBox.warning(self, "提示", "请至少设置一个筛选条件")
+            return
+
+        try:
+            with self.session_scope() as db:
+                count = TransactionService(db).count_transactions(filter_spec)
+            if count == 0:
+                QMessageBox.information(self, "提示", "没有符合条件的交易")
+                return
+            reply = QMessageBox.question(
+                self,
+                "确认删除",
+                f"将删除符合当前筛选条件的 {count} 条交易（已归档年份除外），确定吗？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No,
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+            with self.session_scope() as db:
+                deleted = TransactionService(db).bulk_delete(filter_spec)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"删除失败: {str(e)}")
+            return
+
+        self.load_data()
+        QMessageBox.information(self, "成功", f"已删除 {deleted} 条交易")
+
     def cancel_history_changes(self):
         """取消历史记录的修改，重新加载数据"""
         self.filter_history()
@@ -631,7 +1158,9 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "输入错误", "请输入人员姓名")
                 return
 
-            self.person_service.create_person(name, description)
+            with self.session_scope() as db:
+                PersonService(db).create_person(name, description)
+            self.lookups.add_person(name)
 
             # 清空表单
             self.person_name_edit.clear()
@@ -654,6 +1183,7 @@ class MainWindow(QMainWindow):
                 return
 
             person_id = int(self.person_table.item(current_row, 0).text())
+            person_name = self.person_table.item(current_row, 1).text()
 
             # 确认删除
             reply = QMessageBox.question(
@@ -665,7 +1195,10 @@ class MainWindow(QMainWindow):
             )
 
             if reply == QMessageBox.StandardButton.Yes:
-                self.person_service.delete_person(person_id)
+                with self.session_scope() as db:
+                    deleted = PersonService(db).delete_person(person_id)
+                if deleted:
+                    self.lookups.remove_person(person_name)
 
                 # 刷新数据
                 self.load_data()
@@ -675,10 +1208,101 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"删除人员失败: {str(e)}")
 
+    def merge_person(self):
+        """把选中人员合并到另一个人员，交易、规则和模板改为引用目标人员"""
+        current_row = self.person_table.currentRow()
+        if current_row < 0:
+            QMessageBox.warning(self, "选择错误", "请先选择要合并的人员")
+            return
+        source_id = int(self.person_table.item(current_row, 0).text())
+        source = self.person_table.item(current_row, 1).text()
+        ids = {
+            self.person_table.item(row, 1).text(): int(
+                self.person_table.item(row, 0).text()
+            )
+            for row in range(self.person_table.rowCount())
+        }
+        candidates = [name for name in sorted(ids) if name != source]
+        if not candidates:
+            QMessageBox.warning(self, "选择错误", "没有可以合并到的其他人员")
+            return
+        target, ok = QInputDialog.getItem(
+            self, "合并人员", f"把 {source} 合并到:", candidates, 0, False
+        )
+        if not ok:
+            return
+
+        reply = QMessageBox.question(
+            self,
+            "确认合并",
+            f"{source} 的交易、规则和周期模板将改为 {target}，"
+            f"随后删除 {source}，确定吗？",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No,
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            with self.session_scope() as db:
+                count = PersonService(db).merge_person(source_id, ids[target])
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"合并人员失败: {str(e)}")
+            return
+
+        self.lookups.remove_person(source)
+        self.load_data()
+        QMessageBox.information(
+            self, "成功", f"已将 {source} 合并到 {target}（{count} 条交易）"
+        )
+
+    def merge_category(self):
+        """把一个分类合并到另一个分类，子分类、预算、规则和模板随之转移"""
+        names = self.lookups.categories().names()
+        if len(names) < 2:
+            QMessageBox.warning(self, "选择错误", "至少需要两个分类才能合并")
+            return
+        source, ok = QInputDialog.getItem(
+            self, "合并分类", "被合并（随后删除）的分类:", names, 0, False
+        )
+        if not ok:
+            return
+        candidates = [name for name in names if name != source]
+        target, ok = QInputDialog.getItem(
+            self, "合并分类", f"把 {source} 合并到:", candidates, 0, False
+        )
+        if not ok:
+            return
+
+        reply = QMessageBox.question(
+            self,
+            "确认合并",
+            f"{source} 的交易、子分类、规则和周期模板将改为 {target}，"
+            f"随后删除 {source}，确定吗？",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No,
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            with self.session_scope() as db:
+                service = CategoryService(db)
+                ids = {row.name: row.id for row in service.list_categories()}
+                count = service.merge_category(ids[source], ids[target])
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"合并分类失败: {str(e)}")
+            return
+
+        self.lookups.remove_category(source)
+        self.load_data()
+        QMessageBox.information(
+            self, "成功", f"已将 {source} 合并到 {target}（{count} 条交易）"
+        )
+
     def load_persons(self):
         """加载人员列表"""
         try:
-            persons = self.person_service.get_all_persons()
+            with self.session_scope() as db:
+                persons = PersonService(db).list_persons()
 
             self.person_table.setRowCount(0)
 
@@ -700,6 +1324,9 @@ def main():
     """主函数"""
     app = QApplication(sys.argv)
 
+    # 启用 SQL 查询统计，供诊断对话框使用
+    enable_query_stats()
+
     # 设置样式
     app.setStyle("Fusion")
 
@@ -0,0 +1,242 @@
+import os
+from datetime import datetime
+
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import (
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QInputDialog,
+    QLabel,
+    QMessageBox,
+    QProgressBar,
+    QPushButton,
+    QTextEdit,
+    QVBoxLayout,
+)
+from sqlalchemy.orm import sessionmaker
+
+from family_account_book import maintenance
+from family_account_book.database import session_scope
+from family_account_book.services.archive import ArchiveService
+
+
+class MaintenanceWorker(QThread):
+    """在后台线程执行维护操作，结果通过信号交回界面线程"""
+
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, work, parent=None):
+        """
+        Args:
+            work: 接收进度回调 progress(已完成, 总数) 的函数，返回值随 succeeded 发出
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.work = work
+
+    def run(self):
+        try:
+            result = self.work(self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(result)
+
+
+class MaintenanceDialog(QDialog):
+    """数据库维护对话框：统计、完整性检查、优化、在线备份和按年归档"""
+
+    def __init__(self, bind, parent=None):
+        """
+        Args:
+            bind: 数据库引擎
+            parent: 父窗口
+        """
+        super().__init__(parent)
+        self.bind = bind
+        self.worker = None
+
+        self.setWindowTitle("数据库维护")
+        self.resize(600, 450)
+
+        self.setup_ui()
+        self.refresh_stats()
+
+    def setup_ui(self):
+        """设置用户界面"""
+        layout = QVBoxLayout(self)
+
+        self.stats_label = QLabel()
+        layout.addWidget(self.stats_label)
+
+        self.report_text = QTextEdit()
+        self.report_text.setReadOnly(True)
+        layout.addWidget(self.report_text)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        button_layout = QHBoxLayout()
+
+        self.check_button = QPushButton("完整性检查")
+        self.check_button.clicked.connect(self.run_integrity_check)
+        button_layout.addWidget(self.check_button)
+
+        self.optimize_button = QPushButton("优化")
+        self.optimize_button.clicked.connect(self.run_optimize)
+        button_layout.addWidget(self.optimize_button)
+
+        self.backup_button = QPushButton("备份...")
+        self.backup_button.clicked.connect(self.run_backup)
+        button_layout.addWidget(self.backup_button)
+
+        self.archive_button = QPushButton("归档旧年份...")
+        self.archive_button.clicked.connect(self.run_archive)
+        button_layout.addWidget(self.archive_button)
+
+        button_layout.addStretch()
+
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+
+    def refresh_stats(self):
+        """显示数据库文件统计"""
+        stats = maintenance.database_stats(self.bind)
+        self.stats_label.setText(
+            f"大小 {stats['size_bytes'] / 1024:.0f} KB，"
+            f"空闲页 {stats['freelist_count']}/{stats['page_count']} "
+            f"({stats['free_ratio']:.1%})，自动整理: {stats['auto_vacuum']}"
+        )
+
+    def start(self, work, on_success):
+        """在后台线程执行 work，期间禁用按钮"""
+        if self.worker is not None and self.worker.isRunning():
+            return
+        for button in self.action_buttons():
+            button.setEnabled(False)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+
+        self.worker = MaintenanceWorker(work, self)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.succeeded.connect(on_success)
+        self.worker.failed.connect(
+            lambda message: QMessageBox.critical(self, "错误", message)
+        )
+        self.worker.finished.connect(self.finish)
+        self.worker.start()
+
+    def action_buttons(self):
+        """后台操作期间需要禁用的按钮"""
+        return (
+            self.check_button,
+            self.optimize_button,
+            self.backup_button,
+            self.archive_button,
+        )
+
+    def update_progress(self, done, total):
+        """更新进度条"""
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def finish(self):
+        """后台操作结束"""
+        for button in self.action_buttons():
+            button.setEnabled(True)
+        self.progress_bar.hide()
+        self.refresh_stats()
+
+    def run_integrity_check(self):
+        """执行完整性检查并显示报告"""
+
+        def show(report):
+            lines = ["完整性检查通过" if report["ok"] else "完整性检查发现问题"]
+            lines += [f"integrity_check: {error}" for error in report["errors"]]
+            lines += [
+                f"外键错误: {table} 行 {rowid} 引用的 {parent} 不存在"
+                for table, rowid, parent in report["foreign_key_errors"]
+            ]
+            if not report["search_index_ok"]:
+                lines.append("全文索引与交易表不一致")
+            self.report_text.setPlainText("\n".join(lines))
+
+        self.start(lambda progress: maintenance.integrity_check(self.bind), show)
+
+    def run_optimize(self):
+        """更新统计信息并增量整理"""
+
+        def show(result):
+            self.report_text.setPlainText(
+                f"统计信息已更新，归还 {result['freed_pages']} 个空闲页"
+            )
+
+        self.start(lambda progress: maintenance.run_idle_maintenance(self.bind), show)
+
+    def run_backup(self):
+        """在线备份到用户选择的文件"""
+        default_name = f"家庭账本备份_{datetime.now():%Y%m%d_%H%M%S}.db"
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            "备份数据库",
+            os.path.join(os.path.expanduser("~/Documents"), default_name),
+            "SQLite 数据库 (*.db)",
+        )
+        if not filename:
+            return
+
+        self.start(
+            lambda progress: maintenance.backup(self.bind, filename, progress=progress),
+            lambda path: self.report_text.setPlainText(f"已备份到: {path}"),
+        )
+
+    def run_archive(self):
+        """选择一个已结束的年份，把其交易移到归档文件"""
+        session_factory = sessionmaker(bind=self.bind)
+        with session_scope(session_factory) as db:
+            years = [str(year) for year in ArchiveService(db).archivable_years()]
+        if not years:
+            QMessageBox.information(self, "归档", "没有可归档的年份")
+            return
+
+        year, ok = QInputDialog.getItem(
+            self,
+            "归档旧年份",
+            "归档后该年交易移到单独的文件，统计和导出仍包含这些交易，但不能再修改。\n"
+            "选择年份:",
+            years,
+            0,
+            False,
+        )
+        if not ok:
+            return
+
+        def work(progress):
+            with session_scope(session_factory) as db:
+                return ArchiveService(db).archive_year(int(year))
+
+        self.start(
+            work,
+            lambda count: self.report_text.setPlainText(
+                f"已归档 {year} 年的 {count} 条交易"
+            ),
+        )
+
+    def reject(self):
+        """后台操作进行中时不关闭"""
+        if self.worker is not None and self.worker.isRunning():
+            return
+        super().reject()
+
+    def accept(self):
+        """后台操作进行中时不关闭"""
+        if self.worker is not None and self.worker.isRunning():
+            return
+        super().accept()
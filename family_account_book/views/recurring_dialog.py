@@ -0,0 +1,218 @@
+from PyQt6.QtCore import QDate
+from PyQt6.QtWidgets import (
+    QComboBox,
+    QDateEdit,
+    QDialog,
+    QFormLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from family_account_book.services.recurring import RecurringService
+from family_account_book.views.lookup_models import bind_combo
+
+
+class RecurringDialog(QDialog):
+    """周期交易模板管理对话框"""
+
+    COLUMNS = [
+        "ID",
+        "名称",
+        "类型",
+        "金额",
+        "周期",
+        "开始日期",
+        "分类",
+        "人员",
+        "已生成到",
+    ]
+    TYPE_LABELS = {"expense": "支出", "income": "收入"}
+    FREQUENCY_LABELS = {"monthly": "月", "weekly": "周", "yearly": "年"}
+
+    def __init__(self, session_scope, lookups, parent=None):
+        """
+        Args:
+            session_scope: 打开短生命周期会话的回调
+            lookups: 主窗口共享的分类、人员名称模型（LookupModels）
+            parent: 父窗口
+        """
+        super().__init__(parent)
+        self.session_scope = session_scope
+        self.lookups = lookups
+        # 本对话框中生成的交易条数，供主窗口决定是否刷新
+        self.generated = 0
+
+        self.setWindowTitle("周期交易")
+        self.resize(900, 600)
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        """设置用户界面"""
+        layout = QVBoxLayout(self)
+
+        self.template_table = QTableWidget()
+        self.template_table.setColumnCount(len(self.COLUMNS))
+        self.template_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.template_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.template_table.setSelectionBehavior(
+            QTableWidget.SelectionBehavior.SelectRows
+        )
+        layout.addWidget(self.template_table)
+
+        add_group = QGroupBox("添加周期交易")
+        form = QFormLayout(add_group)
+
+        self.name_edit = QLineEdit()
+        form.addRow("名称:", self.name_edit)
+
+        self.type_combo = QComboBox()
+        for value, label in self.TYPE_LABELS.items():
+            self.type_combo.addItem(label, value)
+        form.addRow("类型:", self.type_combo)
+
+        self.amount_edit = QLineEdit()
+        form.addRow("金额:", self.amount_edit)
+
+        self.description_edit = QLineEdit()
+        form.addRow("描述:", self.description_edit)
+
+        self.category_combo = bind_combo(QComboBox(), self.lookups.categories())
+        self.category_combo.setEditable(True)
+        form.addRow("分类:", self.category_combo)
+
+        self.person_combo = bind_combo(QComboBox(), self.lookups.persons(""))
+        self.person_combo.setEditable(True)
+        form.addRow("人员:", self.person_combo)
+
+        frequency_layout = QHBoxLayout()
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 12)
+        self.interval_spin.setPrefix("每 ")
+        frequency_layout.addWidget(self.interval_spin)
+        self.frequency_combo = QComboBox()
+        for value, label in self.FREQUENCY_LABELS.items():
+            self.frequency_combo.addItem(label, value)
+        frequency_layout.addWidget(self.frequency_combo)
+        form.addRow("周期:", frequency_layout)
+
+        self.start_date_edit = QDateEdit()
+        self.start_date_edit.setDate(QDate.currentDate())
+        form.addRow("开始日期:", self.start_date_edit)
+
+        add_button = QPushButton("添加")
+        add_button.clicked.connect(self.add_template)
+        form.addRow(add_button)
+
+        layout.addWidget(add_group)
+
+        button_layout = QHBoxLayout()
+
+        delete_button = QPushButton("删除选中模板")
+        delete_button.clicked.connect(self.delete_template)
+        button_layout.addWidget(delete_button)
+
+        run_button = QPushButton("立即生成到期交易")
+        run_button.clicked.connect(self.run_pending)
+        button_layout.addWidget(run_button)
+
+        button_layout.addStretch()
+
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        """重新加载模板"""
+        with self.session_scope() as db:
+            rows = [
+                [
+                    str(template.id),
+                    template.name,
+                    self.TYPE_LABELS.get(template.transaction_type, ""),
+                    f"{template.amount:.2f}",
+                    f"每{template.interval}"
+                    + self.FREQUENCY_LABELS.get(template.frequency, ""),
+                    template.start_date.strftime("%Y-%m-%d"),
+                    template.category.name if template.category else "",
+                    template.person.name if template.person else "",
+                    (
+                        template.last_generated_date.strftime("%Y-%m-%d")
+                        if template.last_generated_date
+                        else ""
+                    ),
+                ]
+                for template in RecurringService(db).get_all_templates()
+            ]
+
+        self.template_table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                self.template_table.setItem(row, column, QTableWidgetItem(value))
+        self.template_table.resizeColumnsToContents()
+
+    def add_template(self):
+        """添加模板"""
+        name = self.name_edit.text().strip()
+        description = self.description_edit.text().strip() or name
+        category = self.category_combo.currentText().strip()
+        if not name or not category:
+            QMessageBox.warning(self, "输入错误", "请填写名称和分类")
+            return
+        try:
+            amount = float(self.amount_edit.text().strip())
+        except ValueError:
+            QMessageBox.warning(self, "输入错误", "金额格式不正确")
+            return
+
+        person = self.person_combo.currentText().strip() or None
+        with self.session_scope() as db:
+            RecurringService(db).create_template(
+                name,
+                self.type_combo.currentData(),
+                amount,
+                description,
+                category,
+                self.start_date_edit.date().toPyDate(),
+                frequency=self.frequency_combo.currentData(),
+                interval=self.interval_spin.value(),
+                person_name=person,
+            )
+        # 不存在的分类和人员由模板创建
+        self.lookups.add_category(category)
+        self.lookups.add_person(person)
+
+        self.name_edit.clear()
+        self.amount_edit.clear()
+        self.description_edit.clear()
+        self.refresh()
+
+    def delete_template(self):
+        """删除选中的模板（已生成的交易保留）"""
+        current_row = self.template_table.currentRow()
+        if current_row < 0:
+            QMessageBox.warning(self, "选择错误", "请选择要删除的模板")
+            return
+
+        template_id = int(self.template_table.item(current_row, 0).text())
+        with self.session_scope() as db:
+            RecurringService(db).delete_template(template_id)
+        self.refresh()
+
+    def run_pending(self):
+        """生成所有到期的周期交易"""
+        with self.session_scope() as db:
+            count = RecurringService(db).run_pending()
+        self.generated += count
+        QMessageBox.information(self, "周期交易", f"生成了 {count} 条交易")
+        self.refresh()
@@ -0,0 +1,182 @@
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QDialog,
+    QFormLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from family_account_book.services.rules import RuleService
+from family_account_book.views.lookup_models import bind_combo
+
+
+class RulesDialog(QDialog):
+    """自动分类规则管理对话框"""
+
+    COLUMNS = ["ID", "优先级", "关键字/正则", "类型", "金额区间", "分类", "人员"]
+    TYPE_LABELS = {None: "不限", "expense": "支出", "income": "收入"}
+
+    def __init__(self, session_scope, lookups, parent=None):
+        """
+        Args:
+            session_scope: 打开短生命周期会话的回调
+            lookups: 主窗口共享的分类、人员名称模型（LookupModels）
+            parent: 父窗口
+        """
+        super().__init__(parent)
+        self.session_scope = session_scope
+        self.lookups = lookups
+
+        self.setWindowTitle("自动分类规则")
+        self.resize(900, 600)
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        """设置用户界面"""
+        layout = QVBoxLayout(self)
+
+        self.rule_table = QTableWidget()
+        self.rule_table.setColumnCount(len(self.COLUMNS))
+        self.rule_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.rule_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.rule_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        layout.addWidget(self.rule_table)
+
+        add_group = QGroupBox("添加规则")
+        form = QFormLayout(add_group)
+
+        self.pattern_edit = QLineEdit()
+        self.pattern_edit.setPlaceholderText("描述中包含的关键字，留空表示只按金额")
+        form.addRow("关键字:", self.pattern_edit)
+
+        self.regex_check = QCheckBox("按正则表达式匹配")
+        form.addRow("", self.regex_check)
+
+        self.type_combo = QComboBox()
+        for value, label in self.TYPE_LABELS.items():
+            self.type_combo.addItem(label, value)
+        form.addRow("交易类型:", self.type_combo)
+
+        amount_layout = QHBoxLayout()
+        self.amount_min_edit = QLineEdit()
+        self.amount_min_edit.setPlaceholderText("最小金额")
+        amount_layout.addWidget(self.amount_min_edit)
+        self.amount_max_edit = QLineEdit()
+        self.amount_max_edit.setPlaceholderText("最大金额")
+        amount_layout.addWidget(self.amount_max_edit)
+        form.addRow("金额区间:", amount_layout)
+
+        self.category_combo = bind_combo(QComboBox(), self.lookups.categories(""))
+        form.addRow("分类:", self.category_combo)
+
+        self.person_combo = bind_combo(QComboBox(), self.lookups.persons(""))
+        form.addRow("人员:", self.person_combo)
+
+        self.priority_spin = QSpinBox()
+        self.priority_spin.setRange(-100, 100)
+        form.addRow("优先级:", self.priority_spin)
+
+        add_button = QPushButton("添加规则")
+        add_button.clicked.connect(self.add_rule)
+        form.addRow(add_button)
+
+        layout.addWidget(add_group)
+
+        button_layout = QHBoxLayout()
+
+        delete_button = QPushButton("删除选中规则")
+        delete_button.clicked.connect(self.delete_rule)
+        button_layout.addWidget(delete_button)
+
+        button_layout.addStretch()
+
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        """重新加载规则"""
+        with self.session_scope() as db:
+            rules = RuleService(db).get_all_rules()
+            rows = [
+                [
+                    str(rule.id),
+                    str(rule.priority),
+                    (rule.pattern or "") + (" (正则)" if rule.is_regex else ""),
+                    self.TYPE_LABELS.get(rule.transaction_type, ""),
+                    self._amount_range(rule.amount_min, rule.amount_max),
+                    rule.category.name if rule.category else "",
+                    rule.person.name if rule.person else "",
+                ]
+                for rule in rules
+            ]
+
+        self.rule_table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                self.rule_table.setItem(row, column, QTableWidgetItem(value))
+        self.rule_table.resizeColumnsToContents()
+
+    @staticmethod
+    def _amount_range(amount_min, amount_max) -> str:
+        if amount_min is None and amount_max is None:
+            return ""
+        low = "" if amount_min is None else f"{amount_min:.2f}"
+        high = "" if amount_max is None else f"{amount_max:.2f}"
+        return f"{low} ~ {high}"
+
+    def add_rule(self):
+        """添加规则"""
+        try:
+            amount_min_text = self.amount_min_edit.text().strip()
+            amount_max_text = self.amount_max_edit.text().strip()
+            amount_min = float(amount_min_text) if amount_min_text else None
+            amount_max = float(amount_max_text) if amount_max_text else None
+        except ValueError:
+            QMessageBox.warning(self, "输入错误", "金额格式不正确")
+            return
+
+        try:
+            with self.session_scope() as db:
+                RuleService(db).create_rule(
+                    self.pattern_edit.text().strip(),
+                    category_name=self.category_combo.currentText() or None,
+                    person_name=self.person_combo.currentText() or None,
+                    is_regex=self.regex_check.isChecked(),
+                    transaction_type=self.type_combo.currentData(),
+                    amount_min=amount_min,
+                    amount_max=amount_max,
+                    priority=self.priority_spin.value(),
+                )
+        except ValueError as e:
+            QMessageBox.warning(self, "输入错误", str(e))
+            return
+
+        self.pattern_edit.clear()
+        self.amount_min_edit.clear()
+        self.amount_max_edit.clear()
+        self.refresh()
+
+    def delete_rule(self):
+        """删除选中的规则"""
+        current_row = self.rule_table.currentRow()
+        if current_row < 0:
+            QMessageBox.warning(self, "选择错误", "请选择要删除的规则")
+            return
+
+        rule_id = int(self.rule_table.item(current_row, 0).text())
+        with self.session_scope() as db:
+            RuleService(db).delete_rule(rule_id)
+        self.refresh()
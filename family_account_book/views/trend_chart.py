@@ -0,0 +1,179 @@
+from datetime import timedelta
+
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
+from matplotlib.figure import Figure
+from PyQt6.QtCore import QDate
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QComboBox,
+    QDateEdit,
+    QFormLayout,
+    QHBoxLayout,
+    QLabel,
+    QListView,
+    QMessageBox,
+    QPushButton,
+    QVBoxLayout,
+    QWidget,
+)
+
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.downsample import lttb, visible_range
+
+
+class TrendChartWidget(QWidget):
+    """
+    多分类支出趋势图
+
+    选中的分类在一次查询中取得完整序列并缓存，切换标签页或重新绘制相同的
+    分类和范围时不再查询。平移、缩放时只对可见范围内的点按绘图区像素宽度
+    做 LTTB 降采样，多年的逐日序列每帧也只绘制约一个像素一个点。
+    """
+
+    GRANULARITIES = {"day": "按日", "month": "按月"}
+
+    def __init__(self, session_scope, lookups, parent=None):
+        """
+        Args:
+            session_scope: 打开短生命周期会话的回调
+            lookups: 主窗口共享的分类、人员名称模型（LookupModels）
+            parent: 父窗口
+        """
+        super().__init__(parent)
+        self.session_scope = session_scope
+        self.lookups = lookups
+        # (分类, 粒度, 开始日期, 结束日期) -> (x 列表, 金额列表)，数据变化时清空
+        self.series_cache = {}
+        # 当前绘制的折线及其完整序列：[(Line2D, x 列表, 金额列表)]
+        self.lines = []
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """设置用户界面"""
+        layout = QHBoxLayout(self)
+
+        controls = QFormLayout()
+        self.category_list = QListView()
+        self.category_list.setModel(self.lookups.categories())
+        self.category_list.setSelectionMode(
+            QAbstractItemView.SelectionMode.ExtendedSelection
+        )
+        controls.addRow(QLabel("分类（可多选）:"))
+        controls.addRow(self.category_list)
+
+        today = QDate.currentDate()
+        self.start_date_edit = QDateEdit(today.addYears(-1))
+        self.start_date_edit.setCalendarPopup(True)
+        controls.addRow("开始日期:", self.start_date_edit)
+        self.end_date_edit = QDateEdit(today)
+        self.end_date_edit.setCalendarPopup(True)
+        controls.addRow("结束日期:", self.end_date_edit)
+
+        self.granularity_combo = QComboBox()
+        for value, label in self.GRANULARITIES.items():
+            self.granularity_combo.addItem(label, value)
+        controls.addRow("粒度:", self.granularity_combo)
+
+        self.plot_button = QPushButton("绘制")
+        self.plot_button.clicked.connect(self.plot)
+        controls.addRow(self.plot_button)
+        layout.addLayout(controls)
+
+        chart_layout = QVBoxLayout()
+        self.canvas = FigureCanvas(Figure(figsize=(8, 4)))
+        self.axes = self.canvas.figure.add_subplot(111)
+        chart_layout.addWidget(NavigationToolbar2QT(self.canvas, self))
+        chart_layout.addWidget(self.canvas)
+        layout.addLayout(chart_layout, 1)
+
+    def invalidate(self):
+        """交易变化后清空缓存的序列，下次绘制时重新查询"""
+        self.series_cache.clear()
+
+    def plot(self):
+        """绘制选中分类的趋势"""
+        names = [
+            index.data()
+            for index in sorted(
+                self.category_list.selectionModel().selectedIndexes(),
+                key=lambda index: index.row(),
+            )
+        ]
+        if not names:
+            QMessageBox.warning(self, "选择错误", "请至少选择一个分类")
+            return
+
+        start_date = self.start_date_edit.date().toPyDate()
+        # 结束日期包含在内
+        end_date = self.end_date_edit.date().toPyDate() + timedelta(days=1)
+        if start_date >= end_date:
+            QMessageBox.warning(self, "输入错误", "开始日期不能晚于结束日期")
+            return
+        granularity = self.granularity_combo.currentData()
+
+        try:
+            series = self.load_series(names, granularity, start_date, end_date)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加载趋势数据失败: {str(e)}")
+            return
+
+        self.lines = []
+        self.axes.clear()
+        # clear() 会重建坐标轴的回调注册表，每次绘制后重新连接
+        self.axes.callbacks.connect("xlim_changed", self.on_xlim_changed)
+        top = 0.0
+        for name in names:
+            xs, ys = series[name]
+            (line,) = self.axes.plot([], [], label=name)
+            self.lines.append((line, xs, ys))
+            top = max([top, *ys])
+
+        self.axes.set_title("分类支出趋势")
+        self.axes.set_ylabel("金额")
+        locator = mdates.AutoDateLocator()
+        self.axes.xaxis.set_major_locator(locator)
+        self.axes.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        self.axes.set_ylim(0, top * 1.05 or 1.0)
+        self.axes.legend(loc="upper left")
+        # 设置 x 范围会触发 on_xlim_changed 填充折线数据
+        self.axes.set_xlim(
+            mdates.date2num(start_date), mdates.date2num(end_date - timedelta(days=1))
+        )
+        self.canvas.draw_idle()
+
+    def load_series(self, names, granularity, start_date, end_date):
+        """
+        取得各分类的完整序列，缓存中没有的分类合并为一次查询
+
+        Returns:
+            分类名称到 (x 列表, 金额列表) 的字典
+        """
+        missing = [
+            name
+            for name in names
+            if (name, granularity, start_date, end_date) not in self.series_cache
+        ]
+        if missing:
+            with self.session_scope() as db:
+                loaded = AnalyticsService(db).category_series(
+                    missing, start_date, end_date, granularity
+                )
+            for name, points in loaded.items():
+                xs = mdates.date2num([day for day, _ in points]).tolist()
+                ys = [amount for _, amount in points]
+                self.series_cache[name, granularity, start_date, end_date] = (xs, ys)
+        return {
+            name: self.series_cache[name, granularity, start_date, end_date]
+            for name in names
+        }
+
+    def on_xlim_changed(self, axes):
+        """平移或缩放后按可见范围重新降采样"""
+        low, high = axes.get_xlim()
+        width = int(axes.bbox.width)
+        for line, xs, ys in self.lines:
+            start, end = visible_range(xs, low, high)
+            line.set_data(*lttb(xs[start:end], ys[start:end], width))
@@ -1,23 +1,14 @@
 #!/usr/bin/env python3
 """
-家庭账本应用主程序
+家庭账本应用主程序（不带参数时启动图形界面，子命令见 --help）
 """
 
-from family_account_book.database import init_db
-from family_account_book.views.main_window import main
-
-
-def main_app():
-    """主应用入口"""
-    # 初始化数据库
-    print("正在初始化数据库...")
-    init_db()
-    print("数据库初始化完成")
-
-    # 启动 GUI 应用
-    print("启动家庭账本应用...")
-    main()
+import multiprocessing
+import sys
 
+from family_account_book.cli import main
 
 if __name__ == "__main__":
-    main_app()
+    # 打包后的可执行文件启动报告生成的工作进程时需要
+    multiprocessing.freeze_support()
+    sys.exit(main())
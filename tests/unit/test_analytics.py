@@ -12,8 +12,11 @@ class TestAnalyticsService:
 
     @pytest.fixture
     def mock_db(self):
-        """模拟数据库会话"""
-        return Mock(spec=Session)
+        """模拟数据库会话（没有已归档的年份）"""
+        db = Mock(spec=Session)
+        db.info = {}
+        db.execute.return_value = []
+        return db
 
     @pytest.fixture
     def analytics_service(self, mock_db):
@@ -0,0 +1,187 @@
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from family_account_book.database import create_tables
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.archive import (
+    MAX_ATTACHED_ARCHIVES,
+    ArchiveService,
+)
+from family_account_book.services.export import ExportService
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.repository import (
+    CategoryService,
+    PersonService,
+    TransactionService,
+)
+from family_account_book.services.snapshots import SnapshotService
+
+
+class TestArchive:
+    """测试按年归档交易"""
+
+    @pytest.fixture
+    def session_factory(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'ledger.db'}")
+        create_tables(engine)
+        factory = sessionmaker(bind=engine, expire_on_commit=False)
+        with factory() as db:
+            service = TransactionService(db)
+            service.create_expense(date(2023, 3, 5), 100.0, "午饭", "餐饮")
+            service.create_expense(date(2023, 12, 31), 50.0, "年夜饭", "餐饮")
+            service.create_income(
+                date(2023, 3, 10), 10000.0, "工资", "工资", deductions=[("个税", 500.0)]
+            )
+            service.create_expense(date(2024, 1, 2), 30.0, "早饭", "餐饮")
+        yield factory
+        engine.dispose()
+
+    def test_archived_year_still_in_reports(self, session_factory, tmp_path):
+        """测试归档后当前表只剩其他年份，统计、查询和导出仍包含归档交易"""
+        with session_factory() as db:
+            analytics = AnalyticsService(db)
+            before = analytics.income_net_summary(period="year")
+            budget_actuals = db.execute(
+                text("SELECT * FROM budget_actuals ORDER BY category_id, month")
+            ).all()
+            SnapshotService(db).close_month(2023, 12)
+
+        with session_factory() as db:
+            assert ArchiveService(db).archive_year(2023) == 3
+            assert ArchiveService(db).archivable_years() == [2024]
+
+        assert os.path.exists(tmp_path / "archive" / "ledger_2023.db")
+        with session_factory() as db:
+            assert db.execute(text("SELECT count(*) FROM transactions")).scalar() == 1
+            assert (
+                db.execute(text("SELECT * FROM budget_actuals ORDER BY 1, 2")).all()
+                == budget_actuals
+            )
+
+            # 已结账月份归档后仍是已结账，快照与归档文件中的交易一致
+            assert SnapshotService(db).verify_month(2023, 12)
+
+            analytics = AnalyticsService(db)
+            assert analytics.monthly_aggregation(2023, 3) == {
+                "餐饮": 100.0,
+                "total": 100.0,
+            }
+            assert analytics.income_net_summary(period="year") == before
+            assert analytics.category_sum_in_range(
+                "餐饮", date(2023, 1, 1), date(2024, 12, 31)
+            ) == pytest.approx(180.0)
+
+            transactions = TransactionService(db).get_transactions(
+                filter_spec=TransactionFilter(
+                    start_date=date(2023, 12, 1), category_names=("餐饮",)
+                )
+            )
+            assert [t.description for t in transactions] == ["早饭", "年夜饭"]
+            current = TransactionService(db).get_transactions(
+                start_date=date(2024, 1, 1)
+            )
+            assert [t.description for t in current] == ["早饭"]
+            # 不限日期的列表只读当前表
+            assert [
+                t.description for t in TransactionService(db).list_transactions()
+            ] == ["早饭"]
+
+            csv_text = "".join(ExportService(db).iter_csv())
+            assert "2023-03-05" in csv_text and "2024-01-02" in csv_text
+
+            # 有归档交易的分类不能删除
+            category = next(
+                c for c in CategoryService(db).get_all_categories() if c.name == "工资"
+            )
+            assert CategoryService(db).delete_category(category.id) is False
+
+    def test_archived_year_rejects_writes_and_ids_not_reused(self, session_factory):
+        """测试已归档年份不能再写入，新交易不复用已归档交易的 ID"""
+        with session_factory() as db:
+            max_id = db.execute(text("SELECT max(id) FROM transactions")).scalar()
+            ArchiveService(db).archive_year(2023)
+
+        with session_factory() as db:
+            service = TransactionService(db)
+            with pytest.raises(IntegrityError):
+                service.create_expense(date(2023, 6, 1), 10.0, "补录", "餐饮")
+            db.rollback()
+
+            created = service.create_expense(date(2024, 6, 1), 10.0, "晚饭", "餐饮")
+            assert created.id > max_id
+
+    def test_merge_refused_for_archived_references(self, session_factory):
+        """测试已归档交易引用的分类不能合并，只在当前表中的可以"""
+        with session_factory() as db:
+            ArchiveService(db).archive_year(2023)
+
+        with session_factory() as db:
+            service = CategoryService(db)
+            ids = {row.name: row.id for row in service.list_categories()}
+            with pytest.raises(ValueError):
+                service.merge_category(ids["餐饮"], ids["工资"])
+            db.rollback()
+
+            TransactionService(db).create_expense(
+                date(2024, 2, 1), 20.0, "咖啡", "饮品"
+            )
+            ids = {row.name: row.id for row in service.list_categories()}
+            assert service.merge_category(ids["饮品"], ids["餐饮"]) == 1
+
+    def test_more_archives_than_attach_limit(self, session_factory):
+        """测试已归档年份超过附加上限时，列表和删除检查不受影响"""
+        years = range(2022 - MAX_ATTACHED_ARCHIVES, 2023)
+        with session_factory() as db:
+            service = TransactionService(db)
+            for year in years:
+                service.create_expense(date(year, 5, 1), 1.0, f"{year} 年", "旧账")
+            PersonService(db).create_person("张三")
+            service.create_expense(
+                date(years[0], 6, 1), 2.0, "最早", "最早分类", "老王"
+            )
+        for year in years:
+            with session_factory() as db:
+                ArchiveService(db).archive_year(year)
+
+        with session_factory() as db:
+            assert len(ArchiveService(db).get_partitions()) > MAX_ATTACHED_ARCHIVES
+            rows = TransactionService(db).list_transactions()
+            assert len(rows) == 4
+
+            categories = {c.name: c.id for c in CategoryService(db).list_categories()}
+            persons = {p.name: p.id for p in PersonService(db).get_all_persons()}
+            assert CategoryService(db).delete_category(categories["最早分类"]) is False
+            assert PersonService(db).delete_person(persons["老王"]) is False
+            assert PersonService(db).delete_person(persons["张三"]) is True
+            with pytest.raises(ValueError):
+                CategoryService(db).merge_category(
+                    categories["最早分类"], categories["餐饮"]
+                )
+
+    def test_restore_year(self, session_factory, tmp_path):
+        """测试恢复归档年份后交易回到当前表，归档文件被删除"""
+        with session_factory() as db:
+            ArchiveService(db).archive_year(2023)
+            with pytest.raises(ValueError):
+                ArchiveService(db).archive_year(2023)
+            with pytest.raises(ValueError):
+                ArchiveService(db).archive_year(date.today().year)
+
+        with session_factory() as db:
+            assert ArchiveService(db).restore_year(2023) == 3
+            assert ArchiveService(db).get_partitions() == []
+            assert db.execute(text("SELECT count(*) FROM transactions")).scalar() == 4
+            assert db.execute(text("SELECT count(*) FROM income_details")).scalar() == 1
+            assert AnalyticsService(db).monthly_aggregation(2023, 12)["total"] == 50.0
+        assert not os.path.exists(tmp_path / "archive" / "ledger_2023.db")
+
+    def test_in_memory_database_not_supported(self, db):
+        """测试内存数据库不能归档"""
+        TransactionService(db).create_expense(date(2023, 3, 5), 100.0, "午饭", "餐饮")
+        with pytest.raises(ValueError):
+            ArchiveService(db).archive_year(2023)
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+
+from family_account_book.database import create_tables
+from family_account_book.models import Category, Transaction
+from family_account_book.services.async_services import (
+    AsyncAnalyticsService,
+    AsyncCategoryService,
+    AsyncTransactionService,
+    create_async_session_factory,
+)
+
+pytest.importorskip("aiosqlite")
+
+
+class TestAsyncServices:
+    """测试异步服务与同步服务结果一致"""
+
+    @pytest.fixture
+    def session_factory(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'ledger.db'}"
+        engine = create_engine(url)
+        create_tables(engine)
+        engine.dispose()
+        factory = create_async_session_factory(url)
+        yield factory
+        asyncio.run(factory.kw["bind"].dispose())
+
+    def test_write_then_gather_aggregates(self, session_factory):
+        """测试写入后并发执行多个统计"""
+
+        async def scenario():
+            categories = AsyncCategoryService(session_factory)
+            food = await categories.create_category("餐饮")
+            await categories.create_category("外卖", parent_id=food.id)
+
+            transactions = AsyncTransactionService(session_factory)
+            await transactions.create_expense(date(2024, 6, 1), 30.0, "午饭", "餐饮")
+            await transactions.create_expense(date(2024, 6, 2), 20.0, "外卖", "外卖")
+            await transactions.create_income(
+                date(2024, 6, 10), 8000.0, "工资", "工资", deductions=[("个税", 300.0)]
+            )
+
+            analytics = AsyncAnalyticsService(session_factory)
+            return await asyncio.gather(
+                analytics.monthly_aggregation(2024, 6),
+                analytics.category_subtree_totals(date(2024, 6, 1), date(2024, 7, 1)),
+                analytics.income_net_summary(date(2024, 6, 1), date(2024, 7, 1)),
+                transactions.get_transactions(transaction_type="expense"),
+            )
+
+        monthly, subtree, income, expenses = asyncio.run(scenario())
+        assert monthly["total"] == 50.0
+        assert len(expenses) == 2
+        assert next(iter(income.values()))["net"] == 7700.0
+        assert subtree["餐饮"] == 50.0
+
+    def test_run_loads_relationships_and_rolls_back(self, session_factory):
+        """测试 run 在会话内访问关联对象，异常时回滚"""
+
+        def create_then_fail(db):
+            db.add(Category(name="临时"))
+            db.flush()
+            raise ValueError("中止")
+
+        async def scenario():
+            transactions = AsyncTransactionService(session_factory)
+            created = await transactions.create_expense(
+                date(2024, 6, 1), 30.0, "午饭", "餐饮"
+            )
+            name = await transactions.run(
+                lambda db: db.get(Transaction, created.id).category.name
+            )
+            with pytest.raises(ValueError):
+                await transactions.run(create_then_fail)
+            categories = await AsyncCategoryService(
+                session_factory
+            ).get_all_categories()
+            return name, [c.name for c in categories]
+
+        name, categories = asyncio.run(scenario())
+        assert name == "餐饮"
+        assert "临时" not in categories
@@ -0,0 +1,56 @@
+import json
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from family_account_book.benchmark import generate_ledger, run_benchmarks
+from family_account_book.database import create_tables
+from family_account_book.models import IncomeDetail, Transaction
+
+
+class TestBenchmark:
+    """测试基准测试数据生成和结果输出"""
+
+    def _snapshot(self, engine):
+        db = Session(bind=engine)
+        counts = generate_ledger(db, 500, years=2, categories=8, persons=3, seed=7)
+        rows = [
+            (t.date, t.amount, t.transaction_type, t.description, t.person_id)
+            for t in db.query(Transaction).order_by(Transaction.id)
+        ]
+        db.close()
+        return counts, rows
+
+    def test_generate_ledger_is_deterministic(self, engine, tmp_path):
+        """测试相同种子生成相同数据"""
+        other = create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+        create_tables(other)
+
+        counts, rows = self._snapshot(engine)
+        assert self._snapshot(other) == (counts, rows)
+        assert counts["transactions"] == 500
+        assert {row[0].year for row in rows} == {2023, 2024}
+
+        db = Session(bind=engine)
+        assert db.query(IncomeDetail).count() == counts["income_details"] > 0
+        db.close()
+        other.dispose()
+
+    def test_run_benchmarks_writes_json(self, tmp_path):
+        """测试基准结果输出为 JSON"""
+        output = tmp_path / "bench.json"
+
+        report = run_benchmarks(
+            sizes=[300], repeat=1, output=str(output), workdir=str(tmp_path)
+        )
+
+        saved = json.loads(output.read_text(encoding="utf-8"))
+        assert saved["results"] == report["results"]
+        names = {result["name"] for result in saved["results"]}
+        assert {
+            "get_transactions",
+            "monthly_aggregation",
+            "per_month_series_for_category",
+            "export_to_csv",
+        } <= names
+        assert all(result["queries"] > 0 for result in saved["results"])
@@ -0,0 +1,103 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from family_account_book.database import create_budget_counters
+from family_account_book.models import BudgetActual
+from family_account_book.services.budget import (
+    STATUS_OK,
+    STATUS_OVER,
+    STATUS_WARNING,
+    BudgetService,
+)
+from family_account_book.services.repository import CategoryService, TransactionService
+
+
+class TestBudget:
+    """测试预算计数器和预算概览"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        category_service = CategoryService(db)
+        food = category_service.create_category("餐饮")
+        category_service.create_category("外卖", parent_id=food.id)
+        category_service.create_category("交通")
+
+        budget_service = BudgetService(db)
+        budget_service.set_budget("餐饮", 1000.0)
+        budget_service.set_budget("交通", 200.0, warn_ratio=0.5)
+        return db
+
+    def _overview(self, db, year=2023, month=10):
+        return {
+            item["category"]: item for item in BudgetService(db).overview(year, month)
+        }
+
+    def test_counters_follow_writes(self, ledger):
+        """测试计数器随新增、修改、删除同步，包含子分类"""
+        service = TransactionService(ledger)
+        lunch = service.create_expense(date(2023, 10, 1), 300.0, "午饭", "餐饮")
+        service.create_expense(date(2023, 10, 2), 200.0, "外卖", "外卖")
+        service.create_expense(date(2023, 11, 1), 999.0, "聚餐", "餐饮")
+        service.create_income(date(2023, 10, 10), 8000.0, "工资", "工资")
+
+        overview = self._overview(ledger)
+        assert overview["餐饮"]["actual"] == 500.0
+        assert overview["餐饮"]["status"] == STATUS_OK
+        assert overview["交通"]["actual"] == 0.0
+
+        service.update_transaction(lunch.id, amount=350.0, category_name="交通")
+        overview = self._overview(ledger)
+        assert overview["餐饮"]["actual"] == 200.0
+        assert overview["交通"]["actual"] == 350.0
+        assert overview["交通"]["status"] == STATUS_OVER
+
+        service.delete_transaction(lunch.id)
+        assert self._overview(ledger)["交通"]["actual"] == 0.0
+
+        service.bulk_create_transactions(
+            [
+                {
+                    "date": date(2023, 10, 5),
+                    "amount": 150.0,
+                    "transaction_type": "expense",
+                    "description": "打车",
+                    "category_name": "交通",
+                }
+            ]
+        )
+        assert self._overview(ledger)["交通"]["status"] == STATUS_WARNING
+
+    def test_alerts_fire_on_crossing(self, ledger):
+        """测试只有越过提醒线或预算线的那笔支出触发提醒"""
+        service = TransactionService(ledger)
+        budget_service = BudgetService(ledger)
+
+        def record(amount, description):
+            t = service.create_expense(date(2023, 10, 3), amount, description, "外卖")
+            return [
+                (item["category"], item["status"])
+                for item in budget_service.alerts_for_expense(
+                    t.category_id, t.date, t.amount
+                )
+            ]
+
+        assert record(500.0, "外卖1") == []
+        assert record(350.0, "外卖2") == [("餐饮", STATUS_WARNING)]
+        assert record(50.0, "外卖3") == []
+        assert record(200.0, "外卖4") == [("餐饮", STATUS_OVER)]
+
+    def test_backfill_for_existing_database(self, engine, ledger):
+        """测试旧数据库首次创建触发器时回填计数器"""
+        TransactionService(ledger).create_expense(
+            date(2023, 10, 1), 120.0, "地铁", "交通"
+        )
+        ledger.close()
+        with engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER budget_actuals_insert"))
+            conn.execute(text("DELETE FROM budget_actuals"))
+
+        create_budget_counters(engine)
+        assert ledger.query(BudgetActual).count() == 1
+        assert self._overview(ledger)["交通"]["actual"] == 120.0
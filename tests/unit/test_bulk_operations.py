@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from family_account_book.services.budget import BudgetService
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.repository import (
+    CategoryService,
+    TransactionService,
+)
+from family_account_book.services.snapshots import SnapshotService
+
+
+class TestBulkOperations:
+    """测试集合式批量删除和批量改分类"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        service = TransactionService(db)
+        service.create_expense(date(2023, 10, 1), 30.0, "导入-午饭", "餐饮")
+        service.create_expense(date(2023, 10, 2), 45.0, "导入-晚饭", "餐饮")
+        service.create_expense(date(2023, 10, 3), 12.0, "地铁", "交通")
+        service.create_income(
+            date(2023, 10, 10), 8000.0, "十月工资", "工资", deductions=[("个税", 300.0)]
+        )
+        CategoryService(db).create_category("外卖")
+        BudgetService(db).set_budget("餐饮", 100.0)
+        BudgetService(db).set_budget("外卖", 100.0)
+        return service
+
+    def _actual(self, db, category):
+        return {
+            item["category"]: item["actual"]
+            for item in BudgetService(db).overview(2023, 10)
+        }[category]
+
+    def test_bulk_delete(self, db, ledger):
+        """测试批量删除同步删除收入明细，全文索引、预算计数器和结账状态随之更新"""
+        SnapshotService(db).close_month(2023, 10)
+        filter_spec = TransactionFilter(description_contains="导入")
+        assert ledger.count_transactions(filter_spec) == 2
+
+        assert ledger.bulk_delete(filter_spec) == 2
+        assert [t.description for t in ledger.get_transactions()] == [
+            "十月工资",
+            "地铁",
+        ]
+        assert ledger.search("导入-午饭") == []
+        assert self._actual(db, "餐饮") == 0.0
+        assert not SnapshotService(db).is_closed(2023, 10)
+
+        assert ledger.bulk_delete(TransactionFilter(transaction_type="income")) == 1
+        assert db.execute(text("SELECT count(*) FROM income_details")).scalar() == 0
+
+        with pytest.raises(ValueError):
+            ledger.bulk_delete(TransactionFilter())
+
+    def test_bulk_reassign_category(self, db, ledger):
+        """测试批量改分类只改符合条件的交易，预算计数器和全文索引随之更新"""
+        count = ledger.bulk_reassign_category(
+            "餐饮", "外卖", TransactionFilter(amount_min=40.0)
+        )
+        assert count == 1
+        assert self._actual(db, "餐饮") == 30.0
+        assert self._actual(db, "外卖") == 45.0
+        assert [t.description for t in ledger.search("外卖")] == ["导入-晚饭"]
+
+        assert ledger.bulk_reassign_category("餐饮", "外卖") == 1
+        assert ledger.bulk_reassign_category("外卖", "外卖") == 0
+        with pytest.raises(ValueError):
+            ledger.bulk_reassign_category("不存在", "外卖")
@@ -0,0 +1,114 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import update
+
+from family_account_book.models import Category, CategoryClosure
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.repository import CategoryService, TransactionService
+
+
+class TestCategoryHierarchy:
+    """测试分类闭包表和层级汇总"""
+
+    @pytest.fixture
+    def tree(self, db):
+        """生活 > 餐饮 > 外卖，以及独立的交通"""
+        category_service = CategoryService(db)
+        life = category_service.create_category("生活")
+        food = category_service.create_category("餐饮", parent_id=life.id)
+        takeout = category_service.create_category("外卖", parent_id=food.id)
+        traffic = category_service.create_category("交通")
+        return life, food, takeout, traffic
+
+    def test_create_category_maintains_closure(self, db, tree):
+        """测试创建分类时写入所有祖先关系"""
+        life, food, takeout, _ = tree
+        rows = (
+            db.query(CategoryClosure.ancestor_id, CategoryClosure.depth)
+            .filter(CategoryClosure.descendant_id == takeout.id)
+            .all()
+        )
+        assert sorted(rows) == sorted([(takeout.id, 0), (food.id, 1), (life.id, 2)])
+
+    def test_delete_category_with_children_refused(self, db, tree):
+        """测试有子分类的分类不能删除"""
+        life, food, takeout, _ = tree
+        category_service = CategoryService(db)
+
+        assert category_service.delete_category(food.id) is False
+        assert category_service.delete_category(takeout.id) is True
+        assert (
+            db.query(CategoryClosure)
+            .filter(CategoryClosure.descendant_id == takeout.id)
+            .count()
+            == 0
+        )
+
+    def test_rebuild_closure_matches_incremental(self, db, tree):
+        """测试重建结果与增量维护一致"""
+        before = sorted(
+            (row.ancestor_id, row.descendant_id, row.depth)
+            for row in db.query(CategoryClosure).all()
+        )
+        category_service = CategoryService(db)
+        db.query(CategoryClosure).delete()
+        db.commit()
+        assert category_service.closure_needs_rebuild()
+
+        category_service.rebuild_closure()
+        after = sorted(
+            (row.ancestor_id, row.descendant_id, row.depth)
+            for row in db.query(CategoryClosure).all()
+        )
+        assert after == before
+        assert not category_service.closure_needs_rebuild()
+
+    def test_category_subtree_totals(self, db, tree):
+        """测试子树合计包含所有子孙分类"""
+        transaction_service = TransactionService(db)
+        transaction_service.create_expense(date(2023, 10, 1), 100.0, "午饭", "餐饮")
+        transaction_service.create_expense(date(2023, 10, 2), 30.0, "外卖", "外卖")
+        transaction_service.create_expense(date(2023, 10, 3), 20.0, "地铁", "交通")
+        transaction_service.create_expense(date(2023, 11, 1), 99.0, "晚饭", "餐饮")
+        transaction_service.create_expense(date(2023, 10, 4), 5.0, "零食", "零食")
+
+        totals = AnalyticsService(db).category_subtree_totals(
+            date(2023, 10, 1), date(2023, 11, 1)
+        )
+
+        assert totals == {
+            "生活": 130.0,
+            "餐饮": 130.0,
+            "外卖": 30.0,
+            "交通": 20.0,
+            "零食": 5.0,
+        }
+
+    def test_rebuild_closure_with_parent_cycle(self, db, tree):
+        """测试旧数据中 parent_id 成环时重建闭包表不重复写入"""
+        life, food, takeout, traffic = tree
+        # 生活 > 餐饮 > 外卖 > 生活 成环，交通挂在环下
+        db.execute(
+            update(Category).where(Category.id == life.id).values(parent_id=takeout.id)
+        )
+        db.execute(
+            update(Category).where(Category.id == traffic.id).values(parent_id=food.id)
+        )
+        db.commit()
+
+        CategoryService(db).rebuild_closure()
+        rows = [
+            (row.ancestor_id, row.descendant_id, row.depth)
+            for row in db.query(CategoryClosure).all()
+        ]
+        cycle = [life.id, food.id, takeout.id]
+        assert sorted(rows) == sorted(
+            [
+                (a, d, (cycle.index(d) - cycle.index(a)) % 3)
+                for a in cycle
+                for d in cycle
+            ]
+            + [(a, traffic.id, (1 - cycle.index(a)) % 3 + 1) for a in cycle]
+            + [(traffic.id, traffic.id, 0)]
+        )
@@ -0,0 +1,94 @@
+import json
+import subprocess
+import sys
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from family_account_book.cli import EXIT_ERROR, main
+from family_account_book.services.repository import TransactionService
+
+
+class TestCli:
+    """测试命令行子命令"""
+
+    def test_import_stats_export_round_trip(self, tmp_path, capsys):
+        """测试导入 CSV 后统计、导出，重复导入时跳过"""
+        db_path = str(tmp_path / "ledger.db")
+        source = tmp_path / "bank.csv"
+        source.write_text(
+            "日期,类型,分类,金额,描述,人员\n"
+            "2024-06-01,支出,餐饮,35.5,午饭,\n"
+            "2024/06/02,支出,交通,12,地铁,\n"
+            "2024-06-10,收入,工资,8000,六月工资,\n",
+            encoding="utf-8",
+        )
+
+        assert main(["--db", db_path, "import", str(source)]) == 0
+        assert "导入 3 条" in capsys.readouterr().out
+        assert main(["--db", db_path, "import", str(source)]) == 0
+        assert "跳过重复 3 条" in capsys.readouterr().out
+
+        assert (
+            main(["--db", db_path, "stats", "--year", "2024", "--month", "6", "--json"])
+            == 0
+        )
+        stats = json.loads(capsys.readouterr().out)
+        assert stats["expenses"]["餐饮"] == 35.5
+        assert stats["expenses"]["total"] == 47.5
+
+        output = str(tmp_path / "june.csv")
+        assert main(["--db", db_path, "export", output, "--type", "expense"]) == 0
+        capsys.readouterr()
+        with open(output, encoding="utf-8-sig") as f:
+            assert len(f.read().splitlines()) == 3
+
+    def test_export_end_date_includes_whole_day(self, tmp_path, capsys):
+        """测试 --end 包含结束日当天的全部交易"""
+        db_path = str(tmp_path / "ledger.db")
+        source = tmp_path / "bank.csv"
+        source.write_text(
+            "日期,类型,分类,金额,描述,人员\n"
+            "2024-06-29,支出,餐饮,10,早饭,\n"
+            "2024-06-30,支出,餐饮,20,午饭,\n"
+            "2024-07-01,支出,餐饮,30,晚饭,\n",
+            encoding="utf-8",
+        )
+        assert main(["--db", db_path, "import", str(source)]) == 0
+        engine = create_engine(f"sqlite:///{db_path}")
+        with Session(engine) as db:
+            TransactionService(db).create_expense(
+                datetime(2024, 6, 30, 10, 0), 25.0, "咖啡", "餐饮"
+            )
+        engine.dispose()
+
+        output = str(tmp_path / "june.csv")
+        args = ["--start", "2024-06-01", "--end", "2024-06-30"]
+        assert main(["--db", db_path, "export", output, *args]) == 0
+        capsys.readouterr()
+        with open(output, encoding="utf-8-sig") as f:
+            assert len(f.read().splitlines()) == 4
+
+    def test_bad_input_returns_error(self, tmp_path, capsys):
+        """测试格式错误的行以错误码退出并提示行号"""
+        source = tmp_path / "bad.csv"
+        source.write_text("date,amount,description\n2024-13-01,1,x\n", encoding="utf-8")
+
+        code = main(["--db", str(tmp_path / "ledger.db"), "import", str(source)])
+        assert code == EXIT_ERROR
+        assert "第 2 行" in capsys.readouterr().err
+
+    def test_headless_imports(self, tmp_path):
+        """测试报表命令不加载 PyQt6、matplotlib 和 pandas"""
+        script = (
+            "import sys\n"
+            "from family_account_book.cli import main\n"
+            f"main(['--db', {str(tmp_path / 'ledger.db')!r}, 'stats'])\n"
+            "heavy = {'PyQt6', 'matplotlib', 'pandas'} & set(sys.modules)\n"
+            "print('heavy:' + ','.join(sorted(heavy)))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip().splitlines()[-1] == "heavy:"
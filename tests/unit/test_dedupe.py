@@ -0,0 +1,126 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from family_account_book.database import add_missing_columns, backfill_dedupe_keys
+from family_account_book.models import Transaction
+from family_account_book.services.dedupe import (
+    DedupeService,
+    DuplicateTransactionError,
+    compute_dedupe_key,
+)
+from family_account_book.services.repository import TransactionService
+
+
+class TestDedupe:
+    """测试交易去重"""
+
+    def test_key_normalizes_description(self):
+        """测试去重键忽略大小写、空白、标点和时间部分"""
+        assert compute_dedupe_key(
+            date(2023, 10, 1), 30.0, "Starbucks 咖啡！", 1
+        ) == compute_dedupe_key(datetime(2023, 10, 1, 8, 30), 30.004, "starbucks咖啡", 1)
+        assert compute_dedupe_key(
+            date(2023, 10, 1), 30.0, "咖啡", 1
+        ) != compute_dedupe_key(date(2023, 10, 1), 30.0, "咖啡", 2)
+
+    def test_create_rejects_duplicate(self, db):
+        """测试重复录入被拒绝，确认后允许录入"""
+        service = TransactionService(db)
+        first = service.create_expense(
+            date(2023, 10, 1), 30.0, "午饭", "餐饮", person_name="张三"
+        )
+
+        with pytest.raises(DuplicateTransactionError) as error:
+            service.create_expense(
+                date(2023, 10, 1), 30.0, " 午饭 ", "餐饮", person_name="张三"
+            )
+        assert error.value.existing_id == first.id
+
+        service.create_expense(
+            date(2023, 10, 1),
+            30.0,
+            "午饭",
+            "餐饮",
+            person_name="张三",
+            allow_duplicate=True,
+        )
+        service.create_expense(
+            date(2023, 10, 1), 30.0, "午饭", "餐饮", person_name="李四"
+        )
+        assert db.query(Transaction).count() == 3
+
+    def test_update_recomputes_key(self, db):
+        """测试修改交易后去重键随之更新"""
+        service = TransactionService(db)
+        transaction = service.create_expense(date(2023, 10, 1), 30.0, "午饭", "餐饮")
+        service.update_transaction(transaction.id, amount=35.0)
+
+        service.create_expense(date(2023, 10, 1), 30.0, "午饭", "餐饮")
+        with pytest.raises(DuplicateTransactionError):
+            service.create_expense(date(2023, 10, 1), 35.0, "午饭", "餐饮")
+
+    def test_bulk_create_skips_duplicates(self, db):
+        """测试批量导入跳过库中和批内重复的记录"""
+        service = TransactionService(db)
+        service.create_expense(date(2023, 10, 1), 30.0, "午饭", "餐饮")
+
+        rows = [
+            {
+                "date": date(2023, 10, day),
+                "amount": 30.0,
+                "transaction_type": "expense",
+                "description": "午饭",
+                "category_name": "餐饮",
+            }
+            for day in (1, 2, 2, 3)
+        ]
+        assert service.bulk_create_transactions(rows) == 2
+        assert service.bulk_create_transactions(rows) == 0
+        assert service.bulk_create_transactions(rows, skip_duplicates=False) == 4
+
+    def test_import_payslips_skips_duplicates(self, db):
+        """测试重复导入工资单不产生重复收入和明细"""
+        service = TransactionService(db)
+        payslips = [
+            {
+                "date": date(2023, 10, 10),
+                "amount": 10000.0,
+                "description": "10月工资",
+                "category_name": "工资",
+                "person_name": "张三",
+                "deductions": [("五险一金", 1000.0)],
+            }
+        ]
+        assert service.import_payslips(payslips) == 1
+        assert service.import_payslips(payslips) == 0
+        assert db.query(Transaction).count() == 1
+
+    def test_find_near_duplicates(self, db):
+        """测试疑似重复扫描：金额相同、日期相近、描述相似"""
+        service = TransactionService(db)
+        a = service.create_expense(date(2023, 10, 1), 88.0, "超市购物", "日用")
+        b = service.create_expense(date(2023, 10, 2), 88.0, "超市购物 盒马", "日用")
+        service.create_expense(date(2023, 10, 20), 88.0, "超市购物", "日用")
+        service.create_expense(date(2023, 10, 1), 88.5, "超市购物", "日用")
+        service.create_expense(date(2023, 10, 2), 88.0, "电影票", "娱乐")
+
+        pairs = DedupeService(db).find_near_duplicates(days=3)
+        assert [pair[:2] for pair in pairs] == [(a.id, b.id)]
+
+    def test_backfill_legacy_database(self, engine, db):
+        """测试旧库缺少去重键列时补列并回填"""
+        TransactionService(db).create_expense(date(2023, 10, 1), 30.0, "午饭", "餐饮")
+        db.close()
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_transactions_dedupe_key"))
+            conn.execute(text("ALTER TABLE transactions DROP COLUMN dedupe_key"))
+
+        add_missing_columns(engine)
+        backfill_dedupe_keys(engine)
+
+        with pytest.raises(DuplicateTransactionError):
+            TransactionService(db).create_expense(
+                date(2023, 10, 1), 30.0, "午饭", "餐饮"
+            )
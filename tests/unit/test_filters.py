@@ -0,0 +1,114 @@
+from datetime import date, datetime
+
+import pytest
+
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.export import ExportService
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.repository import CategoryService, TransactionService
+
+
+class TestTransactionFilter:
+    """测试组合过滤条件"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        category_service = CategoryService(db)
+        food = category_service.create_category("餐饮")
+        category_service.create_category("外卖", parent_id=food.id)
+
+        transaction_service = TransactionService(db)
+        transaction_service.create_expense(
+            date(2023, 10, 1), 30.0, "楼下面馆", "餐饮", person_name="张三"
+        )
+        transaction_service.create_expense(
+            date(2023, 10, 2), 58.0, "外卖披萨", "外卖", person_name="李四"
+        )
+        transaction_service.create_expense(
+            date(2023, 10, 3), 500.0, "电费", "水电", person_name="张三"
+        )
+        transaction_service.create_income(
+            date(2023, 10, 10), 8000.0, "工资", "工资", person_name="张三"
+        )
+        return db
+
+    def _descriptions(self, ledger, filter_spec):
+        return sorted(
+            t.description
+            for t in TransactionService(ledger).get_transactions(
+                filter_spec=filter_spec
+            )
+        )
+
+    def test_amount_range_and_persons(self, ledger):
+        """测试金额区间和人员过滤"""
+        assert self._descriptions(
+            ledger, TransactionFilter(amount_min=50, amount_max=1000)
+        ) == ["外卖披萨", "电费"]
+        assert self._descriptions(
+            ledger,
+            TransactionFilter(person_names=["张三"], transaction_type="expense"),
+        ) == ["楼下面馆", "电费"]
+
+    def test_multiple_categories_and_subcategories(self, ledger):
+        """测试多分类和包含子分类"""
+        assert self._descriptions(
+            ledger, TransactionFilter(category_names=["餐饮", "水电"])
+        ) == ["楼下面馆", "电费"]
+        assert self._descriptions(
+            ledger,
+            TransactionFilter(category_names=["餐饮"], include_subcategories=True),
+        ) == ["外卖披萨", "楼下面馆"]
+
+    def test_description_contains(self, ledger):
+        """测试描述包含（长词走全文索引，短词走 LIKE）"""
+        assert self._descriptions(
+            ledger, TransactionFilter(description_contains="外卖披")
+        ) == ["外卖披萨"]
+        assert self._descriptions(
+            ledger, TransactionFilter(description_contains="面")
+        ) == ["楼下面馆"]
+        # 分类名中的文字不应命中描述条件
+        assert (
+            self._descriptions(ledger, TransactionFilter(description_contains="水电"))
+            == []
+        )
+
+    def test_created_window(self, ledger):
+        """测试创建时间窗口"""
+        assert (
+            self._descriptions(
+                ledger, TransactionFilter(created_to=datetime(2000, 1, 1))
+            )
+            == []
+        )
+        assert (
+            len(
+                self._descriptions(
+                    ledger, TransactionFilter(created_from=datetime(2000, 1, 1))
+                )
+            )
+            == 4
+        )
+
+    def test_legacy_arguments_override_spec(self, ledger):
+        """测试旧参数与过滤条件合并"""
+        transactions = TransactionService(ledger).get_transactions(
+            category_name="餐饮", filter_spec=TransactionFilter(category_names=["水电"])
+        )
+        assert [t.description for t in transactions] == ["楼下面馆"]
+        assert TransactionService(ledger).get_transactions(category_name="不存在") == []
+
+    def test_reused_by_analytics_and_export(self, ledger, tmp_path):
+        """测试统计和导出复用过滤条件"""
+        filter_spec = TransactionFilter(person_names=["张三"])
+        totals = AnalyticsService(ledger).category_subtree_totals(
+            filter_spec=filter_spec
+        )
+        assert totals["餐饮"] == 30.0 and totals["水电"] == 500.0
+
+        output = ExportService(ledger).export_transactions(
+            filter_spec.merged(transaction_type="expense"), str(tmp_path / "out")
+        )
+        lines = open(output, encoding="utf-8").read().splitlines()
+        assert len(lines) == 3
@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+
+from family_account_book.models import IncomeDetail, Transaction
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.repository import TransactionService
+
+
+class TestIncomeNetSummary:
+    """测试税前收入、扣除项和税后收入汇总"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        transaction_service = TransactionService(db)
+        transaction_service.create_income(
+            date(2023, 9, 10),
+            10000.0,
+            "九月工资",
+            "工资",
+            person_name="张三",
+            deductions=[("五险一金", 2000.0), ("个税", 300.0)],
+        )
+        transaction_service.import_payslips(
+            [
+                {
+                    "date": date(2023, 10, 10),
+                    "amount": 10000.0,
+                    "description": "十月工资",
+                    "category_name": "工资",
+                    "person_name": "张三",
+                    "deductions": [("五险一金", 2000.0), ("个税", 310.0)],
+                },
+                {
+                    "date": date(2023, 10, 15),
+                    "amount": 8000.0,
+                    "description": "十月工资",
+                    "category_name": "工资",
+                    "person_name": "李四",
+                    "deductions": [("五险一金", 1600.0)],
+                },
+                {
+                    "date": date(2023, 10, 20),
+                    "amount": 500.0,
+                    "description": "奖金",
+                    "category_name": "奖金",
+                },
+            ]
+        )
+        transaction_service.create_expense(date(2023, 10, 1), 99.0, "午饭", "餐饮")
+        return db
+
+    def test_import_payslips(self, ledger):
+        """测试工资单批量导入"""
+        assert (
+            ledger.query(Transaction).filter_by(transaction_type="income").count() == 4
+        )
+        assert ledger.query(IncomeDetail).count() == 5
+
+        payslip = ledger.query(Transaction).filter_by(amount=8000.0).one()
+        assert payslip.person.name == "李四"
+        assert [(d.item_name, d.amount) for d in payslip.income_details] == [
+            ("五险一金", 1600.0)
+        ]
+
+    def test_monthly_summary(self, ledger):
+        """测试按月汇总"""
+        summary = AnalyticsService(ledger).income_net_summary()
+
+        assert list(summary) == ["2023-09", "2023-10"]
+        assert summary["2023-10"] == {
+            "gross": 18500.0,
+            "deductions": {"五险一金": 3600.0, "个税": 310.0},
+            "total_deductions": 3910.0,
+            "net": 14590.0,
+        }
+
+    def test_yearly_summary_with_range(self, ledger):
+        """测试按年汇总和日期范围"""
+        analytics_service = AnalyticsService(ledger)
+
+        yearly = analytics_service.income_net_summary(period="year")
+        assert yearly["2023"]["net"] == 28500.0 - 6210.0
+
+        october = analytics_service.income_net_summary(
+            date(2023, 10, 1), date(2023, 11, 1), period="year"
+        )
+        assert october["2023"]["gross"] == 18500.0
+
+    def test_invalid_period(self, ledger):
+        """测试不支持的统计周期"""
+        with pytest.raises(ValueError):
+            AnalyticsService(ledger).income_net_summary(period="week")
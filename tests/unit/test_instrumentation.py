@@ -0,0 +1,60 @@
+from datetime import date
+
+import pytest
+
+from family_account_book.instrumentation import QueryStats
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.archive import archived_years
+from family_account_book.services.repository import TransactionService
+
+
+class TestQueryStats:
+    """测试 SQL 查询统计"""
+
+    @pytest.fixture
+    def stats(self, engine):
+        stats = QueryStats(slow_query_ms=0)
+        stats.install(engine)
+        yield stats
+        stats.uninstall(engine)
+
+    def test_queries_attributed_to_outermost_service_method(self, db, stats):
+        """测试查询归属到最外层服务方法"""
+        transaction_service = TransactionService(db)
+        transaction_service.create_expense(date(2023, 10, 1), 10.0, "午饭", "餐饮")
+        # 归档年份登记在会话内缓存，只在会话的第一次查询时读取
+        archived_years(db)
+        stats.reset()
+
+        transaction_service.get_transactions()
+        AnalyticsService(db).monthly_aggregation(2023, 10)
+
+        operations = stats.snapshot()["operations"]
+        assert operations["TransactionService.get_transactions"]["count"] == 1
+        # 查询已结账月份、汇总、查询分类名称
+        assert operations["AnalyticsService.monthly_aggregation"]["count"] == 3
+        histogram = operations["TransactionService.get_transactions"]["histogram"]
+        assert sum(histogram.values()) == 1
+
+    def test_slow_queries_logged_with_plan(self, db, stats):
+        """测试慢查询附带执行计划"""
+        TransactionService(db).get_transactions(start_date=date(2023, 1, 1))
+
+        slow = stats.snapshot()["slow_queries"]
+        select_entries = [e for e in slow if e["statement"].startswith("SELECT")]
+        assert select_entries
+        assert select_entries[-1]["operation"] == "TransactionService.get_transactions"
+        assert any("transactions" in step for step in select_entries[-1]["plan"])
+
+    def test_dump_and_uninstall(self, db, engine, stats, tmp_path):
+        """测试导出和移除监听"""
+        TransactionService(db).get_transactions()
+        path = stats.dump(str(tmp_path / "stats.json"))
+        assert (
+            "TransactionService.get_transactions" in open(path, encoding="utf-8").read()
+        )
+
+        stats.uninstall(engine)
+        stats.reset()
+        TransactionService(db).get_transactions()
+        assert stats.snapshot()["operations"] == {}
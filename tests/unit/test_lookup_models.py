@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+
+import pytest
+
+from family_account_book.services.repository import CategoryService, PersonService
+
+pytest.importorskip("PyQt6")
+
+from family_account_book.views.lookup_models import (  # noqa: E402
+    LookupModels,
+    NameListModel,
+)
+
+
+class TestNameListModel:
+    """测试带固定首行的名称列表模型"""
+
+    def test_sorted_insert_and_remove(self, qapp):
+        """测试按顺序插入、重复插入和删除不存在的名称"""
+        model = NameListModel(("全部",))
+        model.set_names(["交通", "餐饮"])
+        assert model.stringList() == ["全部", "交通", "餐饮"]
+
+        assert model.add_name("工资") is True
+        assert model.add_name("工资") is False
+        assert model.stringList() == ["全部"] + sorted(["交通", "餐饮", "工资"])
+
+        assert model.remove_name("交通") is True
+        assert model.remove_name("交通") is False
+        assert model.names() == sorted(["餐饮", "工资"])
+        assert model.stringList()[0] == "全部"
+
+
+class TestLookupModels:
+    """测试分类、人员名称缓存在各模型间保持一致"""
+
+    @pytest.fixture
+    def lookups(self, qapp, db):
+        CategoryService(db).create_category("餐饮")
+        CategoryService(db).create_category("交通")
+        PersonService(db).create_person("张三")
+
+        @contextmanager
+        def session_scope():
+            yield db
+
+        lookups = LookupModels(session_scope)
+        lookups.reload()
+        return lookups
+
+    def test_variants_stay_in_sync(self, lookups):
+        """测试不同首行的模型一起增删，重复和空名称被忽略"""
+        blank = lookups.categories("")
+        everything = lookups.categories("全部")
+        assert lookups.categories("") is blank
+
+        lookups.add_category("住房")
+        lookups.add_category("住房")
+        lookups.add_category(None)
+        lookups.add_category("")
+        expected = sorted(["餐饮", "交通", "住房"])
+        assert blank.stringList() == [""] + expected
+        assert everything.stringList() == ["全部"] + expected
+
+        lookups.remove_category("交通")
+        lookups.remove_category("不存在")
+        expected = sorted(["餐饮", "住房"])
+        assert blank.names() == everything.names() == expected
+        # 之后创建的模型使用当前名称
+        assert lookups.categories().stringList() == expected
+        assert lookups.persons("全部").stringList() == ["全部", "张三"]
+
+    def test_reload_replaces_names(self, lookups, db):
+        """测试重新加载后所有模型与数据库一致"""
+        blank = lookups.persons("")
+        everything = lookups.persons("全部")
+        lookups.add_person("只在缓存中")
+        PersonService(db).create_person("李四")
+
+        lookups.reload()
+        expected = sorted(["张三", "李四"])
+        assert blank.stringList() == [""] + expected
+        assert everything.stringList() == ["全部"] + expected
+        assert lookups.categories("全部").names() == sorted(["餐饮", "交通"])
@@ -0,0 +1,84 @@
+import sqlite3
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from family_account_book import maintenance
+from family_account_book.database import create_tables
+from family_account_book.services.repository import TransactionService
+
+
+class TestMaintenance:
+    """测试数据库维护"""
+
+    @pytest.fixture
+    def file_engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'ledger.db'}")
+        create_tables(engine)
+        with sessionmaker(bind=engine)() as db:
+            TransactionService(db).bulk_create_transactions(
+                [
+                    {
+                        "date": date(2023, 1 + i % 12, 1 + i % 28),
+                        "amount": float(i),
+                        "transaction_type": "expense",
+                        "description": f"支出 {i} " + "x" * 200,
+                        "category_name": "日用",
+                    }
+                    for i in range(2000)
+                ]
+            )
+        yield engine
+        engine.dispose()
+
+    def test_new_database_uses_incremental_vacuum(self, file_engine):
+        """测试新数据库为增量整理模式，删除数据后空闲维护归还空闲页"""
+        assert maintenance.database_stats(file_engine)["auto_vacuum"] == "incremental"
+
+        with file_engine.begin() as conn:
+            conn.execute(text("DELETE FROM transactions WHERE amount >= 200"))
+        before = maintenance.database_stats(file_engine)
+        assert before["free_ratio"] > maintenance.FREELIST_VACUUM_RATIO
+
+        result = maintenance.run_idle_maintenance(file_engine)
+        assert result["analyzed"] is True
+        assert result["freed_pages"] > 0
+        after = maintenance.database_stats(file_engine)
+        assert after["page_count"] < before["page_count"]
+        assert maintenance.optimize(file_engine) is False
+
+    def test_online_backup(self, file_engine, tmp_path):
+        """测试分步在线备份得到完整副本并报告进度"""
+        steps = []
+        target = str(tmp_path / "backup.db")
+        maintenance.backup(
+            file_engine,
+            target,
+            pages_per_step=16,
+            progress=lambda done, total: steps.append((done, total)),
+        )
+
+        assert len(steps) > 1
+        assert steps[-1][0] == steps[-1][1]
+        copy = sqlite3.connect(target)
+        assert copy.execute("SELECT count(*) FROM transactions").fetchone() == (2000,)
+        copy.close()
+
+    def test_integrity_check_reports_foreign_keys(self, engine):
+        """测试完整性检查通过，以及报告外键错误"""
+        assert maintenance.integrity_check(engine)["ok"] is True
+
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO transactions "
+                    "(date, amount, description, transaction_type, category_id) "
+                    "VALUES ('2023-10-01', 1, '孤立', 'expense', 999)"
+                )
+            )
+
+        report = maintenance.integrity_check(engine)
+        assert report["ok"] is False
+        assert "transactions" in {error[0] for error in report["foreign_key_errors"]}
@@ -0,0 +1,127 @@
+from datetime import date, datetime
+
+import pytest
+
+from family_account_book.models import (
+    Budget,
+    CategorizationRule,
+    Category,
+    CategoryClosure,
+    Person,
+    RecurringTemplate,
+)
+from family_account_book.services.budget import BudgetService
+from family_account_book.services.dedupe import compute_dedupe_key
+from family_account_book.services.recurring import RecurringService
+from family_account_book.services.repository import (
+    CategoryService,
+    PersonService,
+    TransactionService,
+)
+from family_account_book.services.rules import RuleService
+from family_account_book.services.snapshots import SnapshotService
+
+
+class TestMerge:
+    """测试合并分类和人员"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        """餐饮 > 外卖，重复的分类吃饭 > 夜宵；人员 爸爸 与重复的 老爸"""
+        category_service = CategoryService(db)
+        food = category_service.create_category("餐饮")
+        category_service.create_category("外卖", parent_id=food.id)
+        eating = category_service.create_category("吃饭")
+        category_service.create_category("夜宵", parent_id=eating.id)
+        person_service = PersonService(db)
+        person_service.create_person("爸爸")
+        person_service.create_person("老爸")
+
+        service = TransactionService(db)
+        service.create_expense(date(2023, 10, 1), 30.0, "午饭", "餐饮", "爸爸")
+        service.create_expense(date(2023, 10, 2), 45.0, "晚饭", "吃饭", "老爸")
+        service.create_expense(date(2023, 10, 3), 20.0, "烧烤", "夜宵", "老爸")
+        BudgetService(db).set_budget("吃饭", 200.0)
+        RuleService(db).create_rule("饭", "吃饭", "老爸")
+        RecurringService(db).create_template(
+            "早餐",
+            "expense",
+            10.0,
+            "早餐",
+            "吃饭",
+            datetime(2023, 1, 1),
+            person_name="老爸",
+        )
+        return service
+
+    def _id(self, db, model, name):
+        return db.query(model.id).filter(model.name == name).scalar()
+
+    def test_merge_category(self, db, ledger):
+        """测试合并分类：交易、子分类、预算、规则和模板改为目标分类后删除原分类"""
+        SnapshotService(db).close_month(2023, 10)
+        food, eating = self._id(db, Category, "餐饮"), self._id(db, Category, "吃饭")
+
+        assert CategoryService(db).merge_category(eating, food) == 1
+        assert db.get(Category, eating) is None
+        assert {t.category.name for t in ledger.get_transactions()} == {
+            "餐饮",
+            "夜宵",
+        }
+        assert [t.description for t in ledger.search("餐饮")] == ["晚饭", "午饭"]
+        assert not SnapshotService(db).is_closed(2023, 10)
+
+        # 夜宵改挂到餐饮下，闭包表与重建结果一致，预算沿用并包含子分类
+        night = db.get(Category, self._id(db, Category, "夜宵"))
+        assert night.parent_id == food
+        closure = sorted(
+            (row.ancestor_id, row.descendant_id, row.depth)
+            for row in db.query(CategoryClosure).all()
+        )
+        CategoryService(db).rebuild_closure()
+        assert closure == sorted(
+            (row.ancestor_id, row.descendant_id, row.depth)
+            for row in db.query(CategoryClosure).all()
+        )
+        assert db.query(Budget.category_id).scalar() == food
+        overview = BudgetService(db).overview(2023, 10)
+        assert [(item["category"], item["actual"]) for item in overview] == [
+            ("餐饮", 95.0)
+        ]
+        assert db.query(CategorizationRule.category_id).scalar() == food
+        assert db.query(RecurringTemplate.category_id).scalar() == food
+
+    def test_merge_category_refused(self, db, ledger):
+        """测试不能合并到自身、子分类或不存在的分类"""
+        service = CategoryService(db)
+        food = self._id(db, Category, "餐饮")
+        takeout = self._id(db, Category, "外卖")
+        with pytest.raises(ValueError):
+            service.merge_category(food, food)
+        with pytest.raises(ValueError):
+            service.merge_category(food, takeout)
+        with pytest.raises(ValueError):
+            service.merge_category(food, 999)
+        assert db.get(Category, food) is not None
+
+    def test_merge_person(self, db, ledger):
+        """测试合并人员：去重键按新人员重算，规则和模板改为目标人员"""
+        dad, old_dad = self._id(db, Person, "爸爸"), self._id(db, Person, "老爸")
+
+        assert PersonService(db).merge_person(old_dad, dad) == 2
+        assert db.get(Person, old_dad) is None
+        for transaction in ledger.get_transactions():
+            assert transaction.person_id == dad
+            assert transaction.dedupe_key == compute_dedupe_key(
+                transaction.date, transaction.amount, transaction.description, dad
+            )
+        assert [t.description for t in ledger.search("爸爸")] == [
+            "烧烤",
+            "晚饭",
+            "午饭",
+        ]
+        assert db.query(CategorizationRule.person_id).scalar() == dad
+        assert db.query(RecurringTemplate.person_id).scalar() == dad
+
+        with pytest.raises(ValueError):
+            PersonService(db).merge_person(dad, dad)
@@ -0,0 +1,62 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from family_account_book import migrations
+from family_account_book.models import Transaction
+from family_account_book.services import dedupe
+from family_account_book.services.repository import TransactionService
+
+
+class TestMigrations:
+    """测试版本化迁移"""
+
+    def test_fresh_database_is_latest(self, engine):
+        """测试新数据库建表后处于最新版本，再次升级不做任何事"""
+        assert migrations.current_version(engine) == migrations.LATEST_VERSION
+        assert migrations.pending_migrations(engine) == []
+        assert migrations.upgrade(engine) == []
+
+    def test_legacy_database_backfills_in_batches(self, engine, db, monkeypatch):
+        """测试没有版本表的旧数据库执行全部迁移，去重键分批回填并报告进度"""
+        TransactionService(db).bulk_create_transactions(
+            [
+                {
+                    "date": date(2023, 10, day),
+                    "amount": float(day),
+                    "transaction_type": "expense",
+                    "description": f"支出{day}",
+                    "category_name": "日用",
+                }
+                for day in range(1, 6)
+            ]
+        )
+        db.close()
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE schema_version"))
+            conn.execute(text("DROP INDEX ix_transactions_dedupe_key"))
+            conn.execute(text("ALTER TABLE transactions DROP COLUMN dedupe_key"))
+
+        monkeypatch.setattr(dedupe, "BACKFILL_BATCH_SIZE", 2)
+        events = []
+        applied = migrations.upgrade(
+            engine,
+            lambda description, done, total: events.append((description, done, total)),
+        )
+
+        assert applied == [m.version for m in migrations.MIGRATIONS]
+        backfill = [
+            (done, total) for name, done, total in events if name == "回填交易去重键"
+        ]
+        assert backfill == [(0, 1), (2, 5), (4, 5), (5, 5), (1, 1)]
+        assert (
+            db.query(Transaction).filter(Transaction.dedupe_key.is_(None)).count() == 0
+        )
+
+    def test_target_version(self, engine):
+        """测试只迁移到指定版本"""
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM schema_version WHERE version > 2"))
+
+        assert migrations.upgrade(engine, target=4) == [3, 4]
+        assert migrations.current_version(engine) == 4
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+
+from family_account_book.services.analytics import (
+    MARGIN_KEY,
+    AnalyticsService,
+    pivot_crosstab,
+)
+from family_account_book.services.repository import TransactionService
+
+
+class TestPersonCrosstab:
+    """测试人员 × 分类 × 月份交叉统计"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        transaction_service = TransactionService(db)
+        transaction_service.create_expense(
+            date(2023, 10, 1), 100.0, "午饭", "餐饮", person_name="张三"
+        )
+        transaction_service.create_expense(
+            date(2023, 10, 5), 50.0, "晚饭", "餐饮", person_name="张三"
+        )
+        transaction_service.create_expense(
+            date(2023, 11, 2), 20.0, "地铁", "交通", person_name="李四"
+        )
+        transaction_service.create_expense(date(2023, 11, 3), 8.0, "公交", "交通")
+        transaction_service.create_income(
+            date(2023, 10, 10), 9999.0, "工资", "工资", person_name="张三"
+        )
+        return db
+
+    def test_crosstab_cells(self, ledger):
+        """测试单次分组得到的明细格"""
+        crosstab = AnalyticsService(ledger).person_category_month_crosstab()
+
+        assert crosstab == {
+            ("张三", "餐饮", "2023-10"): 150.0,
+            ("李四", "交通", "2023-11"): 20.0,
+            (None, "交通", "2023-11"): 8.0,
+        }
+
+    def test_crosstab_margins_and_pivot(self, ledger):
+        """测试边际汇总和透视"""
+        crosstab = AnalyticsService(ledger).person_category_month_crosstab(margins=True)
+
+        assert crosstab[(MARGIN_KEY, MARGIN_KEY, MARGIN_KEY)] == 178.0
+        assert crosstab[(MARGIN_KEY, "交通", "2023-11")] == 28.0
+        assert crosstab[("张三", MARGIN_KEY, MARGIN_KEY)] == 150.0
+
+        table = pivot_crosstab(crosstab, row_axis=0, column_axis=2)
+        assert table["张三"] == {"2023-10": 150.0, MARGIN_KEY: 150.0}
+        assert table[MARGIN_KEY]["2023-11"] == 28.0
+
+    def test_crosstab_date_range(self, ledger):
+        """测试日期范围过滤"""
+        crosstab = AnalyticsService(ledger).person_category_month_crosstab(
+            date(2023, 11, 1), date(2023, 12, 1)
+        )
+
+        assert set(crosstab) == {
+            ("李四", "交通", "2023-11"),
+            (None, "交通", "2023-11"),
+        }
+
+    def test_names_that_look_like_keys(self, ledger):
+        """测试名为 total 的分类和名为“未指定”的人员不会并入汇总或未指定"""
+        transaction_service = TransactionService(ledger)
+        transaction_service.create_expense(date(2023, 11, 5), 5.0, "杂项", "total")
+        transaction_service.create_expense(
+            date(2023, 11, 6), 7.0, "打车", "交通", person_name="未指定"
+        )
+        crosstab = AnalyticsService(ledger).person_category_month_crosstab(
+            date(2023, 11, 1), date(2023, 12, 1), margins=True
+        )
+
+        assert crosstab[(None, "total", "2023-11")] == 5.0
+        assert crosstab[(MARGIN_KEY, "total", MARGIN_KEY)] == 5.0
+        assert crosstab[("未指定", "交通", "2023-11")] == 7.0
+        assert crosstab[(None, "交通", "2023-11")] == 8.0
+        assert crosstab[(MARGIN_KEY, MARGIN_KEY, MARGIN_KEY)] == 40.0
+
+        table = pivot_crosstab(crosstab, row_axis=0, column_axis=1)
+        assert table[None] == {"交通": 8.0, "total": 5.0, MARGIN_KEY: 13.0}
+        assert table[MARGIN_KEY][MARGIN_KEY] == 40.0
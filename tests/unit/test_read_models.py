@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.read_models import TransactionRow
+from family_account_book.services.repository import (
+    CategoryService,
+    PersonService,
+    TransactionService,
+)
+
+
+class TestReadModels:
+    """测试只读数据（列投影）"""
+
+    @pytest.fixture
+    def service(self, db):
+        service = TransactionService(db)
+        service.create_expense(date(2023, 10, 1), 30.0, "午饭", "餐饮", "张三")
+        service.create_expense(date(2023, 10, 2), 12.5, "地铁", "交通")
+        service.create_income(date(2023, 10, 5), 8000.0, "十月工资", "工资", "李四")
+        db.expunge_all()
+        return service
+
+    def test_list_transactions_matches_orm_query(self, db, service):
+        """测试只读数据与 ORM 查询的内容和顺序一致，且不进入身份映射"""
+        filter_spec = TransactionFilter(transaction_type="expense")
+        rows = service.list_transactions(filter_spec)
+        assert len(db.identity_map) == 0
+
+        expected = [
+            TransactionRow.from_transaction(t)
+            for t in service.get_transactions(filter_spec=filter_spec)
+        ]
+        assert rows == expected
+        assert [(r.category_name, r.person_name) for r in rows] == [
+            ("交通", None),
+            ("餐饮", "张三"),
+        ]
+        assert service.list_transactions(limit=1, offset=1)[0].description == "地铁"
+
+    def test_search_rows(self, db, service):
+        """测试全文搜索的只读数据与 search 结果一致"""
+        rows = service.search_rows("工资")
+        assert [r.id for r in rows] == [t.id for t in service.search("工资")]
+        assert rows[0].person_name == "李四"
+
+    def test_category_and_person_rows(self, db, service):
+        """测试分类和人员列表"""
+        assert [c.name for c in CategoryService(db).list_categories()] == sorted(
+            ["餐饮", "交通", "工资"]
+        )
+        persons = PersonService(db).list_persons()
+        assert [p.name for p in persons] == sorted(["张三", "李四"])
+        with pytest.raises(AttributeError):
+            persons[0].name = "王五"
@@ -0,0 +1,94 @@
+from datetime import date, datetime
+
+from family_account_book.models import IncomeDetail, Transaction
+from family_account_book.services.recurring import RecurringService
+from family_account_book.services.repository import TransactionService
+
+
+class TestRecurring:
+    """测试周期交易"""
+
+    def _dates(self, db, description):
+        return [
+            t.date.date()
+            for t in db.query(Transaction)
+            .filter(Transaction.description == description)
+            .order_by(Transaction.date)
+        ]
+
+    def test_catch_up_is_idempotent(self, db):
+        """测试一次补生成多个月，重复运行不产生重复交易"""
+        service = RecurringService(db)
+        service.create_template(
+            "房租", "expense", 3000.0, "房租", "住房", date(2023, 1, 31)
+        )
+
+        assert service.run_pending(date(2023, 4, 15)) == 3
+        assert self._dates(db, "房租") == [
+            date(2023, 1, 31),
+            date(2023, 2, 28),
+            date(2023, 3, 31),
+        ]
+
+        assert service.run_pending(date(2023, 4, 15)) == 0
+        assert service.run_pending(date(2023, 5, 1)) == 1
+        assert self._dates(db, "房租")[-1] == date(2023, 4, 30)
+
+    def test_occurrence_keys_survive_reset_watermark(self, db):
+        """测试水位被重置时靠发生键去重"""
+        service = RecurringService(db)
+        template = service.create_template(
+            "订阅", "expense", 15.0, "视频会员", "娱乐", date(2023, 1, 5)
+        )
+        service.run_pending(date(2023, 3, 10))
+
+        template.last_generated_date = None
+        db.commit()
+        assert service.run_pending(date(2023, 3, 10)) == 0
+        assert len(self._dates(db, "视频会员")) == 3
+
+    def test_income_with_deductions_and_end_date(self, db):
+        """测试收入模板带扣除明细、间隔和结束日期"""
+        service = RecurringService(db)
+        service.create_template(
+            "工资",
+            "income",
+            10000.0,
+            "月薪",
+            "工资",
+            date(2023, 1, 10),
+            interval=2,
+            end_date=date(2023, 6, 30),
+            person_name="张三",
+            deductions=[("五险一金", 1000.0)],
+        )
+        service.create_template(
+            "周末",
+            "expense",
+            50.0,
+            "周末买菜",
+            "餐饮",
+            date(2023, 1, 7),
+            frequency="weekly",
+        )
+
+        service.run_pending(date(2023, 12, 31))
+        assert self._dates(db, "月薪") == [
+            date(2023, 1, 10),
+            date(2023, 3, 10),
+            date(2023, 5, 10),
+        ]
+        assert db.query(IncomeDetail).count() == 3
+        assert len(self._dates(db, "周末买菜")) == 52
+
+    def test_skips_manually_recorded_occurrence(self, db):
+        """测试已手工录入的同一笔交易不会再生成"""
+        TransactionService(db).create_expense(
+            datetime(2023, 2, 1), 3000.0, "房租", "住房"
+        )
+        service = RecurringService(db)
+        service.create_template(
+            "房租", "expense", 3000.0, "房租", "住房", date(2023, 1, 1)
+        )
+        assert service.run_pending(date(2023, 3, 1)) == 2
+        assert len(self._dates(db, "房租")) == 3
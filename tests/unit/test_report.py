@@ -0,0 +1,68 @@
+import os
+from datetime import date
+
+import pytest
+
+from family_account_book.services.budget import BudgetService
+from family_account_book.services.report import ReportService, iter_months
+from family_account_book.services.repository import TransactionService
+
+
+class TestReport:
+    """测试离线报告"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        service = TransactionService(db)
+        service.create_expense(date(2023, 1, 5), 100.0, "午饭", "餐饮")
+        service.create_expense(date(2023, 1, 8), 40.0, "打车", "交通")
+        service.create_expense(date(2023, 3, 2), 60.0, "晚饭", "餐饮")
+        BudgetService(db).set_budget("餐饮", 80.0)
+        return service
+
+    def test_collect_charts(self, db, ledger):
+        """测试图表顺序：期间趋势在前，没有支出的月份不生成饼图"""
+        charts = ReportService(db).collect_charts((2023, 1), (2023, 3))
+        assert [chart.name for chart in charts] == [
+            "0_trend",
+            "2023-01_1_pie",
+            "2023-01_2_budget",
+            "2023-02_2_budget",
+            "2023-03_1_pie",
+            "2023-03_2_budget",
+        ]
+
+        months, series = charts[0].data
+        assert months == ("2023-01", "2023-02", "2023-03")
+        assert series == (("餐饮", (100.0, 0.0, 60.0)), ("交通", (40.0, 0.0, 0.0)))
+        assert charts[1].data == (("餐饮", 100.0), ("交通", 40.0))
+        assert charts[2].data == (("餐饮", 80.0, 100.0, "over"),)
+
+        with pytest.raises(ValueError):
+            ReportService(db).collect_charts((2023, 3), (2023, 1))
+
+    def test_iter_months(self):
+        """测试跨年的月份范围"""
+        assert iter_months((2023, 11), (2024, 2)) == [
+            (2023, 11),
+            (2023, 12),
+            (2024, 1),
+            (2024, 2),
+        ]
+
+    def test_generate_in_worker_processes(self, db, ledger, tmp_path):
+        """测试在工作进程中渲染图表并汇总为 PDF"""
+        pytest.importorskip("matplotlib")
+        progress = []
+        result = ReportService(db).generate(
+            (2023, 1),
+            (2023, 3),
+            str(tmp_path),
+            workers=2,
+            workbooks=False,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+        assert len(result["images"]) == 6
+        assert all(os.path.exists(path) for path in result["images"])
+        assert os.path.getsize(result["pdf"]) > 0
+        assert progress[-1] == (6, 6)
@@ -0,0 +1,150 @@
+import time
+from datetime import date
+
+import pytest
+
+from family_account_book.models import CategorizationRule, Transaction
+from family_account_book.services.repository import (
+    CategoryService,
+    PersonService,
+    TransactionService,
+)
+from family_account_book.services.rules import (
+    UNCATEGORIZED_CATEGORY,
+    RuleMatcher,
+    RuleService,
+    RuleSpec,
+)
+
+
+class TestCategorizationRules:
+    """测试自动分类规则"""
+
+    @pytest.fixture
+    def rules(self, db):
+        category_service = CategoryService(db)
+        for name in ("餐饮", "咖啡", "交通", "大额采购", "日用"):
+            category_service.create_category(name)
+        PersonService(db).create_person("张三")
+
+        rule_service = RuleService(db)
+        rule_service.create_rule("外卖", category_name="餐饮")
+        rule_service.create_rule("starbucks", category_name="咖啡", priority=5)
+        rule_service.create_rule(r"(地铁|公交)\d*", category_name="交通", is_regex=True)
+        rule_service.create_rule("超市", category_name="日用")
+        rule_service.create_rule(
+            "超市", category_name="大额采购", amount_min=500, priority=1
+        )
+        rule_service.create_rule("加油", person_name="张三")
+        return db
+
+    def _category(self, db, transaction):
+        return db.get(Transaction, transaction.id).category.name
+
+    def test_create_expense_uses_rules(self, rules):
+        """测试未指定分类时按规则匹配分类和人员"""
+        service = TransactionService(rules)
+        coffee = service.create_expense(
+            date(2023, 10, 1), 35.0, "美团外卖 Starbucks", None
+        )
+        assert self._category(rules, coffee) == "咖啡"
+
+        metro = service.create_expense(date(2023, 10, 1), 4.0, "地铁10号线", "")
+        assert self._category(rules, metro) == "交通"
+
+        big = service.create_expense(date(2023, 10, 2), 800.0, "超市囤货", None)
+        small = service.create_expense(date(2023, 10, 2), 80.0, "超市买菜", None)
+        assert self._category(rules, big) == "大额采购"
+        assert self._category(rules, small) == "日用"
+
+        fuel = service.create_expense(date(2023, 10, 3), 300.0, "加油", None)
+        assert fuel.person.name == "张三"
+        assert self._category(rules, fuel) == UNCATEGORIZED_CATEGORY
+
+    def test_explicit_category_wins(self, rules):
+        """测试明确指定的分类不被规则覆盖"""
+        transaction = TransactionService(rules).create_expense(
+            date(2023, 10, 1), 35.0, "外卖", "咖啡"
+        )
+        assert self._category(rules, transaction) == "咖啡"
+
+    def test_bulk_import_uses_rules(self, rules):
+        """测试批量导入按规则补全分类"""
+        service = TransactionService(rules)
+        rows = [
+            {
+                "date": date(2023, 10, day),
+                "amount": 20.0,
+                "transaction_type": "expense",
+                "description": description,
+            }
+            for day, description in enumerate(["外卖", "公交", "书"], start=1)
+        ]
+        assert service.bulk_create_transactions(rows) == 3
+        categories = [
+            t.category.name for t in rules.query(Transaction).order_by(Transaction.date)
+        ]
+        assert categories == ["餐饮", "交通", UNCATEGORIZED_CATEGORY]
+
+    def test_invalid_rules_rejected(self, rules):
+        """测试无效规则"""
+        rule_service = RuleService(rules)
+        with pytest.raises(ValueError):
+            rule_service.create_rule("(", category_name="餐饮", is_regex=True)
+        with pytest.raises(ValueError):
+            rule_service.create_rule(r"(a)\1", category_name="餐饮", is_regex=True)
+        with pytest.raises(ValueError):
+            rule_service.create_rule("外卖", category_name="不存在")
+        with pytest.raises(ValueError):
+            rule_service.create_rule("外卖")
+
+    def test_delete_category_detaches_rules(self, rules):
+        """测试删除分类时删除仅指向该分类的规则"""
+        category = (
+            rules.query(CategorizationRule)
+            .filter(CategorizationRule.pattern == "外卖")
+            .one()
+            .category
+        )
+        assert CategoryService(rules).delete_category(category.id)
+        patterns = [rule.pattern for rule in RuleService(rules).get_all_rules()]
+        assert "外卖" not in patterns
+
+    def test_overlapping_regex_beats_keyword(self):
+        """测试与关键字从同一位置开始的高优先级正则也会命中"""
+        matcher = RuleMatcher(
+            [
+                RuleSpec(1, "外卖", False, None, None, None, 10, None, 0),
+                RuleSpec(2, "外卖.*咖啡", True, None, None, None, 20, None, 5),
+            ]
+        )
+        assert matcher.match("外卖咖啡", 10.0, "expense").category_id == 20
+        assert matcher.match("外卖午饭", 10.0, "expense").category_id == 10
+
+    def test_overlapping_regexes_combine(self):
+        """测试同一位置的多条正则都命中，低优先级规则补充人员"""
+        matcher = RuleMatcher(
+            [
+                RuleSpec(1, "加油站", True, None, None, None, 10, None, 5),
+                RuleSpec(2, "加油.*", True, None, None, None, None, 7, 0),
+            ]
+        )
+        assert matcher.match("加油站 95号", 300.0, "expense") == (10, 7)
+
+    def test_matcher_scales(self):
+        """测试合并正则匹配 10 万条描述的耗时"""
+        specs = [
+            RuleSpec(i, f"商户{i:03d}", False, None, None, None, i, None, 0)
+            for i in range(1, 301)
+        ]
+        matcher = RuleMatcher(specs)
+        descriptions = [f"消费 商户{i % 400:03d} 第{i}笔" for i in range(100000)]
+
+        started = time.perf_counter()
+        matches = [matcher.match(text, 10.0, "expense") for text in descriptions]
+        elapsed = time.perf_counter() - started
+
+        assert matches[5].category_id == 5
+        assert matches[350] is None
+        # 逐条尝试全部关键字时需要几十秒，这里只防止退化
+        assert elapsed < 2.0
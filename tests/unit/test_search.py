@@ -0,0 +1,139 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from family_account_book.database import create_tables, search_index_tokenizer
+from family_account_book.services.filters import TransactionFilter
+from family_account_book.services.repository import (
+    CategoryService,
+    PersonService,
+    TransactionService,
+)
+
+
+class TestTransactionSearch:
+    """测试交易全文搜索"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        transaction_service = TransactionService(db)
+        transaction_service.create_expense(
+            date(2023, 10, 1), 300.0, "请水管工修理厨房漏水", "维修", person_name="张三"
+        )
+        transaction_service.create_expense(
+            date(2023, 10, 5), 120.0, "水管工上门费", "维修", person_name="李四"
+        )
+        transaction_service.create_expense(
+            date(2023, 10, 8), 45.0, "超市买菜", "餐饮", person_name="张三"
+        )
+        transaction_service.create_income(
+            date(2023, 10, 10), 8000.0, "十月工资", "工资", person_name="张三"
+        )
+        return db
+
+    def _descriptions(self, transactions):
+        return [t.description for t in transactions]
+
+    def test_search_description(self, ledger):
+        """测试按描述子串搜索"""
+        results = TransactionService(ledger).search("水管工")
+
+        assert sorted(self._descriptions(results)) == [
+            "水管工上门费",
+            "请水管工修理厨房漏水",
+        ]
+
+    def test_search_short_term_and_names(self, ledger):
+        """测试短词和分类、人员名称搜索"""
+        transaction_service = TransactionService(ledger)
+
+        assert self._descriptions(transaction_service.search("买菜")) == ["超市买菜"]
+        assert len(transaction_service.search("张三")) == 3
+        assert len(transaction_service.search("维修 李四")) == 1
+
+    def test_search_filters_and_pagination(self, ledger):
+        """测试过滤条件和分页"""
+        transaction_service = TransactionService(ledger)
+
+        expenses = transaction_service.search(
+            "张三", TransactionFilter(transaction_type="expense")
+        )
+        assert len(expenses) == 2
+        assert transaction_service.search(
+            "张三", TransactionFilter(category_names=["工资"])
+        )[0].description == ("十月工资")
+
+        first_page = transaction_service.search("张三", limit=2)
+        second_page = transaction_service.search("张三", limit=2, offset=2)
+        assert len(first_page) == 2 and len(second_page) == 1
+        assert not {t.id for t in first_page} & {t.id for t in second_page}
+
+    def test_index_follows_updates_and_renames(self, ledger):
+        """测试触发器同步修改、删除和改名"""
+        transaction_service = TransactionService(ledger)
+        plumber = transaction_service.search("上门费")[0]
+
+        transaction_service.update_transaction(plumber.id, description="开锁师傅")
+        assert transaction_service.search("上门费") == []
+        assert len(transaction_service.search("开锁师傅")) == 1
+
+        category = next(
+            c for c in CategoryService(ledger).get_all_categories() if c.name == "维修"
+        )
+        category.name = "家居维修"
+        ledger.commit()
+        assert len(transaction_service.search("家居维修")) == 2
+
+        person = next(
+            p for p in PersonService(ledger).get_all_persons() if p.name == "李四"
+        )
+        person.name = "王五"
+        ledger.commit()
+        assert transaction_service.search("王五")[0].id == plumber.id
+
+        transaction_service.delete_transaction(plumber.id)
+        assert transaction_service.search("开锁师傅") == []
+
+    def test_user_input_is_not_fts_syntax(self, ledger):
+        """测试特殊字符不会导致查询语法错误"""
+        assert TransactionService(ledger).search('水管工" OR *') == []
+
+
+class TestSearchWithoutTrigram:
+    """测试全文索引退回默认分词器时仍能按子串搜索"""
+
+    @pytest.fixture
+    def db(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        # 模拟 SQLite 不支持 trigram 时建立的索引
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE VIRTUAL TABLE transactions_fts "
+                    "USING fts5(description, category_name, person_name)"
+                )
+            )
+        create_tables(engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+        engine.dispose()
+
+    def test_substring_search_uses_like(self, db):
+        """测试默认分词器下子串搜索和描述过滤都走 LIKE"""
+        assert search_index_tokenizer(db) == "unicode61"
+        service = TransactionService(db)
+        service.create_expense(date(2023, 10, 1), 35.0, "星巴克咖啡店消费", "餐饮")
+        service.create_expense(date(2023, 10, 2), 12.0, "地铁", "交通")
+
+        assert [t.description for t in service.search("咖啡店")] == ["星巴克咖啡店消费"]
+        assert [t.description for t in service.search("咖啡店 餐饮")] == [
+            "星巴克咖啡店消费"
+        ]
+        filtered = service.get_transactions(
+            filter_spec=TransactionFilter(description_contains="咖啡店")
+        )
+        assert [t.description for t in filtered] == ["星巴克咖啡店消费"]
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from family_account_book.database import create_tables
+from family_account_book.server import ApiServer, create_server_engine
+from family_account_book.services.repository import TransactionService
+
+
+async def request(port, method, target, payload=None):
+    """发送一个请求，返回 (状态码, 响应头, 响应体)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+
+    head, _, data = raw.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    if headers.get("Transfer-Encoding") == "chunked":
+        chunks = b""
+        while True:
+            size, _, data = data.partition(b"\r\n")
+            size = int(size, 16)
+            if size == 0:
+                break
+            chunks, data = chunks + data[:size], data[size + 2 :]
+        data = chunks
+    return int(lines[0].split()[1]), headers, data.decode("utf-8")
+
+
+class TestApiServer:
+    """测试 HTTP/JSON 接口"""
+
+    @pytest.fixture
+    def session_factory(self, tmp_path):
+        engine = create_server_engine(f"sqlite:///{tmp_path / 'ledger.db'}", 2)
+        create_tables(engine)
+        yield sessionmaker(autoflush=False, bind=engine)
+        engine.dispose()
+
+    def run(self, session_factory, scenario):
+        async def main():
+            api = ApiServer(session_factory, read_workers=2)
+            server = await api.start("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                async with server:
+                    return await scenario(port)
+            finally:
+                api.close()
+
+        return asyncio.run(main())
+
+    def test_create_query_and_delete(self, session_factory):
+        """测试新增、重复冲突、查询、统计和删除"""
+        lunch = {
+            "date": "2024-06-01",
+            "amount": 35.5,
+            "description": "午饭",
+            "category": "餐饮",
+        }
+
+        async def scenario(port):
+            status, _, body = await request(port, "POST", "/api/transactions", lunch)
+            assert status == 201
+            created = json.loads(body)
+            assert created["category"] == "餐饮"
+
+            status, _, _ = await request(port, "POST", "/api/transactions", lunch)
+            assert status == 409
+
+            # 并发读请求由读线程池处理
+            results = await asyncio.gather(
+                request(port, "GET", "/api/transactions?start=2024-06-01&type=expense"),
+                request(port, "GET", "/api/stats/monthly?year=2024&month=6"),
+            )
+            assert [item["id"] for item in json.loads(results[0][2])] == [created["id"]]
+            assert json.loads(results[1][2])["餐饮"] == 35.5
+
+            status, _, _ = await request(
+                port, "DELETE", f"/api/transactions/{created['id']}"
+            )
+            assert status == 200
+            status, _, _ = await request(
+                port, "DELETE", f"/api/transactions/{created['id']}"
+            )
+            assert status == 404
+
+        self.run(session_factory, scenario)
+
+    def test_errors(self, session_factory):
+        """测试参数错误、路径不存在和方法不允许"""
+
+        async def scenario(port):
+            status, _, body = await request(port, "GET", "/api/transactions?min=abc")
+            assert status == 400
+            assert "min" in json.loads(body)["error"]
+            assert (await request(port, "GET", "/api/unknown"))[0] == 404
+            assert (await request(port, "PUT", "/api/budgets"))[0] == 405
+            status, _, _ = await request(
+                port, "POST", "/api/transactions", {"amount": 1}
+            )
+            assert status == 400
+
+        self.run(session_factory, scenario)
+
+    def test_end_date_includes_whole_day(self, session_factory):
+        """测试 end 参数包含结束日当天的全部交易（含非零点时间）"""
+        with session_factory() as db:
+            service = TransactionService(db)
+            service.create_expense(datetime(2024, 6, 30), 20.0, "午饭", "餐饮")
+            service.create_expense(datetime(2024, 6, 30, 10), 25.0, "咖啡", "餐饮")
+            service.create_expense(datetime(2024, 7, 1), 30.0, "晚饭", "餐饮")
+
+        async def scenario(port):
+            return await asyncio.gather(
+                request(port, "GET", "/api/transactions?end=2024-06-30"),
+                request(port, "GET", "/api/export.csv?start=2024-06-01&end=2024-06-30"),
+            )
+
+        (_, _, listed), (_, _, exported) = self.run(session_factory, scenario)
+        assert sorted(item["amount"] for item in json.loads(listed)) == [20.0, 25.0]
+        assert len(exported.splitlines()) == 3
+
+    def test_streamed_export(self, session_factory):
+        """测试导出以分块传输发送全部行"""
+        with session_factory() as db:
+            TransactionService(db).bulk_create_transactions(
+                [
+                    {
+                        "date": date(2024, 5, day),
+                        "amount": float(day),
+                        "transaction_type": "expense",
+                        "description": f"支出{day}",
+                        "category_name": "日用",
+                    }
+                    for day in range(1, 29)
+                ]
+            )
+
+        async def scenario(port):
+            return await request(port, "GET", "/api/export.csv?max=20")
+
+        status, headers, body = self.run(session_factory, scenario)
+        assert status == 200
+        assert headers["Transfer-Encoding"] == "chunked"
+        lines = body.splitlines()
+        assert lines[0] == "日期,类型,分类,金额,描述"
+        assert len(lines) == 21
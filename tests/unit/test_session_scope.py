@@ -0,0 +1,90 @@
+import threading
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from family_account_book import database
+from family_account_book.controllers.main_controller import AccountBookController
+from family_account_book.database import create_tables, session_scope
+from family_account_book.models import Transaction
+
+
+class TestSessionScope:
+    """测试工作单元和线程本地会话"""
+
+    @pytest.fixture
+    def session_factory(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'scope.db'}")
+        create_tables(engine)
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        engine.dispose()
+
+    def test_commit_and_close(self, session_factory):
+        """测试正常结束时提交并关闭会话"""
+        with session_scope(session_factory) as db:
+            db.add(
+                Transaction(
+                    date=date(2023, 10, 1),
+                    amount=10.0,
+                    transaction_type="expense",
+                    description="午饭",
+                )
+            )
+            session = db
+
+        assert not session.in_transaction()
+        assert len(session.identity_map) == 0
+        with session_scope(session_factory) as db:
+            assert db.query(Transaction).count() == 1
+
+    def test_rollback_on_error(self, session_factory):
+        """测试异常时回滚"""
+        with pytest.raises(RuntimeError):
+            with session_scope(session_factory) as db:
+                db.add(
+                    Transaction(
+                        date=date(2023, 10, 1),
+                        amount=10.0,
+                        transaction_type="expense",
+                        description="午饭",
+                    )
+                )
+                db.flush()
+                raise RuntimeError("boom")
+
+        with session_scope(session_factory) as db:
+            assert db.query(Transaction).count() == 0
+
+    def test_controller_results_usable_after_scope(self, session_factory):
+        """测试控制器返回的对象在会话关闭后仍可读取"""
+        controller = AccountBookController(session_factory)
+
+        transaction = controller.record_expense(date(2023, 10, 1), 25.0, "午饭", "餐饮")
+
+        assert transaction.amount == 25.0
+        assert controller.get_monthly_stats(2023, 10) == {"餐饮": 25.0, "total": 25.0}
+        assert [c.name for c in controller.get_categories()] == ["餐饮"]
+
+    def test_thread_session_scope(self, session_factory, monkeypatch):
+        """测试每个线程使用独立会话，结束后移除"""
+        registry = scoped_session(session_factory)
+        monkeypatch.setattr(database, "ScopedSession", registry)
+        sessions = {}
+
+        def worker(name):
+            with database.thread_session_scope() as db:
+                with database.thread_session_scope() as inner:
+                    assert inner is db
+                sessions[name] = db
+                db.query(Transaction).count()
+            assert not registry.registry.has()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(session) for session in sessions.values()}) == 3
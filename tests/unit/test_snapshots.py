@@ -0,0 +1,99 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.repository import TransactionService
+from family_account_book.services.snapshots import SnapshotService
+
+
+class TestMonthSnapshots:
+    """测试月度结账快照"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        service = TransactionService(db)
+        service.create_expense(date(2023, 3, 5), 100.0, "午饭", "餐饮")
+        service.create_expense(date(2023, 3, 20), 40.0, "打车", "交通")
+        service.create_expense(date(2023, 4, 2), 60.0, "晚饭", "餐饮")
+        service.create_income(
+            date(2023, 3, 10), 10000.0, "工资", "工资", deductions=[("个税", 500.0)]
+        )
+        return service
+
+    def test_closed_month_served_from_snapshot(self, db, ledger):
+        """测试结账后统计读取快照，结果与实时计算一致"""
+        analytics = AnalyticsService(db)
+        live = (
+            analytics.monthly_aggregation(2023, 3),
+            analytics.income_net_summary(period="year"),
+            analytics.per_month_series_for_category("餐饮", 2023, 2, 2023, 4),
+            analytics.category_sum_in_range("餐饮", date(2023, 1, 1), date(2023, 4, 2)),
+        )
+
+        closure = SnapshotService(db).close_month(2023, 3)
+        assert closure.row_count == 3
+        assert SnapshotService(db).verify_month(2023, 3)
+
+        # 快照是统计的唯一来源：直接改交易表（绕过触发器）不影响已结账月份
+        db.execute(text("DROP TRIGGER month_closures_transaction_update"))
+        db.execute(text("UPDATE transactions SET amount = amount * 2"))
+        assert analytics.monthly_aggregation(2023, 3) == live[0]
+        assert not SnapshotService(db).verify_month(2023, 3)
+        db.rollback()
+
+        assert (
+            analytics.monthly_aggregation(2023, 3),
+            analytics.income_net_summary(period="year"),
+            analytics.per_month_series_for_category("餐饮", 2023, 2, 2023, 4),
+            analytics.category_sum_in_range("餐饮", date(2023, 1, 1), date(2023, 4, 2)),
+        ) == live
+
+    def test_write_reopens_closed_month(self, db, ledger):
+        """测试写入已结账月份的交易或收入明细时自动重新开账"""
+        snapshots = SnapshotService(db)
+        assert snapshots.close_finished_months() == ["2023-03", "2023-04"]
+
+        ledger.create_expense(date(2023, 3, 28), 10.0, "水果", "餐饮")
+        assert not snapshots.is_closed(2023, 3)
+        assert snapshots.is_closed(2023, 4)
+        assert AnalyticsService(db).monthly_aggregation(2023, 3)["餐饮"] == 110.0
+
+        income = ledger.get_transactions(transaction_type="income")[0]
+        snapshots.close_month(2023, 3)
+        ledger.add_income_details([(income.id, "社保", 800.0)])
+        assert not snapshots.is_closed(2023, 3)
+        assert db.execute(text("SELECT count(*) FROM month_snapshots")).scalar() == 1
+
+    def test_only_finished_months_can_be_closed(self, db):
+        """测试只能结账已结束且未结账的月份"""
+        snapshots = SnapshotService(db)
+        today = date.today()
+        with pytest.raises(ValueError):
+            snapshots.close_month(today.year, today.month)
+
+        snapshots.close_month(2023, 1)
+        with pytest.raises(ValueError):
+            snapshots.close_month(2023, 1)
+        assert snapshots.reopen_month(2023, 1) is True
+        assert snapshots.reopen_month(2023, 1) is False
+
+    def test_unchanged_update_keeps_closure(self, db, ledger):
+        """测试保存未改变统计列的交易或收入明细不会重新开账"""
+        snapshots = SnapshotService(db)
+        snapshots.close_month(2023, 3)
+        lunch = ledger.get_transactions(category_name="餐饮")[-1]
+        ledger.update_transaction(
+            lunch.id,
+            date=date(2023, 3, 5),
+            amount=100.0,
+            category_name="餐饮",
+            description="工作午饭",
+        )
+        db.execute(text("UPDATE income_details SET amount = amount"))
+        assert snapshots.is_closed(2023, 3)
+        assert snapshots.verify_month(2023, 3)
+
+        ledger.update_transaction(lunch.id, amount=120.0)
+        assert not snapshots.is_closed(2023, 3)
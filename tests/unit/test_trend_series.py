@@ -0,0 +1,80 @@
+import math
+from datetime import date
+
+import pytest
+
+from family_account_book.services.analytics import AnalyticsService
+from family_account_book.services.downsample import lttb, visible_range
+from family_account_book.services.repository import TransactionService
+from family_account_book.services.snapshots import SnapshotService
+
+
+class TestCategorySeries:
+    """测试多分类趋势序列"""
+
+    @pytest.fixture
+    def ledger(self, db):
+        service = TransactionService(db)
+        service.create_expense(date(2023, 1, 2), 10.0, "早饭", "餐饮")
+        service.create_expense(date(2023, 1, 2), 20.0, "午饭", "餐饮")
+        service.create_expense(date(2023, 1, 4), 5.0, "公交", "交通")
+        service.create_expense(date(2023, 2, 10), 30.0, "晚饭", "餐饮")
+        service.create_income(date(2023, 1, 2), 100.0, "红包", "餐饮")
+        return service
+
+    def test_daily_series(self, db, ledger):
+        """测试逐日序列补 0，只统计支出"""
+        series = AnalyticsService(db).category_series(
+            ["餐饮", "交通", "不存在"], date(2023, 1, 1), date(2023, 1, 5)
+        )
+        days = [date(2023, 1, d) for d in range(1, 5)]
+        assert series == {
+            "餐饮": list(zip(days, [0.0, 30.0, 0.0, 0.0])),
+            "交通": list(zip(days, [0.0, 0.0, 0.0, 5.0])),
+            "不存在": list(zip(days, [0.0] * 4)),
+        }
+
+    def test_monthly_series_matches_snapshots(self, db, ledger):
+        """测试逐月序列与单分类月度序列一致，已结账月份读快照"""
+        analytics = AnalyticsService(db)
+        expected = [
+            (date(year, month, 1), amount)
+            for year, month, amount in analytics.per_month_series_for_category(
+                "餐饮", 2022, 12, 2023, 2
+            )
+        ]
+        SnapshotService(db).close_month(2023, 1)
+        series = analytics.category_series(
+            ["餐饮"], date(2022, 12, 1), date(2023, 3, 1), "month"
+        )
+        assert series["餐饮"] == expected
+
+        with pytest.raises(ValueError):
+            analytics.category_series(
+                ["餐饮"], date(2023, 1, 1), date(2023, 2, 1), "week"
+            )
+
+
+class TestDownsample:
+    """测试 LTTB 降采样"""
+
+    def test_keeps_endpoints_and_peaks(self):
+        """测试保留首尾点和尖峰，点数等于阈值"""
+        xs = list(range(1000))
+        ys = [math.sin(x / 50) for x in xs]
+        ys[437] = 10.0
+        out_x, out_y = lttb(xs, ys, 100)
+        assert len(out_x) == len(out_y) == 100
+        assert (out_x[0], out_x[-1]) == (0, 999)
+        assert out_x == sorted(out_x)
+        assert 437 in out_x
+
+    def test_short_series_unchanged(self):
+        """测试点数不超过阈值时原样返回"""
+        assert lttb([1, 2, 3], [4, 5, 6], 10) == ([1, 2, 3], [4, 5, 6])
+
+    def test_visible_range(self):
+        """测试可见范围两侧各多带一个点"""
+        xs = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+        assert visible_range(xs, 1.5, 3.5) == (1, 5)
+        assert visible_range(xs, -10, 100) == (0, 6)